@@ -7,9 +7,11 @@
 #    the folder containing the samples has been moved or renamed frequently, so the paths might not be recognized correctly.
 #    As a result, the program ignores these files. To fix this, you can open the FLP file in FL Studio, resave it, and then reload
 #    it in the program. This will update the paths inside the FLP file and make them recognizable again.
-# 2. Path search only works on Windows. For Unix/MacOS paths, the search becomes extremely slow, 
-#    but it can be implemented easily by replacing the regex in file_utils.py with the commented-out pattern.
-#    For testing purposes, there is also code available where the two commented-out paths simply need to be re-enabled.
+#    Alternatively, add the folder the samples were moved to with "Add Library". Missing samples are then looked up
+#    by file name in the indexed library folders.
+# 2. Only the sample paths of channels and audio clips are read from the project. Samples that are only referenced inside
+#    plugin states (e.g. Slicex or DirectWave) are not detected. Files without a valid FLP header are scanned byte by byte
+#    for Windows, UNC and Unix/MacOS paths instead.
 # 3. Drag and Drop does not recognize shortcuts, only the original files. 
 #    This is probably because the file type (".flp") is usually followed by a " - Shortcut" suffix.
 # 4. Scrollbar design doesn't look great in some places, but cannot be disabled since laptops would otherwise be unable to scroll.
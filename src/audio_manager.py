@@ -1,12 +1,49 @@
 import pygame
 import os
+from collections import OrderedDict
+from src.file_utils import get_file_signature
+from src.audio_probe import probe
+
+# decoded sounds kept in memory, a minute of 44.1 kHz 16 bit stereo audio takes about 10 MiB
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# files that decode to more bytes are streamed with pygame.mixer.music instead of being decoded completely before playback
+DEFAULT_STREAM_MIN_BYTES = 16 * 1024 * 1024
+
+# (frequency, format, channels) assumed if the mixer is not initialized yet
+DEFAULT_MIXER_FORMAT = (44100, -16, 2)
+
+
+def decoded_bytes_per_second():
+    frequency, sample_format, channels = pygame.mixer.get_init() or DEFAULT_MIXER_FORMAT
+    return frequency * channels * (abs(sample_format) // 8)
+
+
+def decoded_size(sound):
+    # estimated from the length, pygame only exposes the raw samples as a (costly) copy
+    try:
+        return int(sound.get_length() * decoded_bytes_per_second())
+    except (TypeError, ValueError, pygame.error):
+        return 0
+
 
 class AudioManager:
-    def __init__(self):
+    def __init__(self, cache_bytes=DEFAULT_CACHE_BYTES, stream_min_bytes=DEFAULT_STREAM_MIN_BYTES):
         self.current_audio_path = None
         self.audio = None
         self.channel = None
-    
+
+        # files that decode to at least stream_min_bytes are played through pygame.mixer.music, streaming_path is the current one
+        self.stream_min_bytes = stream_min_bytes
+        self.streaming_path = None
+
+        # least recently played sounds are evicted first once cache_bytes are exceeded
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # path -> (signature, sound, size)
+
     def play_audio(self, audio_path):
         self.stop_audio()
 
@@ -14,23 +51,123 @@ class AudioManager:
             print(f"Audio file does not exist: {audio_path}")
             return
 
-        if self.current_audio_path != audio_path:
-            self.load_audio(audio_path)
+        if self.should_stream(audio_path):
+            self.stream_audio(audio_path)
+            return
+
+        # also for the current sample, a file that was saved again since it was decoded is decoded again
+        self.load_audio(audio_path)
 
         if self.audio:
             self.channel = self.audio.play()
 
 
+    def should_stream(self, audio_path):
+        # a compressed file decodes to many times its size, so the decoded size is estimated from the duration
+        info = probe(audio_path)
+        if info is not None and info.duration is not None:
+            return info.duration * decoded_bytes_per_second() >= self.stream_min_bytes
+
+        try:
+            return os.path.getsize(audio_path) >= self.stream_min_bytes
+        except OSError:
+            return False
+
+    def stream_audio(self, audio_path):
+        # decodes while playing, so playback starts right away and memory use does not grow with the file
+        try:
+            pygame.mixer.music.load(audio_path)
+            pygame.mixer.music.play()
+            self.streaming_path = audio_path
+
+            # the previous decoded sound is not the current one anymore
+            self.audio = None
+            self.current_audio_path = None
+
+        except pygame.error as e:
+            print(f"Error streaming audio file: {e}")
+            self.streaming_path = None
+
+
     def load_audio(self, audio_path):
+        sound = self._get_cached(audio_path)
+
+        if sound is None:
+            try:
+                sound = pygame.mixer.Sound(audio_path)
+
+            except pygame.error as e:
+                print(f"Error loading audio file: {e}")
+                self.audio = None
+                return
+
+            self._add_to_cache(audio_path, sound)
+
+        self.audio = sound
+        self.current_audio_path = audio_path
+
+
+    def prefetch_audio(self, audio_path):
+        # decode into the cache without playing, streamed and already cached files are skipped
+        entry = self._cache.get(audio_path)
+        if entry is not None and entry[0] == get_file_signature(audio_path):
+            return
+
+        if not os.path.exists(audio_path) or self.should_stream(audio_path):
+            return
+
         try:
-            self.audio = pygame.mixer.Sound(audio_path)
-            self.current_audio_path = audio_path
+            sound = pygame.mixer.Sound(audio_path)
 
         except pygame.error as e:
             print(f"Error loading audio file: {e}")
-            self.audio = None
+            return
+
+        self._add_to_cache(audio_path, sound)
+
+    def _get_cached(self, audio_path):
+        entry = self._cache.get(audio_path)
+
+        # a sample that was changed on disk since it was decoded is decoded again
+        if entry is None or entry[0] != get_file_signature(audio_path):
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(audio_path)
+        self.hits += 1
+        return entry[1]
+
+    def _add_to_cache(self, audio_path, sound):
+        self._remove_from_cache(audio_path)
+
+        size = decoded_size(sound)
+        if size > self.cache_bytes:
+            return
+
+        self._cache[audio_path] = (get_file_signature(audio_path), sound, size)
+        self.cached_bytes += size
+
+        while self.cached_bytes > self.cache_bytes:
+            # the current sound stays referenced by self.audio, evicting it would not free any memory
+            evicted_path = next((path for path, entry in self._cache.items() if entry[1] is not self.audio), None)
+            if evicted_path is None:
+                break
+            self._remove_from_cache(evicted_path)
+
+    def _remove_from_cache(self, audio_path):
+        entry = self._cache.pop(audio_path, None)
+        if entry is not None:
+            self.cached_bytes -= entry[2]
+
+    def clear_cache(self):
+        self._cache.clear()
+        self.cached_bytes = 0
 
 
     def stop_audio(self):
         if self.channel and self.channel.get_busy():
             self.channel.stop()
+
+        if self.streaming_path is not None:
+            pygame.mixer.music.stop()
+            self.streaming_path = None
@@ -0,0 +1,343 @@
+import os
+import json
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.file_utils import get_user_cache_dir, get_file_signature
+from src.signature_cache import SignatureCache
+
+# only the start (and for OGG the end) of a file is read
+HEADER_BYTES = 64 * 1024
+OGG_TAIL_BYTES = 64 * 1024
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_ENTRIES = 200000
+
+# MPEG audio tables, indexed by [version][layer] / [version]
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+class AudioInfo:
+    def __init__(self, format, duration=None, sample_rate=None, channels=None, bit_depth=None, size=None):
+        self.format = format
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # only known for uncompressed formats
+        self.bit_depth = bit_depth
+        self.size = size
+
+    def to_dict(self):
+        return {"format": self.format, "duration": self.duration, "sample_rate": self.sample_rate,
+                "channels": self.channels, "bit_depth": self.bit_depth, "size": self.size}
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**values)
+
+
+def probe_wav(header, size, read=None):
+    """read(position, count) returns bytes of the file after header, for the chunks that follow large metadata chunks."""
+    if len(header) < 12 or header[:4] not in (b"RIFF", b"RIFX") or header[8:12] != b"WAVE":
+        return None
+
+    def read_at(position, count):
+        if read is None or position + count <= len(header):
+            return header[position:position + count]
+        return read(position, count)
+
+    endian = "<" if header[:4] == b"RIFF" else ">"
+    info = AudioInfo("wav", size=size)
+    byte_rate = None
+    position = 12
+
+    # walk the chunks until the data chunk, the samples themselves are never read
+    while position + 8 <= size:
+        chunk = read_at(position, 8)
+        if len(chunk) < 8:
+            break
+
+        chunk_id = chunk[:4]
+        (chunk_size,) = struct.unpack(endian + "I", chunk[4:])
+        body = position + 8
+
+        if chunk_id == b"fmt ":
+            fmt = read_at(body, 16)
+            if len(fmt) == 16:
+                _, info.channels, info.sample_rate, byte_rate, _, info.bit_depth = struct.unpack(endian + "HHIIHH", fmt)
+
+        elif chunk_id == b"data":
+            # the size of the last chunk is often wrong in files that were not finished properly
+            data_size = min(chunk_size, size - body)
+            if byte_rate:
+                info.duration = data_size / byte_rate
+            break
+
+        # chunks are padded to an even size
+        position = body + chunk_size + (chunk_size & 1)
+
+    return info
+
+
+def probe_ogg(header, tail, size):
+    if header[:4] != b"OggS" or len(header) < 28:
+        return None
+
+    # the first packet is the identification header of the codec
+    segments = header[26]
+    packet = header[27 + segments:]
+    info = AudioInfo("ogg", size=size)
+    pre_skip = 0
+
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        info.channels = packet[11]
+        (info.sample_rate,) = struct.unpack("<I", packet[12:16])
+        rate = info.sample_rate
+
+    elif packet[:8] == b"OpusHead" and len(packet) >= 16:
+        info.channels = packet[9]
+        (pre_skip,) = struct.unpack("<H", packet[10:12])
+        (info.sample_rate,) = struct.unpack("<I", packet[12:16])
+        # opus granule positions always count 48 kHz samples
+        rate = 48000
+
+    else:
+        return info
+
+    # the granule position of the last page is the total number of samples
+    last_page = tail.rfind(b"OggS")
+    if rate and last_page != -1 and last_page + 14 <= len(tail):
+        (granule,) = struct.unpack("<q", tail[last_page + 6:last_page + 14])
+        if granule > 0:
+            info.duration = max(0, granule - pre_skip) / rate
+
+    return info
+
+
+def _skip_id3v2(header):
+    if header[:3] != b"ID3" or len(header) < 10:
+        return 0
+
+    # syncsafe integer, 7 bits per byte
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_mp3_frame_header(header, position):
+    b1, b2, b3 = header[position + 1], header[position + 2], header[position + 3]
+    version = {0: 2.5, 2: 2, 3: 1}.get((b1 >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    channels = 1 if (b3 >> 6) == 3 else 2
+    return version, layer, bitrate, sample_rate, channels
+
+
+def probe_mp3(header, size, audio_start=0):
+    position = audio_start
+
+    # search the first frame sync, at most through the read header bytes
+    while position + 4 <= len(header):
+        if header[position] == 0xFF and header[position + 1] & 0xE0 == 0xE0:
+            frame = _parse_mp3_frame_header(header, position)
+            if frame is not None:
+                break
+        position += 1
+    else:
+        return None
+
+    version, layer, bitrate, sample_rate, channels = frame
+    info = AudioInfo("mp3", sample_rate=sample_rate, channels=channels, size=size)
+
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and version != 1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+
+    # VBR files carry the number of frames in a Xing/Info or VBRI header in the first frame
+    first_frame = header[position:position + 200]
+    for tag in (b"Xing", b"Info"):
+        tag_position = first_frame.find(tag)
+        if tag_position != -1 and tag_position + 12 <= len(first_frame):
+            (flags,) = struct.unpack(">I", first_frame[tag_position + 4:tag_position + 8])
+            if flags & 0x01:
+                (frames,) = struct.unpack(">I", first_frame[tag_position + 8:tag_position + 12])
+                info.duration = frames * samples_per_frame / sample_rate
+                return info
+
+    vbri_position = first_frame.find(b"VBRI")
+    if vbri_position != -1 and vbri_position + 18 <= len(first_frame):
+        (frames,) = struct.unpack(">I", first_frame[vbri_position + 14:vbri_position + 18])
+        info.duration = frames * samples_per_frame / sample_rate
+        return info
+
+    # constant bitrate
+    info.duration = max(0, size - position) * 8 / bitrate
+    return info
+
+
+def probe(path):
+    """Return the AudioInfo of a WAV, OGG or MP3 file from its headers, or None if it is not recognized."""
+    try:
+        size = os.path.getsize(path)
+
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_BYTES)
+            extension = os.path.splitext(path)[1][1:].lower()
+
+            if header[:4] in (b"RIFF", b"RIFX"):
+                def read(position, count):
+                    f.seek(position)
+                    return f.read(count)
+
+                return probe_wav(header, size, read)
+
+            if header[:4] == b"OggS":
+                f.seek(max(0, size - OGG_TAIL_BYTES))
+                return probe_ogg(header, f.read(OGG_TAIL_BYTES), size)
+
+            if extension == "mp3" or header[:3] == b"ID3":
+                audio_start = _skip_id3v2(header)
+                if audio_start + 4 > len(header):
+                    # a big tag (e.g. cover art), read the start of the audio data
+                    f.seek(audio_start)
+                    return probe_mp3(f.read(HEADER_BYTES), size - audio_start)
+                return probe_mp3(header, size, audio_start)
+
+    except (OSError, struct.error, IndexError) as e:
+        print(f"Error probing audio file {path}: {e}")
+
+    return None
+
+
+class MetadataCache(SignatureCache):
+    """Persistent cache of AudioInfo keyed by (path, size, mtime_ns)."""
+
+    table = "metadata"
+    columns = (("info", "TEXT"),)
+
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), "metadata_cache.sqlite3")
+
+        super().__init__(db_path, max_entries)
+
+    def get(self, path, signature):
+        row = self._get(path, signature, "info")
+        if row is None:
+            return None
+
+        return AudioInfo.from_dict(json.loads(row[0]))
+
+    def put(self, path, signature, info):
+        self._put(path, signature, info=json.dumps(info.to_dict()))
+
+
+class ProbeRequest:
+    """Collects the results of one AudioProbe.request, cancel() drops the files that were not probed yet."""
+
+    def __init__(self, paths, callback):
+        self.paths = paths
+        self.callback = callback
+        self.infos = {}
+        self.futures = []
+        self.cancelled = False
+
+        self._lock = threading.Lock()
+        self._remaining = len(paths)
+
+    def cancel(self):
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+
+    def _done(self, path, future):
+        if future.cancelled():
+            return
+
+        info = None if future.exception() is not None else future.result()
+
+        with self._lock:
+            self.infos[path] = info
+            self._remaining -= 1
+            finished = self._remaining == 0
+
+        if finished and not self.cancelled:
+            self.callback(self.infos)
+
+
+class AudioProbe:
+    """Probes many files concurrently, unchanged files are answered from the metadata cache.
+
+    All requests share one thread pool, so selecting many projects one after another never starts
+    more than max_workers threads.
+    """
+
+    def __init__(self, cache=None, max_workers=DEFAULT_WORKERS):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _probe_one(self, path):
+        signature = get_file_signature(path)
+        if signature is None:
+            return None
+
+        if self.cache is not None:
+            info = self.cache.get(path, signature)
+            if info is not None:
+                return info
+
+        info = probe(path)
+        if info is not None and self.cache is not None:
+            self.cache.put(path, signature, info)
+
+        return info
+
+    def probe_many(self, paths):
+        """Return a dict of path -> AudioInfo (None for unreadable or unknown files)."""
+        paths = list(dict.fromkeys(paths))
+
+        if self.max_workers == 1 or len(paths) <= 1:
+            return {path: self._probe_one(path) for path in paths}
+
+        # mostly waiting for small reads, threads overlap the latency of slow disks and network shares
+        return dict(zip(paths, self._executor.map(self._probe_one, paths)))
+
+    def request(self, paths, callback):
+        """Probe paths in the background and call callback(infos) from a worker thread once all are probed.
+
+        Returns a ProbeRequest, callback is not called after its cancel().
+        """
+        request = ProbeRequest(list(dict.fromkeys(paths)), callback)
+        if not request.paths:
+            callback({})
+            return request
+
+        for path in request.paths:
+            request.futures.append(self._executor.submit(self._probe_one, path))
+
+        for path, future in zip(request.paths, request.futures):
+            future.add_done_callback(lambda future, path=path: request._done(path, future))
+
+        return request
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
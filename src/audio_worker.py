@@ -0,0 +1,85 @@
+import queue
+import threading
+import itertools
+from src.audio_manager import AudioManager
+
+# play and stop commands are handled before pending prefetches
+PRIORITY_CLOSE = 0
+PRIORITY_PLAYBACK = 1
+PRIORITY_PREFETCH = 2
+
+
+class AudioWorker:
+    """Runs an AudioManager on its own thread, so decoding and file access never block the GUI.
+
+    Commands are passed through a priority queue. Prefetching decodes samples into the sound cache of
+    the AudioManager in the background, it pauses for play and stop commands and a new prefetch
+    request replaces the remaining paths of older ones.
+    """
+
+    def __init__(self, audio_manager=None):
+        self.audio_manager = audio_manager if audio_manager is not None else AudioManager()
+
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._prefetch_generation = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, priority, command, *args):
+        # the counter keeps commands of the same priority in order
+        self._queue.put((priority, next(self._counter), command, args))
+
+    def play(self, audio_path, neighbours=()):
+        """Play audio_path, then prefetch neighbours (e.g. the samples next to it in the list)."""
+        self._put(PRIORITY_PLAYBACK, "play", audio_path)
+        if neighbours:
+            self.prefetch(neighbours)
+
+    def stop(self):
+        self._put(PRIORITY_PLAYBACK, "stop")
+
+    def prefetch(self, audio_paths):
+        self._prefetch_generation += 1
+        self._put(PRIORITY_PREFETCH, "prefetch", list(audio_paths), self._prefetch_generation)
+
+    def wait_idle(self):
+        """Block until all queued commands are handled."""
+        self._queue.join()
+
+    def close(self):
+        self._put(PRIORITY_CLOSE, "close")
+        self._thread.join()
+
+    def _prefetch(self, audio_paths, generation):
+        for i, audio_path in enumerate(audio_paths):
+            if generation != self._prefetch_generation:
+                return
+
+            # let play and stop commands go first, the rest of the paths is queued again
+            if not self._queue.empty():
+                self._put(PRIORITY_PREFETCH, "prefetch", audio_paths[i:], generation)
+                return
+
+            self.audio_manager.prefetch_audio(audio_path)
+
+    def _run(self):
+        while True:
+            _, _, command, args = self._queue.get()
+
+            try:
+                if command == "close":
+                    return
+                elif command == "play":
+                    self.audio_manager.play_audio(*args)
+                elif command == "stop":
+                    self.audio_manager.stop_audio()
+                elif command == "prefetch":
+                    self._prefetch(*args)
+
+            except Exception as e:
+                print(f"Error in audio worker ({command}): {e}")
+
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,91 @@
+import os
+from src.dir_cache import directory_cache
+from src.extraction import ExtractionEngine
+from src.file_utils import has_sample_extension
+
+# where the samples of every project end up
+LAYOUT_FLAT = "flat"
+LAYOUT_PER_PROJECT = "per_project"
+
+# which samples of a project are exported
+SELECT_ALL = "all"
+SELECT_MARKED = "marked"
+
+
+class BulkExport:
+    """Exports the samples of many projects in one job.
+
+    With LAYOUT_PER_PROJECT every project gets its own subfolder in destination_folder, with
+    LAYOUT_FLAT all samples go into destination_folder itself. selection picks all samples or only the
+    ones marked for extraction, extensions optionally restricts the export to some file types.
+
+    A sample used by several projects is scheduled once, it is read once and written to the
+    folders of all projects that use it (or only once at all in the flat layout).
+    """
+
+    def __init__(self, flp_files, destination_folder, layout=LAYOUT_PER_PROJECT, selection=SELECT_ALL, extensions=None):
+        self.flp_files = list(flp_files)
+        self.destination_folder = destination_folder
+        self.layout = layout
+        self.selection = selection
+        self.extensions = extensions
+
+    def _selected_paths(self, flp):
+        for sample in flp.samples:
+            if self.selection == SELECT_MARKED and not flp.is_selected(sample):
+                continue
+            if self.extensions is not None and not has_sample_extension(sample.path, self.extensions):
+                continue
+            if directory_cache.exists(sample.path):
+                yield sample.path
+
+    def _project_folders(self):
+        # projects with the same file name from different folders get numbered subfolders
+        folders = []
+        used = set()
+
+        for flp in self.flp_files:
+            name = os.path.splitext(flp.file_name)[0]
+            folder_name = name
+            counter = 1
+            while os.path.normcase(folder_name) in used:
+                folder_name = f"{name} ({counter})"
+                counter += 1
+
+            used.add(os.path.normcase(folder_name))
+            folders.append(os.path.join(self.destination_folder, folder_name))
+
+        return folders
+
+    def plan(self):
+        """Return the (source_path, destination_folders) targets of the job, one per source file."""
+        if self.layout == LAYOUT_FLAT:
+            project_folders = [self.destination_folder] * len(self.flp_files)
+        else:
+            project_folders = self._project_folders()
+
+        targets = {}
+
+        for flp, folder in zip(self.flp_files, project_folders):
+            for path in self._selected_paths(flp):
+                key = os.path.normcase(os.path.normpath(path))
+
+                if key not in targets:
+                    targets[key] = (path, [])
+
+                if folder not in targets[key][1]:
+                    targets[key][1].append(folder)
+
+        return list(targets.values())
+
+    def run(self, callback=None, engine=None, targets=None):
+        if targets is None:
+            targets = self.plan()
+
+        for folder in dict.fromkeys(folder for _, folders in targets for folder in folders):
+            os.makedirs(folder, exist_ok=True)
+
+        if engine is None:
+            engine = ExtractionEngine()
+
+        return engine.extract_many(targets, callback)
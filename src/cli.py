@@ -0,0 +1,197 @@
+# headless command line interface, imports no GUI modules so it runs on servers without a display
+#
+#   python -m src.cli scan <roots...> [--format ndjson|json] [--workers N]
+#   python -m src.cli extract <roots...> --destination DIR [--layout per-project|flat] [--extensions wav,mp3]
+#
+# results are written to stdout as NDJSON (one record per line) or JSON, messages and errors go to stderr
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from src.flp_manager import FLPManager, EVENT_PARSED
+from src.parse_cache import ParseCache
+from src.hash_cache import HashCache
+from src.extraction import ExtractionEngine, DEFAULT_WORKERS, DEDUP_OFF, DEDUP_SKIP
+from src.bulk_export import BulkExport, LAYOUT_FLAT, LAYOUT_PER_PROJECT, SELECT_ALL
+from src.file_utils import SAMPLE_EXTENSIONS
+
+# exit codes
+EXIT_OK = 0
+EXIT_ERRORS = 1  # finished, but some projects could not be read or some samples could not be extracted
+EXIT_USAGE = 2  # invalid arguments (also used by argparse) or no projects found
+
+LAYOUTS = {"per-project": LAYOUT_PER_PROJECT, "flat": LAYOUT_FLAT}
+
+
+class _Output:
+    # writes records as NDJSON lines right away or collects them for a single JSON document
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self.records = []
+
+    def write(self, record):
+        if self.output_format == "ndjson":
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+        else:
+            self.records.append(record)
+
+    def close(self):
+        if self.output_format == "json":
+            json.dump(self.records, self.stream, indent=2)
+            self.stream.write("\n")
+
+
+def _parse_extensions(value):
+    return tuple(ext.strip().lstrip(".").lower() for ext in value.split(",") if ext.strip())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Scan FL Studio projects and extract their samples without the GUI.")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("roots", nargs="+", help=".flp files or folders (searched recursively)")
+    common.add_argument("--format", choices=("ndjson", "json"), default="ndjson", help="output format (default: ndjson)")
+    common.add_argument("--workers", type=int, default=None, help="number of worker threads")
+    common.add_argument("--extensions", type=_parse_extensions, default=SAMPLE_EXTENSIONS, help="comma separated sample extensions (default: mp3,wav,ogg)")
+    common.add_argument("--no-cache", action="store_true", help="do not use the persistent parse cache")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("scan", parents=[common], help="list the samples used by every project")
+
+    extract = commands.add_parser("extract", parents=[common], help="copy the samples of every project into a folder")
+    extract.add_argument("--destination", required=True, help="destination folder, created if it does not exist")
+    extract.add_argument("--layout", choices=tuple(LAYOUTS), default="per-project", help="one subfolder per project or all samples in one folder")
+    extract.add_argument("--skip-duplicates", action="store_true", help="skip samples whose content already exists in the destination")
+
+    return parser
+
+
+def _create_manager(args):
+    cache = None if args.no_cache else ParseCache()
+    return FLPManager(max_workers=args.workers, cache=cache, extensions=args.extensions), cache
+
+
+def _readable(project):
+    # a missing project has no signature, a locked or damaged one failed to read
+    return project.signature is not None and not project.read_failed
+
+
+def _load_projects(args):
+    manager, cache = _create_manager(args)
+
+    try:
+        projects, _ = manager.add_candidates(args.roots)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    return projects
+
+
+def _scan(args, output):
+    manager, cache = _create_manager(args)
+    scanned = 0
+    errors = 0
+
+    try:
+        # records are written as soon as a project is parsed, so huge archives stream with constant memory
+        for event in manager.iter_candidates(args.roots):
+            if event.kind != EVENT_PARSED:
+                continue
+
+            project = manager.remove_project(event.path)
+            readable = _readable(project)
+            scanned += 1
+            errors += not readable
+
+            existing = set(project.existing_unique_paths)
+            output.write({
+                "project": project.file_path,
+                "samples": project.existing_unique_paths,
+                "missing": [path for path in project.candidate_paths if path not in existing],
+                "error": None if readable else "project could not be read",
+            })
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if not scanned:
+        print("No .flp files found.", file=sys.stderr)
+        return EXIT_USAGE
+
+    print(f"Scanned {scanned} projects, {errors} could not be read.", file=sys.stderr)
+    return EXIT_ERRORS if errors else EXIT_OK
+
+
+def _extract(args, output):
+    projects = _load_projects(args)
+    if not projects:
+        print("No .flp files found.", file=sys.stderr)
+        return EXIT_USAGE
+
+    hash_cache = HashCache() if args.skip_duplicates else None
+    engine = ExtractionEngine(
+        max_workers=args.workers or DEFAULT_WORKERS,
+        dedup=DEDUP_SKIP if args.skip_duplicates else DEDUP_OFF,
+        hash_cache=hash_cache
+    )
+
+    unreadable = [project for project in projects if not _readable(project)]
+    for project in unreadable:
+        print(f"Project could not be read: {project.file_path}", file=sys.stderr)
+
+    bulk_export = BulkExport(projects, args.destination, layout=LAYOUTS[args.layout], selection=SELECT_ALL)
+
+    try:
+        result = bulk_export.run(engine=engine)
+    finally:
+        if hash_cache is not None:
+            hash_cache.close()
+
+    for f in result.files:
+        output.write({
+            "source": f.source_path,
+            "destination": f.destination_path,
+            "size": f.size,
+            "duplicate_of": f.duplicate_of,
+            "error": None if f.success else str(f.error),
+        })
+
+    print(
+        f"Extracted {len(result.succeeded) - len(result.duplicates)} files ({result.total_bytes} bytes) from {len(projects)} projects, "
+        f"{len(result.duplicates)} duplicates skipped, {len(result.failed)} failed, {len(unreadable)} projects could not be read.",
+        file=sys.stderr
+    )
+    return EXIT_ERRORS if result.failed or unreadable else EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.workers is not None and args.workers < 1:
+        print("--workers must be at least 1.", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.command == "extract":
+        os.makedirs(args.destination, exist_ok=True)
+
+    output = _Output(sys.stdout, args.format)
+
+    # the library code reports errors with print, keep them out of the machine readable output
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.command == "scan":
+            exit_code = _scan(args, output)
+        else:
+            exit_code = _extract(args, output)
+
+    output.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
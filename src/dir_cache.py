@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+import time
+
+# listings younger than this are trusted without touching the disk at all
+DEFAULT_TTL = 1.0
+
+# default file systems on Windows and macOS ignore the case of file names
+CASE_INSENSITIVE = sys.platform in ("win32", "darwin")
+
+
+def normalize_name(name):
+    return name.casefold() if CASE_INSENSITIVE else name
+
+
+class DirectoryCache:
+    """Existence oracle that lists every folder once with os.scandir and answers lookups from memory.
+
+    A cached listing is reused for ttl seconds, after that the folder is stat-ed and only listed
+    again if its modification time changed.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._listings = {}  # folder -> (signature, checked_at, names or None)
+
+    def _signature(self, directory):
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+
+        return stat.st_size, stat.st_mtime_ns
+
+    def _list(self, directory):
+        try:
+            with os.scandir(directory) as entries:
+                return frozenset(normalize_name(entry.name) for entry in entries)
+        except OSError:
+            return None
+
+    def listing(self, directory):
+        """Return the (normalized) names in directory or None if it cannot be listed."""
+        key = normalize_name(os.path.normpath(directory))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._listings.get(key)
+
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[2]
+
+        signature = self._signature(directory)
+
+        if signature is None:
+            names = None
+        elif entry is not None and entry[0] == signature:
+            names = entry[2]
+        else:
+            names = self._list(directory)
+
+        with self._lock:
+            self._listings[key] = (signature, now, names)
+
+        return names
+
+    def exists(self, path):
+        directory, name = os.path.split(path)
+
+        # bare file names and paths of other platforms cannot be mapped to a folder listing
+        if not directory or not name:
+            return os.path.exists(path)
+
+        names = self.listing(directory)
+        return names is not None and normalize_name(name) in names
+
+    def filter_existing(self, paths):
+        return [path for path in paths if self.exists(path)]
+
+    def invalidate(self, directory=None):
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(normalize_name(os.path.normpath(directory)), None)
+
+
+# shared by all projects, the same sample folders are usually used by many of them
+directory_cache = DirectoryCache()
@@ -0,0 +1,313 @@
+import os
+import threading
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from src.file_utils import copy_file, copy_file_to_many
+from src.hash_cache import HashCache
+from src.name_allocator import NameAllocator
+
+# parallel copies help on SSDs and network shares, more workers mostly add seeking on hard disks
+DEFAULT_WORKERS = 4
+
+# what to do with a sample whose content already exists in the destination folder
+DEDUP_OFF = None
+DEDUP_SKIP = "skip"
+DEDUP_LINK = "link"
+
+
+class ExtractedFile:
+    def __init__(self, source_path, destination_path=None, size=0, duration=0.0, error=None, duplicate_of=None):
+        self.source_path = source_path
+        self.destination_path = destination_path
+        self.size = size
+        self.duration = duration
+        self.error = error
+        self.duplicate_of = duplicate_of
+
+    @property
+    def success(self):
+        return self.error is None
+
+
+class ExtractionResult:
+    def __init__(self, files, duration=0.0):
+        self.files = files
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        return [f for f in self.files if f.success]
+
+    @property
+    def failed(self):
+        return [f for f in self.files if not f.success]
+
+    @property
+    def duplicates(self):
+        return [f for f in self.files if f.duplicate_of is not None]
+
+    @property
+    def total_bytes(self):
+        return sum(f.size for f in self.succeeded)
+
+
+class _DestinationFile:
+    # a file in the destination folder, ready is set once it is completely written
+    def __init__(self, path, ready=True):
+        self.path = path
+        self.ready = threading.Event()
+        self.failed = False
+        if ready:
+            self.ready.set()
+
+
+class ExtractionEngine:
+    """Copies files into one or more destination folders on a thread pool.
+
+    Destination names are claimed through a NameAllocator, so two workers (or two programs) never
+    pick the same name, and the progress passed to callback (0.0 - 1.0) is based on read bytes
+    instead of copied files. A source that goes to several folders is read only once.
+
+    With dedup set to DEDUP_SKIP or DEDUP_LINK, a source whose content already exists in the
+    destination folder is skipped or hard-linked to the existing file. Files are compared by size
+    first, then by a partial hash and only then by a full hash, hashes are cached in hash_cache.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, dedup=DEDUP_OFF, hash_cache=None):
+        self.max_workers = max_workers
+        self.dedup = dedup
+        self.hash_cache = hash_cache
+        self._lock = threading.Lock()
+        self._allocators = {}
+        self._by_size = {}
+        self._size_locks = {}
+
+    def _index_destination(self, destination_folder):
+        by_size = {}
+        try:
+            with os.scandir(destination_folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        by_size.setdefault(entry.stat().st_size, []).append(_DestinationFile(entry.path))
+        except OSError as e:
+            print(f"Error reading destination folder {destination_folder}: {e}")
+
+        self._by_size[destination_folder] = by_size
+
+    def _size_lock(self, destination_folder, size):
+        with self._lock:
+            return self._size_locks.setdefault((destination_folder, size), threading.Lock())
+
+    def _writing(self, destination_folders, size):
+        # files of this size in the destination folders that another worker is still writing
+        return [c for folder in destination_folders for c in self._by_size[folder].get(size, ()) if not c.ready.is_set()]
+
+    @contextlib.contextmanager
+    def _ready_size_locks(self, destination_folders, size):
+        """Hold the size locks of all destination_folders, once no file of this size is being written there.
+
+        Waiting happens without holding a lock or an unfinished file of our own, and the locks are taken
+        in one global order, so workers whose targets share folders in any order cannot deadlock.
+        """
+        folders = sorted(set(destination_folders))
+
+        while True:
+            for candidate in self._writing(folders, size):
+                candidate.ready.wait()
+
+            with contextlib.ExitStack() as stack:
+                for folder in folders:
+                    stack.enter_context(self._size_lock(folder, size))
+
+                # another worker may have registered a file between the wait and the locks
+                if not self._writing(folders, size):
+                    yield
+                    return
+
+    def _find_duplicate(self, destination_folder, source_path, size):
+        candidates = list(self._by_size[destination_folder].get(size, []))
+        if not candidates:
+            return None
+
+        source_partial = self.hash_cache.partial_hash(source_path)
+        source_full = None
+
+        # called under _ready_size_locks, every candidate is completely written
+        for candidate in candidates:
+            if candidate.failed or source_partial is None:
+                continue
+
+            if self.hash_cache.partial_hash(candidate.path) != source_partial:
+                continue
+
+            if source_full is None:
+                source_full = self.hash_cache.full_hash(source_path)
+
+            if source_full is not None and self.hash_cache.full_hash(candidate.path) == source_full:
+                return candidate.path
+
+        return None
+
+    def _link_or_copy(self, existing_path, destination_path, source_path):
+        # the claimed (empty) destination file is replaced by the link in one step
+        link_path = destination_path + ".link"
+        try:
+            os.link(existing_path, link_path)
+            os.replace(link_path, destination_path)
+            return 0
+        except OSError:
+            # hard links are not supported on every file system
+            return copy_file(source_path, destination_path)
+
+    def _remove_partial(self, destination_path):
+        try:
+            os.remove(destination_path)
+        except OSError:
+            pass
+
+    def extract(self, source_paths, destination_folder, callback=None):
+        return self.extract_many([(path, [destination_folder]) for path in source_paths], callback)
+
+    def extract_many(self, targets, callback=None):
+        """Copy every (source_path, destination_folders) pair of targets.
+
+        The returned ExtractionResult holds one ExtractedFile per source and destination folder,
+        in the order of targets.
+        """
+        start = time.perf_counter()
+
+        sizes = []
+        for path, _ in targets:
+            try:
+                sizes.append(os.path.getsize(path))
+            except OSError:
+                sizes.append(0)
+
+        total_bytes = sum(sizes)
+        total_files = len(targets)
+        progress = {"bytes": 0, "files": 0, "reported": None}
+
+        folders = list(dict.fromkeys(folder for _, target_folders in targets for folder in target_folders))
+        self._allocators = {folder: NameAllocator(folder) for folder in folders}
+
+        if self.dedup is not DEDUP_OFF:
+            if self.hash_cache is None:
+                self.hash_cache = HashCache()
+            self._by_size = {}
+            for folder in folders:
+                self._index_destination(folder)
+
+        def report(copied_bytes=0, finished_files=0):
+            with self._lock:
+                progress["bytes"] += copied_bytes
+                progress["files"] += finished_files
+
+                if callback:
+                    if total_bytes:
+                        progress["reported"] = float(progress["bytes"] / total_bytes)
+                    else:
+                        progress["reported"] = float(progress["files"] / total_files)
+                    callback(progress["reported"])
+
+        def claim(destination_folder, source_path):
+            return self._allocators[destination_folder].claim(os.path.basename(source_path))
+
+        def extract_one(index):
+            source_path, destination_folders = targets[index]
+            size = sizes[index]
+            file_start = time.perf_counter()
+            copied = [0]
+
+            def on_chunk(chunk):
+                copied[0] += chunk
+                report(copied_bytes=chunk)
+
+            files = []
+            pending = {}  # ExtractedFile -> _DestinationFile of files that are still being written
+
+            if self.dedup is not DEDUP_OFF:
+                # decide and register under the size locks, so identical sources of the same job
+                # cannot both miss each other and get copied twice
+                with self._ready_size_locks(destination_folders, size):
+                    for destination_folder in destination_folders:
+                        extracted = ExtractedFile(source_path)
+                        files.append(extracted)
+
+                        try:
+                            extracted.duplicate_of = self._find_duplicate(destination_folder, source_path, size)
+
+                            if extracted.duplicate_of is None or self.dedup == DEDUP_LINK:
+                                extracted.destination_path = claim(destination_folder, source_path)
+
+                            if extracted.duplicate_of is None:
+                                pending[extracted] = _DestinationFile(extracted.destination_path, ready=False)
+                                self._by_size[destination_folder].setdefault(size, []).append(pending[extracted])
+
+                        except Exception as e:
+                            extracted.error = e
+            else:
+                for destination_folder in destination_folders:
+                    extracted = ExtractedFile(source_path)
+                    files.append(extracted)
+
+                    try:
+                        extracted.destination_path = claim(destination_folder, source_path)
+                    except Exception as e:
+                        extracted.error = e
+
+            copies = [f for f in files if f.error is None and f.duplicate_of is None]
+            duplicates = [f for f in files if f.error is None and f.duplicate_of is not None]
+
+            # the source is read once, no matter how many folders it is copied to
+            try:
+                if len(copies) == 1:
+                    copies[0].size = copy_file(source_path, copies[0].destination_path, callback=on_chunk)
+                elif copies:
+                    written = copy_file_to_many(source_path, [f.destination_path for f in copies], callback=on_chunk)
+                    for f in copies:
+                        f.size = written
+            except Exception as e:
+                for f in copies:
+                    f.error = e
+
+            for f in duplicates:
+                try:
+                    if self.dedup == DEDUP_LINK:
+                        f.size = self._link_or_copy(f.duplicate_of, f.destination_path, source_path)
+                    else:
+                        f.destination_path = f.duplicate_of
+                except Exception as e:
+                    f.error = e
+
+            for f in files:
+                if f.error is not None:
+                    print(f"Error while exporting {source_path}: {f.error}")
+                    if f in pending:
+                        pending[f].failed = True
+                    if f.destination_path is not None and f.destination_path != f.duplicate_of:
+                        self._remove_partial(f.destination_path)
+
+                if f in pending:
+                    pending[f].ready.set()
+
+            # count the file as done regardless of success, so the progress always ends at 1.0
+            report(copied_bytes=size - copied[0], finished_files=1)
+
+            duration = time.perf_counter() - file_start
+            for f in files:
+                f.duration = duration
+
+            return files
+
+        if total_files <= 1 or self.max_workers == 1:
+            files = [extract_one(i) for i in range(total_files)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                files = list(executor.map(extract_one, range(total_files)))
+
+        # the caller waits for 1.0, also if there was nothing to copy
+        if callback and progress["reported"] != 1.0:
+            callback(1.0)
+
+        return ExtractionResult([f for target_files in files for f in target_files], time.perf_counter() - start)
@@ -1,53 +1,291 @@
 import re
 import os
+import sys
+import errno
+import shutil
+from functools import lru_cache
+from src.flp_parser import FLPParseError, parse_sample_paths
+from src.dir_cache import directory_cache
 
 
-def convert_binary_file_to_text(file_path):
+SAMPLE_EXTENSIONS = ("mp3", "wav", "ogg")
+
+SCAN_CHUNK_SIZE = 1 << 20
+COPY_CHUNK_SIZE = 1 << 20
+SCAN_MAX_CARRY = 1 << 16  # enough for the longest possible windows path in UTF-16
+
+# runs of printable characters, either one byte (latin1) or two bytes (UTF-16LE) per character.
+# both patterns are a single repeated character class resp. two alternatives that differ in the
+# second byte, so the regex engine never backtracks more than the minimum run length
+TEXT_RUN_8BIT = re.compile(rb'[^\x00-\x1f\x7f]{4,}')
+
+# UTF-16 code units are only matched at one alignment: every match, a run (group 1) or the code units
+# up to the next run, has an even length, so finditer never shifts a run by one byte. otherwise a run
+# of 8-bit text with an odd length in front of a UTF-16 path would swallow its first code unit
+UTF16_UNIT = rb'(?:[\x20-\xff]\x00|[\x01-\xff][\x01-\xd7\xe0-\xff])'
+UTF16_OTHER = rb'(?:\x00[\x00-\xff]|[\x01-\x1f]\x00|[\x01-\xff][\xd8-\xdf])'
+TEXT_RUN_UTF16 = re.compile(rb'(' + UTF16_UNIT + rb'{4,})|(?:' + UTF16_UNIT + rb'{0,3}' + UTF16_OTHER + rb')+')
+
+# drive ("C:\"), UNC ("\\server") or posix ("/") path start, a slash directly in front of a drive is not a start
+PATH_START = re.compile(r'[A-Za-z]:\\|\\\\|/(?![A-Za-z]:\\)')
+
+
+@lru_cache(maxsize=None)
+def _extension_pattern(extensions):
+    return re.compile(r'\.(?:' + '|'.join(re.escape(ext) for ext in extensions) + ')', re.IGNORECASE)
+
+def _find_paths_in_run(run, extension_pattern):
+    # pair every path start with the first extension behind it (same result as a lazy
+    # "start.*?ext" match) in a single pass over both lists instead of rescanning per start
+    ends = [(m.start(), m.end()) for m in extension_pattern.finditer(run)]
+    if not ends:
+        return
+
+    i = 0
+    position = 0
+    for start in PATH_START.finditer(run):
+        if start.start() < position:
+            continue
+
+        while i < len(ends) and ends[i][0] < start.end():
+            i += 1
+
+        if i == len(ends):
+            return
+
+        position = ends[i][1]
+        yield start.start(), run[start.start():position]
+
+def _scan_text_runs(data, extension_pattern):
+    found = []
+
+    for run in TEXT_RUN_8BIT.finditer(data):
+        for offset, path in _find_paths_in_run(run.group().decode('latin1'), extension_pattern):
+            found.append((run.start() + offset, path))
+
+    # UTF-16 text can start at an even or an odd offset, both alignments are scanned
+    for alignment in (0, 1):
+        for run in TEXT_RUN_UTF16.finditer(data, alignment):
+            if run.group(1) is None:
+                continue
+
+            for offset, path in _find_paths_in_run(run.group(1).decode('utf-16-le'), extension_pattern):
+                found.append((run.start(1) + offset * 2, path))
+
+    found.sort()
+    return [path for _, path in found]
+
+def scan_sample_paths(data, extensions=SAMPLE_EXTENSIONS):
+    """Return the unique sample paths (drive, UNC and posix) found in raw bytes, in order of appearance.
+
+    Runs in linear time on any input, data can be bytes, bytearray or a mmap.
+    """
+    return list(dict.fromkeys(_scan_text_runs(data, _extension_pattern(tuple(extensions)))))
+
+def scan_file_sample_paths(file_path, extensions=SAMPLE_EXTENSIONS, chunk_size=SCAN_CHUNK_SIZE):
+    """Same result as scan_sample_paths on the whole file, but reads it in chunks so memory stays bounded."""
+    extension_pattern = _extension_pattern(tuple(extensions))
+    found = {}
+    carry = b''
+
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            data = carry + chunk
+
+            if not chunk:
+                found.update(dict.fromkeys(_scan_text_runs(data, extension_pattern)))
+                break
+
+            # no 8-bit or UTF-16 text run can contain two null bytes in a row, so cutting between them
+            # never splits a run and the chunks give exactly the same runs as the whole file.
+            # the unfinished tail is carried into the next chunk, capped so memory stays bounded
+            cut = data.rfind(b'\x00\x00', max(0, len(data) - SCAN_MAX_CARRY)) + 1
+            if cut == 0:
+                cut = max(0, len(data) - SCAN_MAX_CARRY)
+
+            found.update(dict.fromkeys(_scan_text_runs(data[:cut], extension_pattern)))
+            carry = data[cut:]
+
+    return list(found)
+
+def has_sample_extension(path, extensions=SAMPLE_EXTENSIONS):
+    extension = os.path.splitext(path)[1][1:].lower()
+    return any(extension == ext.lower() for ext in extensions)
+
+def relocate_missing_paths(paths, existing_paths, library, sizes=None):
+    # replace every path that no longer exists by its new location in the sample library (if any),
+    # using the last known size of the missing file where there is one
+    existing = set(existing_paths)
+    sizes = sizes or {}
+    result = []
+
+    for path in paths:
+        if path in existing:
+            result.append(path)
+        else:
+            relocated = library.resolve(path, sizes.get(path))
+            if relocated is not None:
+                result.append(relocated)
+
+    return list(dict.fromkeys(result))
+
+def filter_existing_paths(paths):
+    # one cached folder listing per sample folder instead of one stat per sample
+    return directory_cache.filter_existing(paths)
+
+def read_sample_paths(file_path, extensions=SAMPLE_EXTENSIONS):
+    # None if the file could not be read, so callers do not mistake it for a project without samples
     try:
-        with open(file_path, 'rb') as f:
-            data = f.read()
+        # walk the FLP event stream and only decode the sample path events
+        try:
+            paths = parse_sample_paths(file_path)
 
-        # decode the binary data to text and replace null bytes
-        text = data.decode('latin1', errors='ignore').replace('\x00', '')
+        # not a structured FLP (e.g. damaged header), fall back to scanning the whole file
+        except FLPParseError:
+            return scan_file_sample_paths(file_path, extensions)
 
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
-        text = ""
+        return None
+
+    return [path for path in paths if has_sample_extension(path, extensions)]
+
+def get_file_signature(file_path):
+    # size and modification time change whenever the file is re-saved
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+def get_user_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    cache_dir = os.path.join(base, "flp-sample-extractor")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+# errors that only mean the kernel copy is not supported for this pair of files
+KERNEL_COPY_UNSUPPORTED = {
+    getattr(errno, name) for name in ("EXDEV", "ENOSYS", "EINVAL", "EBADF", "ENOTSOCK", "EOPNOTSUPP", "ENOTSUP", "EPERM")
+    if hasattr(errno, name)
+}
+
+
+def _kernel_copy(src_file, dest_file, callback, chunk_size):
+    # let the kernel move the data (copy_file_range, then sendfile) without copying it through python,
+    # in slices of chunk_size bytes so the progress of large files is still reported while they copy
+    src_fd = src_file.fileno()
+    dest_fd = dest_file.fileno()
+
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+
+        copied = 0
+        try:
+            while True:
+                if method == "copy_file_range":
+                    sent = os.copy_file_range(src_fd, dest_fd, chunk_size)
+                else:
+                    sent = os.sendfile(dest_fd, src_fd, copied, chunk_size)
+
+                if sent == 0:
+                    return copied
+
+                copied += sent
+                if callback:
+                    callback(sent)
+
+        except OSError as e:
+            # only fall back if nothing was written yet, a failure in the middle is a real error
+            if copied > 0 or e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+
+    return None
+
+def _chunked_copy(src_file, dest_file, callback, chunk_size):
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    copied = 0
+
+    while True:
+        read = src_file.readinto(buffer)
+        if not read:
+            return copied
+
+        dest_file.write(view[:read])
+        copied += read
+        if callback:
+            callback(read)
+
+def _copy_stat(source_path, destination_path):
+    # timestamps and permission bits are kept where the target file system supports them (not on FAT
+    # or some network shares), a copy with all of its data is not failed because of them
+    try:
+        shutil.copystat(source_path, destination_path)
+    except OSError as e:
+        print(f"Error copying file metadata to {destination_path}: {e}")
+
+def copy_file(source_path, destination_path, callback=None, chunk_size=COPY_CHUNK_SIZE):
+    """Copy a file with constant memory use and keep its timestamps and permission bits if possible.
 
-    return text
+    Uses the kernel copy functions where available and falls back to a buffered copy in chunks of
+    chunk_size bytes. callback(bytes) is called with the size of every copied chunk.
+    Returns the number of copied bytes.
+    """
+    with open(source_path, 'rb') as src_file:
+        with open(destination_path, 'wb') as dest_file:
+            copied = _kernel_copy(src_file, dest_file, callback, chunk_size)
 
+            if copied is None:
+                copied = _chunked_copy(src_file, dest_file, callback, chunk_size)
 
-def get_existing_unique_paths(text):
+    _copy_stat(source_path, destination_path)
+    return copied
 
-    # pattern for windows only
-    pattern = r'([A-Z]:\\[^\n\r]*?\.(?:mp3|wav|ogg))'
+def copy_file_to_many(source_path, destination_paths, callback=None, chunk_size=COPY_CHUNK_SIZE):
+    """Copy a file to several destinations while reading it only once.
 
-    #pattern for linux and macOS only (loads extremly long when loading first files after startup)
-    #pattern = r'/[^ \n\r]*?\.(?:mp3|wav|ogg)'
-    
-    #pattern for linux, windows and macOS (loads extremly long when loading first files after startup)
-    #pattern = r'(' \
-    #      r'(?:[A-Z]:\\[^\n\r]*?\.(?:mp3|wav|ogg))|' \
-    #      r'(?:/[^ \n\r]*?\.(?:mp3|wav|ogg))' \
-    #      r')'
+    Every chunk that is read is written to all destinations, callback(bytes) is called once per
+    chunk with the number of bytes read. Returns the number of bytes read from the source.
+    """
+    if len(destination_paths) == 1:
+        return copy_file(source_path, destination_paths[0], callback, chunk_size)
 
-    paths = re.findall(pattern, text)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    copied = 0
 
-    unique_paths = set(paths)
+    with open(source_path, 'rb') as src_file:
+        dest_files = []
+        try:
+            for destination_path in destination_paths:
+                dest_files.append(open(destination_path, 'wb'))
 
-    existing_unique_paths = [path for path in unique_paths if os.path.exists(path)]
+            while True:
+                read = src_file.readinto(buffer)
+                if not read:
+                    break
 
-    return existing_unique_paths
+                for dest_file in dest_files:
+                    dest_file.write(view[:read])
+                copied += read
+                if callback:
+                    callback(read)
 
-def get_unique_destination_path(destination_folder, file_name):
-    base_name, ext = os.path.splitext(file_name)
-    counter = 1
-    destination_path = os.path.join(destination_folder, file_name)
+        finally:
+            for dest_file in dest_files:
+                dest_file.close()
 
-    # ensure that a new file is created instead of overwriting an existing one
-    while os.path.exists(destination_path):
-        new_file_name = f"{base_name} ({counter}){ext}"
-        destination_path = os.path.join(destination_folder, new_file_name)
-        counter += 1
+    for destination_path in destination_paths:
+        _copy_stat(source_path, destination_path)
 
-    return destination_path
\ No newline at end of file
+    return copied
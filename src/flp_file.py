@@ -1,54 +1,108 @@
 import os
 #import tkinter as tk
-from src.sample import Sample
+from src.sample import Sample, PathTable
 from src.file_utils import *
+from src.dir_cache import directory_cache
+from src.extraction import ExtractionEngine
 
 class FLPFile:
-    def __init__(self, file_path):
+    # one instance per loaded project, no per-instance __dict__
+    __slots__ = ("file_path", "file_name", "extensions", "cache", "library", "registry", "signature", "read_failed", "candidate_paths", "samples", "selected")
+
+    def __init__(self, file_path, extensions=SAMPLE_EXTENSIONS, cache=None, library=None, registry=None):
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
-        self.text = convert_binary_file_to_text(file_path)
-        self.existing_unique_paths = get_existing_unique_paths(self.text)
-        self.samples = [Sample(path) for path in self.existing_unique_paths]
+        self.extensions = extensions
+        self.cache = cache
+        self.library = library
 
+        # optional SampleRegistry, the samples are then shared with the other projects that use them
+        self.registry = registry
 
-    def refresh_paths(self):
+        # signature of the last read, used to skip re-reading unchanged files
+        self.signature = get_file_signature(file_path)
+        self.read_failed = False
+        self.candidate_paths = self._read_paths(self.signature)
+
+        # the existing paths are only kept in the samples
+        self.samples = []
+        self.samples = self._samples_for(self._existing_paths())
+
+        # paths of the samples marked for extraction in this project
+        self.selected = set()
+
+    @property
+    def existing_unique_paths(self):
+        return [sample.path for sample in self.samples]
+
+    def _read_paths(self, signature):
+        # unchanged files are answered from the parse cache without opening them
+        paths = None if self.cache is None else self.cache.get(self.file_path, signature, self.extensions)
+
+        if paths is None:
+            paths = read_sample_paths(self.file_path, self.extensions)
+            self.read_failed = paths is None
 
-        # re-read the file to update the text
-        self.text = convert_binary_file_to_text(self.file_path)
+            # a failed read (e.g. a locked file) is not cached, it is retried on the next refresh
+            if self.read_failed:
+                paths = []
+            elif self.cache is not None:
+                self.cache.put(self.file_path, signature, self.extensions, paths)
+
+        # kept for refresh_paths, with the folder of every path stored once
+        return PathTable(paths)
+
+    def _existing_paths(self):
+        # the full path strings only exist while they are checked
+        candidate_paths = list(self.candidate_paths)
+        existing = filter_existing_paths(candidate_paths)
+
+        if self.library is None or len(existing) == len(candidate_paths):
+            return existing
+
+        # samples whose folder was moved are looked up in the sample library instead of being dropped
+        sizes = {sample.path: sample.info.size for sample in self.samples
+                 if sample.info is not None and sample.info.size is not None}
+        return relocate_missing_paths(candidate_paths, existing, self.library, sizes)
+
+    def refresh_paths(self):
 
-        # re-evaluate existing unique paths
-        self.existing_unique_paths = get_existing_unique_paths(self.text)
+        # only re-read the file if it was saved since the last refresh
+        signature = get_file_signature(self.file_path)
+        if signature is None or signature != self.signature or self.read_failed:
+            self.signature = signature
+            self.candidate_paths = self._read_paths(signature)
 
-        # remove samples that no longer exist
-        self.samples = [sample for sample in self.samples if sample.path in self.existing_unique_paths]
+        # folders that did not change are answered from the shared directory cache
+        self.samples = self._samples_for(self._existing_paths())
 
-        # add new samples with existing paths (probably useless but just in case)
-        for path in self.existing_unique_paths:
-            if path not in [s.path for s in self.samples]:
-                self.samples.append(Sample(path))
+        # the selection of samples that still exist is kept
+        if self.selected:
+            self.selected &= {sample.path for sample in self.samples}
 
+    def is_selected(self, sample):
+        return sample.path in self.selected
 
-    def extract_samples(self, destination_folder: str, callback=None):
-        to_extract = [s for s in self.samples if os.path.exists(s.path) and s.extract]
-        total = len(to_extract)
-        extracted = 0
+    def toggle_extract(self, sample):
+        if sample.path in self.selected:
+            self.selected.remove(sample.path)
+        else:
+            self.selected.add(sample.path)
 
-        for sample in to_extract:
-            destination_path = get_unique_destination_path(destination_folder, sample.file_name)
-            extracted += 1 # increment progress regardless of success
+    def _samples_for(self, paths):
+        if self.registry is not None:
+            return self.registry.set_project_samples(self.file_path, paths)
 
-            try:
-                with open(sample.path, 'rb') as src_file:
-                    with open(destination_path, 'wb') as dest_file:
-                        dest_file.write(src_file.read())
+        # keep the sample objects (and their probed info) of paths that still exist
+        samples_by_path = {sample.path: sample for sample in self.samples}
+        return [samples_by_path[path] if path in samples_by_path else Sample(path) for path in paths]
 
-            except Exception as e:
-                print(f"Error while exporting {sample.path}: {e}")
 
-            if callback:
-                progress = float((extracted / total))
-                callback(progress)
+    def extract_samples(self, destination_folder: str, callback=None, engine=None):
+        to_extract = [s.path for s in self.samples if s.path in self.selected and directory_cache.exists(s.path)]
 
-        return None
+        # copies run on a thread pool, errors are collected per file in the returned ExtractionResult
+        if engine is None:
+            engine = ExtractionEngine()
 
+        return engine.extract(to_extract, destination_folder, callback)
@@ -1,46 +1,201 @@
+import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from src.flp_file import FLPFile
 from src.sample import Sample
+from src.sample_registry import SampleRegistry
+from src.file_utils import SAMPLE_EXTENSIONS
+
+# kinds of the events yielded by FLPManager.iter_candidates
+EVENT_DISCOVERED = "discovered"
+EVENT_PARSED = "parsed"
+
+
+class LoadEvent:
+    def __init__(self, kind, path, flp=None, existing=False):
+        self.kind = kind
+        self.path = path
+        self.flp = flp
+        # True if the project was already loaded and only refreshed
+        self.existing = existing
+
 
 class FLPManager:
-    def __init__(self):
+    def __init__(self, max_workers=None, cache=None, library=None, extensions=SAMPLE_EXTENSIONS):
         self.flp_objects = {}
+        self.extensions = extensions
 
-    def add_candidates(self, paths):
+        # optional ParseCache and SampleLibrary shared by all loaded projects
+        self.cache = cache
+        self.library = library
 
-        valid_flps = []
-        already_existing_flps = []
+        # one shared Sample per sample file, with the projects that use it
+        self.registry = SampleRegistry()
 
+        # None lets the thread pool pick its default, 1 loads everything in the calling thread
+        self.max_workers = max_workers
+
+    def _iter_flp_paths(self, paths):
         for p in paths:
 
             path = Path(p)
 
             if path.is_file() and path.suffix == '.flp':
-                valid_path = str(path.resolve())
+                yield str(path.resolve())
+
+            elif path.is_dir():
+                for flp_path in self._walk_sorted(path):
+                    yield str(Path(flp_path).resolve())
+
+    def _walk_sorted(self, directory):
+        # the order of sorted(Path.rglob('*.flp')), files and subfolders sorted together by name, but
+        # walked lazily so the first projects are found before the whole tree is listed
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: os.path.normcase(entry.name))
+        except OSError:
+            return
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk_sorted(entry.path)
+                elif entry.is_file() and os.path.normcase(entry.name).endswith('.flp'):
+                    yield entry.path
+            except OSError:
+                continue
+
+    def _create_flp(self, path):
+        return FLPFile(path, extensions=self.extensions, cache=self.cache, library=self.library, registry=self.registry)
+
+    def remove_project(self, path):
+        """Unload the project at path, return its FLPFile (None if it was not loaded)."""
+        self.registry.remove_project(path)
+        return self.flp_objects.pop(path, None)
+
+    def projects_using(self, sample_path):
+        """Return the loaded projects that use the sample at sample_path."""
+        return [self.flp_objects[path] for path in self.registry.projects_using(sample_path) if path in self.flp_objects]
+
+    def most_used_samples(self, limit=10):
+        """Return up to limit (Sample, number of projects) pairs, the most used samples first."""
+        return self.registry.most_used(limit)
+
+    def _map(self, function, items):
+        if self.max_workers == 1 or len(items) <= 1:
+            return [function(item) for item in items]
+
+        # reading, parsing and stat-ing the samples is mostly I/O, so threads scale well here
+        # and the FLPFile objects do not have to be pickled between processes
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(function, items))
+
+    def add_candidates(self, paths):
 
-                if valid_path in self.flp_objects:
-                    flp = self.flp_objects[valid_path]
-                    flp.refresh_paths()
-                    already_existing_flps.append(flp)
+        new_paths = {}
+        existing_paths = []
+
+        for valid_path in self._iter_flp_paths(paths):
+            if valid_path in self.flp_objects or valid_path in new_paths:
+                existing_paths.append(valid_path)
+            else:
+                new_paths[valid_path] = None
+
+        # executor.map keeps the input order, so the result is the same as loading one after another
+        valid_flps = self._map(self._create_flp, list(new_paths))
+
+        for valid_path, flp_object in zip(new_paths, valid_flps):
+            self.flp_objects[valid_path] = flp_object
+
+        already_existing_flps = [self.flp_objects[path] for path in existing_paths]
+
+        # refresh every already loaded project once, even if it was dropped multiple times
+        self._map(lambda flp: flp.refresh_paths(), list({id(flp): flp for flp in already_existing_flps}.values()))
+
+        return valid_flps, already_existing_flps
+
+    def iter_candidates(self, paths, cancel=None):
+        """Load the projects in paths and yield a LoadEvent as soon as something is ready.
+
+        Every project is reported with an EVENT_DISCOVERED event when it is found and an EVENT_PARSED
+        event (with the FLPFile) once it is loaded, or refreshed if it was already loaded. Parsed events
+        come in the order the projects finish loading. Loading stops early when the threading.Event
+        cancel is set or the generator is closed, projects that were not parsed yet are not registered.
+        """
+        def cancelled():
+            return cancel is not None and cancel.is_set()
+
+        def load(path):
+            if path in self.flp_objects:
+                flp = self.flp_objects[path]
+                flp.refresh_paths()
+                return LoadEvent(EVENT_PARSED, path, flp, existing=True)
+
+            return LoadEvent(EVENT_PARSED, path, self._create_flp(path))
+
+        def register(event):
+            if not event.existing:
+                self.flp_objects[event.path] = event.flp
+            return event
+
+        def discard(future):
+            # finished after loading stopped, the project is not registered and neither are its samples
+            if future.cancelled() or future.exception() is not None:
+                return
+            event = future.result()
+            if not event.existing and event.path not in self.flp_objects:
+                self.registry.remove_project(event.path)
+
+        seen = set()
+
+        if self.max_workers == 1:
+            for path in self._iter_flp_paths(paths):
+                if cancelled():
+                    return
+                if path in seen:
                     continue
-                
-                flp_object = FLPFile(valid_path)
-                valid_flps.append(flp_object)
-                self.flp_objects[valid_path] = flp_object
+                seen.add(path)
 
-            elif path.is_dir():
-                for flp_path in path.rglob('*.flp'):
-                    valid_path = str(flp_path.resolve())
+                yield LoadEvent(EVENT_DISCOVERED, path)
+                if cancelled():
+                    return
+                yield register(load(path))
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # keep only a few projects in flight, so discovery does not run far ahead of parsing
+        max_pending = 2 * (self.max_workers or min(32, (os.cpu_count() or 1) + 4))
+        pending = set()
+        # submitted, but not yielded yet
+        unregistered = set()
+
+        try:
+            for path in self._iter_flp_paths(paths):
+                if cancelled():
+                    return
+                if path in seen:
+                    continue
+                seen.add(path)
 
-                    if valid_path in self.flp_objects:
-                        flp = self.flp_objects[valid_path]
-                        flp.refresh_paths()
-                        already_existing_flps.append(flp)
-                        continue
+                yield LoadEvent(EVENT_DISCOVERED, path)
+                future = executor.submit(load, path)
+                pending.add(future)
+                unregistered.add(future)
 
-                    flp_object = FLPFile(valid_path)
-                    valid_flps.append(flp_object)
-                    self.flp_objects[valid_path] = flp_object
+                done, pending = wait(pending, timeout=0 if len(pending) < max_pending else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unregistered.discard(future)
+                    yield register(future.result())
 
+            while pending:
+                if cancelled():
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unregistered.discard(future)
+                    yield register(future.result())
 
-        return valid_flps, already_existing_flps
\ No newline at end of file
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future in unregistered:
+                future.add_done_callback(discard)
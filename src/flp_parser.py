@@ -0,0 +1,145 @@
+import mmap
+import struct
+
+# FLP files are a "FLhd" header chunk followed by a "FLdt" chunk holding a flat stream of events.
+# every event starts with a one byte id, the id range decides how the payload is stored:
+#   0 - 63    -> 1 byte payload
+#   64 - 127  -> 2 byte payload
+#   128 - 191 -> 4 byte payload
+#   192 - 255 -> variable length payload, prefixed with a 7-bit varint length
+HEADER_CHUNK = b"FLhd"
+DATA_CHUNK = b"FLdt"
+
+EVENT_WORD = 64
+EVENT_DWORD = 128
+EVENT_TEXT = 192
+
+EVENT_SAMPLE_PATH = EVENT_TEXT + 4  # channel sample / audio clip file name
+EVENT_VERSION = EVENT_TEXT + 7      # "major.minor.patch.build", always ascii
+
+# FL Studio stores text events as UTF-16LE since version 11.5
+UTF16_MIN_VERSION = (11, 5)
+
+
+class FLPParseError(Exception):
+    pass
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+
+    while True:
+        if offset >= len(data):
+            raise FLPParseError("Unexpected end of data while reading event length")
+
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            return value, offset
+
+        shift += 7
+
+
+def _find_events(data):
+    if len(data) < 14 or data[:4] != HEADER_CHUNK:
+        raise FLPParseError("Missing FLhd header")
+
+    header_length = struct.unpack_from("<I", data, 4)[0]
+    offset = 8 + header_length
+
+    if data[offset:offset + 4] != DATA_CHUNK or offset + 8 > len(data):
+        raise FLPParseError("Missing FLdt chunk")
+
+    data_length = struct.unpack_from("<I", data, offset + 4)[0]
+    start = offset + 8
+
+    # some files report a wrong chunk size, never read past the end of the file
+    return start, min(start + data_length, len(data))
+
+
+def iter_events(data):
+    """Yield (event_id, payload_start, payload_end) for every event in the FLdt chunk of data."""
+    offset, end = _find_events(data)
+
+    while offset < end:
+        event_id = data[offset]
+        offset += 1
+
+        if event_id < EVENT_WORD:
+            size = 1
+        elif event_id < EVENT_DWORD:
+            size = 2
+        elif event_id < EVENT_TEXT:
+            size = 4
+        else:
+            size, offset = _read_varint(data, offset)
+
+        # truncated files still give us every complete event before the cut
+        if offset + size > end:
+            return
+
+        yield event_id, offset, offset + size
+        offset += size
+
+
+def _parse_version(raw):
+    try:
+        parts = raw.decode("ascii").rstrip("\x00").split(".")
+        return int(parts[0]), int(parts[1])
+
+    except (UnicodeDecodeError, ValueError, IndexError):
+        return None
+
+
+def _looks_like_utf16(raw):
+    # ascii characters in UTF-16LE always have a null high byte
+    return len(raw) >= 2 and len(raw) % 2 == 0 and raw[1::2].count(0) * 2 >= len(raw) // 2
+
+
+def decode_text(raw, utf16=None):
+    if utf16 is None:
+        utf16 = _looks_like_utf16(raw)
+
+    if utf16:
+        text = raw.decode("utf-16-le", errors="ignore")
+    else:
+        text = raw.decode("latin1")
+
+    return text.split("\x00", 1)[0]
+
+
+def iter_sample_paths(data):
+    """Yield every sample path stored in the event stream of data (bytes, bytearray or mmap)."""
+    utf16 = None
+
+    for event_id, start, end in iter_events(data):
+        if event_id == EVENT_VERSION:
+            version = _parse_version(data[start:end])
+            if version is not None:
+                utf16 = version >= UTF16_MIN_VERSION
+
+        elif event_id == EVENT_SAMPLE_PATH:
+            path = decode_text(data[start:end], utf16)
+            if path:
+                yield path
+
+
+def parse_sample_paths(file_path):
+    """Return the unique sample paths of an FLP file in order of appearance.
+
+    Raises FLPParseError if the file is not a structured FLP and OSError if it cannot be read.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            raise FLPParseError("Empty file")
+
+        try:
+            return list(dict.fromkeys(iter_sample_paths(data)))
+        finally:
+            data.close()
@@ -3,20 +3,69 @@ import tkinter as tk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import os
 import sys
+import time
+import queue
 import threading
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 import pygame
 from PIL import Image
 from src.flp_file import FLPFile
-from src.flp_manager import FLPManager
+from src.file_utils import SAMPLE_EXTENSIONS
+from src.flp_manager import FLPManager, EVENT_PARSED
+from src.parse_cache import ParseCache
+from src.sample_library import SampleLibrary
+from src.hash_cache import HashCache
+from src.extraction import ExtractionEngine, DEDUP_OFF, DEDUP_SKIP
+from src.bulk_export import BulkExport, LAYOUT_FLAT, LAYOUT_PER_PROJECT, SELECT_ALL, SELECT_MARKED
 from src.audio_manager import AudioManager
+from src.audio_worker import AudioWorker
+from src.virtual_list import VirtualList, IncrementalFilter
+from src.waveform import WaveformLoader, PeakCache, DEFAULT_BUCKETS
+from src.audio_probe import AudioProbe, MetadataCache
+from src.sample import sort_samples, filter_samples, SORT_NAME, SORT_LENGTH, SORT_FORMAT
+
+SAMPLE_ROW_HEIGHT = 40
+FLP_ROW_HEIGHT = 30
+WAVEFORM_WIDTH = 2 * DEFAULT_BUCKETS
+WAVEFORM_HEIGHT = 26
+
+# option menu label -> (sort key, reverse)
+SAMPLE_SORT_OPTIONS = {
+    "Sort by name": (SORT_NAME, False),
+    "Shortest first": (SORT_LENGTH, False),
+    "Longest first": (SORT_LENGTH, True),
+    "Sort by format": (SORT_FORMAT, False),
+}
+ALL_FORMATS = "All formats"
+
+# option menu label -> which samples of every project "Export All" copies
+EXPORT_SELECTION_OPTIONS = {
+    "All samples": SELECT_ALL,
+    "Marked samples": SELECT_MARKED,
+}
+
+# samples decoded ahead of time, on selection of a project and next to a played sample
+PREFETCH_ON_SELECT = 4
+PREFETCH_NEIGHBOURS = 2
 
 class FLPSampleExtractor(ctk.CTk):
-    def __init__(self):
+    def __init__(self, cache_dir=None, update_library=True):
         super().__init__()
         self.TkdndVersion = TkinterDnD._require(self)
-        self.flp_manager = FLPManager()
+
+        # the persistent caches live in the user cache folder unless cache_dir is given (e.g. by tests)
+        def cache_path(file_name):
+            return None if cache_dir is None else os.path.join(cache_dir, file_name)
+
+        self.sample_library = SampleLibrary(cache_path("sample_library.sqlite3"))
+        self.flp_manager = FLPManager(cache=ParseCache(cache_path("parse_cache.sqlite3")), library=self.sample_library)
+        self.hash_cache = HashCache(cache_path("hash_cache.sqlite3"))
+        self.waveform_loader = WaveformLoader(PeakCache(cache_path("peak_cache.sqlite3")))
+        self.audio_probe = AudioProbe(MetadataCache(cache_path("metadata_cache.sqlite3")))
+        self.probe_request = None
         self.audio_manager = AudioManager()
+        # decoding and playback run on the audio worker thread, never on the main thread
+        self.audio_worker = AudioWorker(self.audio_manager)
         pygame.mixer.init()
 
         # basic settings
@@ -33,14 +82,27 @@ class FLPSampleExtractor(ctk.CTk):
         self.play_icon = None
         self.stop_icon = None
 
-        self.flp_buttons = {}
+        # all loaded projects in load order, the sidebar shows the ones matching the filter entry
+        self.flp_filter = IncrementalFilter(key=lambda flp: flp.file_name)
+        self.flp_list = None
         self.active_flp = None 
         self.destination_folder = None
         self.extraction_window = None
 
+        # background loading of dropped files, results are passed to the main thread through load_queue
+        self.load_queue = queue.Queue()
+        self.load_cancel = None
+        self.loading = False
+        self.load_state = None
+        self.pending_drops = []
+
         self.load_icons()
         self.setup_gui()
 
+        # pick up changes in the sample library folders since the last session
+        if update_library:
+            threading.Thread(target=self.sample_library.update, daemon=True).start()
+
     def load_icons(self):
         # important for PyInstaller to find the icons
         def resource_path(relative_path):
@@ -88,15 +150,65 @@ class FLPSampleExtractor(ctk.CTk):
         self.dnd_area_label = ctk.CTkLabel(master=self.dnd_area_frame, text="Drag and drop '.flp' files\nor folders here.", fg_color="transparent", text_color="white")
         self.dnd_area_label.pack(pady=5, padx=5, fill="x", expand=True)
 
+        # loading status (only shown while dropped files are loaded)
+        self.load_status_frame = ctk.CTkFrame(master=self.dnd_area_frame, fg_color="gray30")
+
+        self.load_status_label = ctk.CTkLabel(master=self.load_status_frame, text="", fg_color="transparent", text_color="white", anchor="w")
+        self.load_status_label.pack(pady=5, padx=5, fill="x", side="left", expand=True)
+
+        self.load_cancel_button = ctk.CTkButton(master=self.load_status_frame, text="Cancel", width=1, command=self.cancel_loading)
+        self.load_cancel_button.pack(pady=5, padx=5, side="right")
+
 
         # sample area (scrollable)
         self.sample_area_frame = ctk.CTkFrame(master=self.root, fg_color="transparent")
-        self.sample_area_frame.place(relx=0.3, rely=0, relwidth=0.7, relheight=0.9)
+        self.sample_area_frame.place(relx=0.3, rely=0, relwidth=0.7, relheight=0.8)
+
+        # sorting and filtering by the metadata read from the sample headers
+        self.sample_toolbar = ctk.CTkFrame(master=self.sample_area_frame, fg_color="transparent")
+        self.sample_toolbar.pack(pady=(5, 0), padx=5, fill="x")
 
-        self.sample_area_content = ctk.CTkScrollableFrame(master=self.sample_area_frame, fg_color="gray30")
+        self.sample_sort_menu = ctk.CTkOptionMenu(master=self.sample_toolbar, values=list(SAMPLE_SORT_OPTIONS), width=1, command=lambda value: self.show_samples())
+        self.sample_sort_menu.pack(padx=(0, 5), side="left")
+
+        self.sample_format_menu = ctk.CTkOptionMenu(master=self.sample_toolbar, values=[ALL_FORMATS] + list(SAMPLE_EXTENSIONS), width=1, command=lambda value: self.show_samples())
+        self.sample_format_menu.pack(side="left")
+
+        self.library_button = ctk.CTkButton(master=self.sample_toolbar, text="Add Library", width=1, command=self.add_sample_library)
+        self.library_button.pack(side="right")
+
+        # only the visible sample rows exist as widgets, they are rebound to other samples while scrolling
+        self.sample_area_content = VirtualList(master=self.sample_area_frame, row_height=SAMPLE_ROW_HEIGHT, create_row=self._create_sample_row,
+                                               bind_row=self._bind_sample_row, fg_color="gray30",
+                                               on_render=lambda samples: self.waveform_loader.retain(sample.path for sample in samples))
         self.sample_area_content.pack(pady=5, padx=5, fill="both", expand=True)
 
-    
+        self.no_samples_frame = ctk.CTkFrame(master=self.sample_area_frame, fg_color="gray90")
+        no_samples_label = ctk.CTkLabel(master=self.no_samples_frame, text="No samples found. Re-save the project in your DAW and reload it here if this is unexpected.", fg_color="transparent", text_color="black")
+        no_samples_label.pack(pady=5, padx=5, fill="x")
+
+
+        # export options, in their own row so the destination row keeps room for its buttons
+        self.export_options_frame = ctk.CTkFrame(master=self.root, fg_color="transparent")
+        self.export_options_frame.place(relx=0.3, rely=0.8, relwidth=0.7, relheight=0.1)
+
+        # "Export All" puts the samples of every project into its own subfolder
+        self.project_subfolders = tk.BooleanVar(value=True)
+        self.project_subfolders_checkbox = ctk.CTkCheckBox(master=self.export_options_frame, text="Project subfolders", width=1, variable=self.project_subfolders)
+        self.project_subfolders_checkbox.pack(pady=5, padx=5, side="left")
+
+        # "Export All" copies all or only the marked samples, optionally of one format
+        self.export_selection_menu = ctk.CTkOptionMenu(master=self.export_options_frame, values=list(EXPORT_SELECTION_OPTIONS), width=1)
+        self.export_selection_menu.pack(pady=5, padx=5, side="left")
+
+        self.export_format_menu = ctk.CTkOptionMenu(master=self.export_options_frame, values=[ALL_FORMATS] + list(SAMPLE_EXTENSIONS), width=1)
+        self.export_format_menu.pack(pady=5, padx=5, side="left")
+
+        # skip samples whose content already exists in the destination folder
+        self.skip_duplicates = tk.BooleanVar(value=False)
+        self.skip_duplicates_checkbox = ctk.CTkCheckBox(master=self.export_options_frame, text="Skip duplicates", width=1, variable=self.skip_duplicates)
+        self.skip_duplicates_checkbox.pack(pady=5, padx=5, side="right")
+
         # destination area (width=1 forces buttons to be minimal width)
         self.destination_area_frame = ctk.CTkFrame(master=self.root, fg_color="transparent")
         self.destination_area_frame.place(relx=0.3, rely=0.9, relwidth=0.7, relheight=0.1)
@@ -110,6 +222,9 @@ class FLPSampleExtractor(ctk.CTk):
         self.extract_button = ctk.CTkButton(master=self.destination_area_frame, text="Extract Selection", width=1, height=50, command=self.extract_samples_from_active_flp)
         self.extract_button.pack(pady=5, padx=5, fill="both", side="right")
 
+        self.export_all_button = ctk.CTkButton(master=self.destination_area_frame, text="Export All", width=1, height=50, command=self.extract_samples_from_all_flps)
+        self.export_all_button.pack(pady=5, padx=5, fill="both", side="right")
+
     def add_destination_folder(self):
 
         destination_folder = ctk.filedialog.askdirectory(title="Choose destination folder")
@@ -118,88 +233,311 @@ class FLPSampleExtractor(ctk.CTk):
             self.destination_area_entry.insert(0, destination_folder)
             self.destination_folder = destination_folder
 
+    def add_sample_library(self):
+
+        library_folder = ctk.filedialog.askdirectory(title="Choose sample library folder")
+        if library_folder:
+            self.sample_library.add_root(library_folder)
+
+            # indexing runs in the background, moved samples are found on the next selection
+            threading.Thread(target=self.sample_library.update, daemon=True).start()
+
     def drop(self, event):
         
         files = self.tk.splitlist(event.data)
-        valid_flps, already_loaded_flps = self.flp_manager.add_candidates(files)
 
-        if len(valid_flps) == 0 and len(already_loaded_flps) == 0:
-            self.error_window("No valid files detected.\nPlease drop '.flp' files or\nfolders containing .flp files.")
+        # the manager loads one drop at a time, later drops wait for the current one
+        if self.loading:
+            self.pending_drops.append(files)
             return
 
+        self.start_loading(files)
+
+    def start_loading(self, files):
+
+        self.loading = True
+        self.load_cancel = threading.Event()
+        self.load_state = {"valid": [], "existing": [], "start": time.monotonic(), "active": self.active_flp}
+
+        self.load_status_label.configure(text="Searching for projects...")
+        self.load_cancel_button.configure(state="normal")
+        self.load_status_frame.pack(pady=5, padx=5, fill="x", side="bottom")
+
+        threading.Thread(target=self._load_candidates, args=(files, self.load_cancel), daemon=True).start()
+        self.after(50, self._drain_load_queue)
+
+    def cancel_loading(self):
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+            self.load_cancel_button.configure(state="disabled")
+
+    def _load_candidates(self, files, cancel):
+        # runs in the loading thread, the GUI is only updated from _drain_load_queue in the main thread
+        try:
+            for load_event in self.flp_manager.iter_candidates(files, cancel=cancel):
+                if load_event.kind == EVENT_PARSED:
+                    self.load_queue.put(load_event)
+        except Exception as e:
+            print(f"Error while loading projects: {e}")
+        finally:
+            self.load_queue.put(None)
+
+    def _drain_load_queue(self):
+        # handle a limited batch per call, so the window keeps repainting during huge drops
+        deadline = time.monotonic() + 0.02
+        finished = False
+
+        added = False
+
+        while time.monotonic() < deadline:
+            try:
+                load_event = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if load_event is None:
+                finished = True
+                break
+
+            if load_event.existing:
+                self.load_state["existing"].append(load_event.flp)
+            else:
+                self.load_state["valid"].append(load_event.flp)
+                added = self._add_flp_to_list(load_event.flp) or added
+
+        if added:
+            # the sidebar only binds rows that became visible
+            self.flp_list.set_items(self.flp_filter.matches, keep_offset=True)
+
+        loaded = len(self.load_state["valid"]) + len(self.load_state["existing"])
+        rate = loaded / max(time.monotonic() - self.load_state["start"], 1e-6)
+        self.load_status_label.configure(text=f"Loading... {loaded} projects ({rate:.1f}/s)")
+
+        if finished:
+            self._finish_loading()
+        else:
+            self.after(50, self._drain_load_queue)
+
+    def _finish_loading(self):
+
+        self.loading = False
+        self.load_status_frame.pack_forget()
+
+        valid_flps = self.load_state["valid"]
+        already_loaded_flps = self.load_state["existing"]
+        cancelled = self.load_cancel.is_set()
+
+        if len(valid_flps) == 0 and len(already_loaded_flps) == 0:
+            if not cancelled:
+                self.error_window("No valid files detected.\nPlease drop '.flp' files or\nfolders containing .flp files.")
+
+        # show an already loaded project to point out the duplicate, otherwise the first new one
+        # (unless another project was selected while loading)
+        elif len(already_loaded_flps) > 0:
+            self.on_select(already_loaded_flps[0])
+        elif self.active_flp is self.load_state["active"]:
+            self.on_select(valid_flps[0])
+
+        if self.pending_drops:
+            self.start_loading(self.pending_drops.pop(0))
+
+    def _add_flp_to_list(self, flp):
+
         # setup DnD area after first time of adding files
         if self.dnd_area_content is None:
             self.dnd_area_label.destroy()
-            self.dnd_area_content = ctk.CTkScrollableFrame(master=self.dnd_area_frame, fg_color="transparent")
+            self.dnd_area_content = ctk.CTkFrame(master=self.dnd_area_frame, fg_color="transparent")
             self.dnd_area_content.pack(pady=5, padx=5, fill="both", expand=True)
-            self.dnd_area_content._scrollbar.configure(width=12)
 
-        # add button for each valid FLP file
-        for flp in valid_flps:
-            button = ctk.CTkButton(master=self.dnd_area_content, text=flp.file_name, fg_color="darkgray", text_color="black",
-                            hover_color="gray30", anchor="w", command=lambda f = flp: self.on_select(f))
-            button.pack(pady=1, fill="x", expand=True)
-            self.flp_buttons[flp.file_path] = button
+            # type-ahead filter over the project names
+            self.flp_filter_entry = ctk.CTkEntry(master=self.dnd_area_content, placeholder_text="Filter projects", text_color="white", fg_color="gray30")
+            self.flp_filter_entry.pack(pady=(0, 5), fill="x")
+            self.flp_filter_entry.bind("<KeyRelease>", lambda event: self._apply_flp_filter())
 
-        if len(already_loaded_flps) > 0:
-            self.on_select(already_loaded_flps[0])
+            # only the visible project buttons exist as widgets
+            self.flp_list = VirtualList(master=self.dnd_area_content, row_height=FLP_ROW_HEIGHT, create_row=self._create_flp_row,
+                                        bind_row=self._bind_flp_row, fg_color="transparent")
+            self.flp_list.pack(fill="both", expand=True)
+
+        return self.flp_filter.add(flp)
+
+    def _apply_flp_filter(self):
+        self.flp_list.set_items(self.flp_filter.set_query(self.flp_filter_entry.get()))
+
+    def _create_flp_row(self, master):
+        button = ctk.CTkButton(master=master, text="", fg_color="darkgray", text_color="black", hover_color="gray30", anchor="w", height=FLP_ROW_HEIGHT - 2)
+        button.flp = None
+        button.configure(command=lambda b = button: self.on_select(b.flp))
+        return button
+
+    def _bind_flp_row(self, button, flp):
+        button.flp = flp
+
+        # highlight the selected FLP file
+        if flp is self.active_flp:
+            button.configure(text=flp.file_name, fg_color="gray", text_color="white")
         else:
-            self.on_select(valid_flps[0])
+            button.configure(text=flp.file_name, fg_color="darkgray", text_color="black")
 
     def on_select(self, flp: FLPFile):
 
-        # highlight the selected FLP file
+        previous_flp = self.active_flp
         self.active_flp = flp
 
-        for option, button in self.flp_buttons.items():
-            if option == flp.file_path:
-                button.configure(fg_color="gray", text_color="white")
-            else:
-                button.configure(fg_color="darkgray", text_color="black")
-
-        # clear screen and refresh samples
-        for widget in self.sample_area_content.winfo_children():
-            widget.destroy()
+        # only the buttons of the previous and the new selection change, if they are visible at all
+        if self.flp_list is not None:
+            for changed_flp in (previous_flp, flp):
+                button = self.flp_list.row_of(changed_flp)
+                if button is not None:
+                    self._bind_flp_row(button, changed_flp)
 
         flp.refresh_paths()
         samples = flp.samples
 
         # no samples found
         if samples == []:
-            no_samples_frame = ctk.CTkFrame(master=self.sample_area_content, fg_color="gray90")
-            no_samples_frame.pack(pady=1, fill="x")
-            no_samples_label = ctk.CTkLabel(master=no_samples_frame, text="No samples found. Re-save the project in your DAW and reload it here if this is unexpected.", fg_color="transparent", text_color="black")
-            no_samples_label.pack(pady=5, padx=5, fill="x")
+            self.sample_area_content.pack_forget()
+            self.no_samples_frame.pack(pady=5, padx=5, fill="x")
+            return
+
+        self.no_samples_frame.pack_forget()
+        self.sample_area_content.pack(pady=5, padx=5, fill="both", expand=True)
+
+        self.show_samples()
+        self._probe_samples(flp)
+
+        # decode the first samples in the background, so the first play click starts instantly
+        self.audio_worker.prefetch([sample.path for sample in self.sample_area_content.items[:PREFETCH_ON_SELECT]])
+
+    def show_samples(self, keep_offset=False):
+        if self.active_flp is None:
+            return
+
+        sort_key, reverse = SAMPLE_SORT_OPTIONS[self.sample_sort_menu.get()]
+        sample_format = self.sample_format_menu.get()
+
+        samples = filter_samples(self.active_flp.samples, formats=None if sample_format == ALL_FORMATS else (sample_format,))
+        samples = sort_samples(samples, sort_key, reverse)
+
+        # only rebinds the visible rows, independent of the number of samples
+        self.sample_area_content.set_items(samples, keep_offset=keep_offset)
+
+    def _probe_samples(self, flp):
+        # files of the previously selected project that were not probed yet are not needed anymore
+        if self.probe_request is not None:
+            self.probe_request.cancel()
+            self.probe_request = None
+
+        samples = [sample for sample in flp.samples if sample.info is None]
+        if samples:
+            # only the headers are read, unchanged files come from the metadata cache
+            self.probe_request = self.audio_probe.request(
+                (sample.path for sample in samples),
+                lambda infos: self.after(0, lambda: self._apply_probe_result(flp, samples, infos))
+            )
+
+    def _apply_probe_result(self, flp, samples, infos):
+        # the result of a project that is no longer selected is dropped, it is probed again on selection
+        if flp is not self.active_flp:
             return
 
-        # sample frame: 50 char name, play/stop button, checkbox
         for sample in samples:
-            
-            file_name = sample.file_name
-            if len(file_name) > 50:
-                file_name = file_name[:50] + "..."
+            sample.info = infos.get(sample.path)
 
-            sample_frame = ctk.CTkFrame(master=self.sample_area_content, fg_color="gray90")
-            sample_frame.pack(pady=1, fill="x")
+        self.show_samples(keep_offset=True)
 
-            sample_label = ctk.CTkLabel(master=sample_frame, text=file_name, fg_color="transparent", text_color="black")
-            sample_label.pack(padx=5, pady=5, side="left")
+    def play_sample(self, sample):
+        # neighbours in the order the samples are shown
+        samples = self.sample_area_content.items
 
-            sample_checkbox = ctk.CTkCheckBox(master=sample_frame, text="", width=1, variable = tk.BooleanVar(value=sample.extract), command=lambda s = sample: s.toggle_extract())
-            sample_checkbox.pack(padx=5, pady=5, side="right")
+        # the samples next to the played one are the most likely to be played next
+        try:
+            index = samples.index(sample)
+            neighbours = samples[index + 1:index + 1 + PREFETCH_NEIGHBOURS] + samples[max(0, index - PREFETCH_NEIGHBOURS):index]
+        except ValueError:
+            neighbours = []
 
-            sample_stop_button = ctk.CTkButton(master=sample_frame, image=self.stop_icon, text="", width=1, command=self.audio_manager.stop_audio)
-            sample_stop_button.pack(pady=1, padx=1, side="right")
+        self.audio_worker.play(sample.path, neighbours=[s.path for s in neighbours])
 
-            sample_play_button = ctk.CTkButton(master=sample_frame, image=self.play_icon, text="", width=1, command=lambda p = sample.path: self.audio_manager.play_audio(p))
-            sample_play_button.pack(pady=1, padx=1, side="right")
+    def _create_sample_row(self, master):
 
-    def extract_samples_from_active_flp(self):
+        # sample frame: 50 char name, waveform, play/stop button, checkbox (bound to a sample in _bind_sample_row)
+        sample_frame = ctk.CTkFrame(master=master, fg_color="gray90", height=SAMPLE_ROW_HEIGHT - 2)
+        sample_frame.sample = None
+
+        sample_frame.label = ctk.CTkLabel(master=sample_frame, text="", fg_color="transparent", text_color="black")
+        sample_frame.label.pack(padx=5, pady=5, side="left")
+
+        sample_frame.extract_var = tk.BooleanVar(value=False)
+        sample_checkbox = ctk.CTkCheckBox(master=sample_frame, text="", width=1, variable=sample_frame.extract_var, command=lambda r = sample_frame: self.active_flp.toggle_extract(r.sample))
+        sample_checkbox.pack(padx=5, pady=5, side="right")
+
+        sample_stop_button = ctk.CTkButton(master=sample_frame, image=self.stop_icon, text="", width=1, command=self.audio_worker.stop)
+        sample_stop_button.pack(pady=1, padx=1, side="right")
+
+        sample_play_button = ctk.CTkButton(master=sample_frame, image=self.play_icon, text="", width=1, command=lambda r = sample_frame: self.play_sample(r.sample))
+        sample_play_button.pack(pady=1, padx=1, side="right")
+
+        sample_frame.waveform = tk.Canvas(master=sample_frame, width=WAVEFORM_WIDTH, height=WAVEFORM_HEIGHT, bg="gray90", highlightthickness=0)
+        sample_frame.waveform.pack(padx=5, pady=5, side="right")
+
+        sample_frame.info_label = ctk.CTkLabel(master=sample_frame, text="", fg_color="transparent", text_color="gray30")
+        sample_frame.info_label.pack(padx=5, pady=5, side="right")
+
+        return sample_frame
+
+    def _bind_sample_row(self, sample_frame, sample):
+
+        file_name = sample.file_name
+        if len(file_name) > 50:
+            file_name = file_name[:50] + "..."
+
+        sample_frame.sample = sample
+        sample_frame.label.configure(text=file_name)
+        sample_frame.extract_var.set(self.active_flp.is_selected(sample))
+        sample_frame.info_label.configure(text=self._format_sample_info(sample.info))
+
+        # peaks are computed in the background (or read from the peak cache) only for the visible rows
+        sample_frame.waveform.delete("all")
+        self.waveform_loader.request(sample.path, lambda path, peaks, r = sample_frame: self.after(0, lambda: self._draw_waveform(r, path, peaks)))
+
+    def _format_sample_info(self, info):
+        if info is None or info.duration is None:
+            return ""
+
+        minutes, seconds = divmod(info.duration, 60)
+        text = f"{int(minutes)}:{seconds:04.1f}"
+        if info.sample_rate:
+            text += f"  {info.sample_rate / 1000:g} kHz"
+        return text
+
+    def _draw_waveform(self, sample_frame, path, peaks):
+
+        # the row may show another sample by now
+        if peaks is None or sample_frame.sample is None or sample_frame.sample.path != path:
+            return
+
+        middle = WAVEFORM_HEIGHT / 2
+        step = WAVEFORM_WIDTH / len(peaks)
+
+        # one polygon: maxima from left to right, minima back from right to left
+        top = [(i * step, middle - high * middle) for i, (low, high) in enumerate(peaks)]
+        bottom = [(i * step, middle - low * middle) for i, (low, high) in reversed(list(enumerate(peaks)))]
+
+        sample_frame.waveform.delete("all")
+        sample_frame.waveform.create_polygon(*[c for point in top + bottom for c in point], fill="gray40", outline="gray40")
+
+    def _check_extraction_target(self):
         
+        # the project list is still being changed by the loading thread
+        if self.loading:
+            self.error_window("Please wait until the dropped projects\nare loaded or cancel the loading.")
+            return False
+
         # ensure that at least one FLP file is loaded
         if self.flp_manager.flp_objects == {}:
             self.error_window("Please load at least one FLP by\ndrag-and-dropping it into the left frame.")
-            return
+            return False
 
         # ensure that current path is set even when user manually changes the destination entry
         self.destination_folder = self.destination_area_entry.get()
@@ -207,11 +545,22 @@ class FLPSampleExtractor(ctk.CTk):
         # ensure that a destination folder is set
         if self.destination_folder is None or self.destination_folder == "":
             self.error_window("Please choose a destination folder\nfor the extracted samples.")
-            return
+            return False
 
         # ensure that the destination folder exists
         if not os.path.exists(self.destination_area_entry.get()):
             self.error_window("The selected destination folder does not exist.\nPlease choose a valid folder.")
+            return False
+
+        return True
+
+    def _create_engine(self):
+        # created in the main thread, tk variables must not be read from the extraction thread
+        return ExtractionEngine(dedup=DEDUP_SKIP if self.skip_duplicates.get() else DEDUP_OFF, hash_cache=self.hash_cache)
+
+    def extract_samples_from_active_flp(self):
+
+        if not self._check_extraction_target():
             return
 
 
@@ -224,13 +573,7 @@ class FLPSampleExtractor(ctk.CTk):
             return
 
         # ensure that at least on sample is selected for extraction
-        counter = 0
-        for sample in self.active_flp.samples:
-            if sample.extract:
-                counter += 1
-                break
-
-        if counter == 0:
+        if not self.active_flp.selected:
             self.error_window("Please select at least one sample.\n\nIf this error persists after selecting a sample,\ntry reselecting or reloading the FLP file.")
             return
 
@@ -239,12 +582,32 @@ class FLPSampleExtractor(ctk.CTk):
         self.extraction_window = self.extraction_window_create()
 
         threading.Thread(
-            target=self.active_flp.extract_samples,
-            args=(self.destination_folder,),
-            kwargs={"callback": lambda value: self._update_extraction_gui(value)},
+            target=self._run_extraction,
+            args=(self.active_flp, self.destination_folder, self._create_engine()),
             daemon=True
         ).start()
 
+    def extract_samples_from_all_flps(self):
+
+        if not self._check_extraction_target():
+            return
+
+        # the options are read here, tk variables must not be read from the extraction thread
+        layout = LAYOUT_PER_PROJECT if self.project_subfolders.get() else LAYOUT_FLAT
+        sample_format = self.export_format_menu.get()
+        bulk_export = BulkExport(
+            self.flp_manager.flp_objects.values(),
+            self.destination_folder,
+            layout=layout,
+            selection=EXPORT_SELECTION_OPTIONS[self.export_selection_menu.get()],
+            extensions=None if sample_format == ALL_FORMATS else (sample_format,)
+        )
+
+        self.extraction_window = self.extraction_window_create()
+        self.label.configure(text="Checking the samples of\nall projects...")
+
+        threading.Thread(target=self._run_bulk_export, args=(bulk_export, self._create_engine()), daemon=True).start()
+
     def error_window(self, message):
 
         #setup window in foreground and block main window
@@ -296,6 +659,37 @@ class FLPSampleExtractor(ctk.CTk):
 
         return self.extraction_window
 
+    def _run_extraction(self, flp, destination_folder, engine):
+        result = flp.extract_samples(destination_folder, callback=lambda value: self._update_extraction_gui(value), engine=engine)
+        self.after(0, lambda: self._apply_extraction_result(result))
+
+    def _run_bulk_export(self, bulk_export, engine):
+        # refreshing and planning stat every sample of every project, so they run here instead of the main thread
+        for flp in bulk_export.flp_files:
+            flp.refresh_paths()
+
+        targets = bulk_export.plan()
+
+        # ensure that the loaded FLPs have existing samples
+        if targets == []:
+            self.after(0, self._cancel_bulk_export)
+            return
+
+        self.after(0, lambda: self.label.configure(text="Samples are being extracted...\nPlease wait."))
+        result = bulk_export.run(callback=lambda value: self._update_extraction_gui(value), engine=engine, targets=targets)
+        self.after(0, lambda: self._apply_extraction_result(result))
+
+    def _cancel_bulk_export(self):
+        self.extraction_window.destroy()
+        self.error_window("The loaded FLPs do not contain\nany extractable samples.")
+
+    def _apply_extraction_result(self, result):
+        if result.duplicates and not result.failed:
+            self.label.configure(text=f"Extraction complete!\n{len(result.duplicates)} duplicate samples were skipped.")
+
+        if result.failed:
+            self.label.configure(text=f"Extraction finished with errors.\n{len(result.failed)} of {len(result.files)} samples could not be extracted.")
+
     def _update_extraction_gui(self, progress):
         self.after(0, lambda: self._apply_extraction_progress(progress)) # ensures that the GUI update happens in the main thread (not in the extraction thread)
 
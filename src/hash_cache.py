@@ -0,0 +1,66 @@
+import os
+import hashlib
+import sqlite3
+from src.file_utils import get_user_cache_dir, get_file_signature
+from src.signature_cache import SignatureCache
+
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1 << 20
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def _hash_file(path, limit=None):
+    digest = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(HASH_CHUNK_SIZE if limit is None else min(limit, HASH_CHUNK_SIZE))
+    view = memoryview(buffer)
+
+    with open(path, 'rb') as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+            if limit is not None:
+                break
+
+    return digest.hexdigest()
+
+
+class HashCache(SignatureCache):
+    """Persistent cache of partial (first 64 KiB) and full content hashes keyed by (path, size, mtime_ns).
+
+    Hashes are computed lazily, a file that did not change since it was hashed is never read again.
+    """
+
+    table = "hashes"
+    columns = (("partial", "TEXT"), ("full", "TEXT"))
+
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), "hash_cache.sqlite3")
+
+        super().__init__(db_path, max_entries)
+
+    def _hash(self, path, column, limit):
+        try:
+            signature = get_file_signature(path)
+            if signature is None:
+                return None
+
+            row = self._get(path, signature, column)
+            value = None if row is None else row[0]
+            if value is None:
+                value = _hash_file(path, limit)
+                self._put(path, signature, **{column: value})
+
+            return value
+
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error hashing file {path}: {e}")
+            return None
+
+    def partial_hash(self, path):
+        return self._hash(path, "partial", PARTIAL_HASH_SIZE)
+
+    def full_hash(self, path):
+        return self._hash(path, "full", None)
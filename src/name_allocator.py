@@ -0,0 +1,66 @@
+import os
+import re
+import threading
+from src.dir_cache import normalize_name
+
+# "name (3)" -> ("name", 3)
+SUFFIX_PATTERN = re.compile(r'^(.*) \((\d+)\)$')
+
+
+class NameAllocator:
+    """Hands out unique file names in a destination folder without probing the disk name by name.
+
+    The folder is listed once, afterwards the highest used " (n)" suffix of every base name is tracked
+    in memory, so the next free name is found in O(1). Names are claimed by creating the file with
+    O_EXCL, so a name is never handed out twice, even with other programs writing to the folder.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._taken = set()
+        self._highest_suffix = {}
+
+        try:
+            names = os.listdir(folder)
+        except OSError as e:
+            print(f"Error reading destination folder {folder}: {e}")
+            names = []
+
+        for name in names:
+            self._register(name)
+
+    def _register(self, name):
+        name = normalize_name(name)
+        self._taken.add(name)
+
+        base, ext = os.path.splitext(name)
+        match = SUFFIX_PATTERN.match(base)
+        if match:
+            key = (match.group(1), ext)
+            self._highest_suffix[key] = max(self._highest_suffix.get(key, 0), int(match.group(2)))
+
+    def _next_name(self, file_name):
+        if normalize_name(file_name) not in self._taken:
+            return file_name
+
+        base, ext = os.path.splitext(file_name)
+        suffix = self._highest_suffix.get((normalize_name(base), normalize_name(ext)), 0) + 1
+        return f"{base} ({suffix}){ext}"
+
+    def claim(self, file_name):
+        """Create an empty file with a free name based on file_name and return its path."""
+        with self._lock:
+            while True:
+                name = self._next_name(file_name)
+                path = os.path.join(self.folder, name)
+
+                try:
+                    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+                except FileExistsError:
+                    # created by someone else after the folder was listed
+                    self._register(name)
+                    continue
+
+                self._register(name)
+                return path
@@ -0,0 +1,54 @@
+import os
+import json
+import sqlite3
+from src.file_utils import get_user_cache_dir
+from src.signature_cache import SignatureCache
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ParseCache(SignatureCache):
+    """Persistent cache of the sample paths of every parsed FLP, keyed by (path, size, mtime_ns).
+
+    Entries are evicted least recently used first once the stored path lists exceed max_bytes.
+    """
+
+    table = "flp_paths"
+    columns = (("extensions", "TEXT"), ("paths", "TEXT"))
+    weight = "LENGTH(paths)"
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), "parse_cache.sqlite3")
+
+        self.hits = 0
+        self.misses = 0
+
+        super().__init__(db_path, max_bytes)
+
+    def get(self, file_path, signature, extensions):
+        """Return the cached sample paths or None if the file changed since it was cached."""
+        if signature is None:
+            return None
+
+        try:
+            row = self._get(file_path, signature, "extensions", "paths", touch=True)
+        except sqlite3.Error as e:
+            print(f"Error reading parse cache {self.db_path}: {e}")
+            return None
+
+        if row is None or row[0] != ",".join(extensions):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[1])
+
+    def put(self, file_path, signature, extensions, paths):
+        if signature is None:
+            return
+
+        try:
+            self._put(file_path, signature, extensions=",".join(extensions), paths=json.dumps(paths))
+        except sqlite3.Error as e:
+            print(f"Error writing parse cache {self.db_path}: {e}")
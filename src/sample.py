@@ -1,10 +1,118 @@
 import os
+import sys
+from array import array
+
+# keys for sort_samples
+SORT_NAME = "name"
+SORT_LENGTH = "length"
+SORT_FORMAT = "format"
+
+
+def split_folder(path):
+    # (folder, file name) with folder + file name == path, the folder string is shared by all paths in it
+    file_name = os.path.basename(path)
+    return sys.intern(path[:len(path) - len(file_name)]), file_name
+
 
 class Sample:
+    # thousands of samples are loaded at once, no per-instance __dict__
+    # the extract selection is kept by the project, a Sample can be shared by several projects
+    __slots__ = ("folder", "file_name", "info")
+
     def __init__(self, path):
-        self.path = path
-        self.file_name = os.path.basename(path)
-        self.extract = False
+        self.folder, self.file_name = split_folder(path)
+
+        # AudioInfo read from the file header, None until the sample was probed
+        self.info = None
+
+    @property
+    def path(self):
+        return self.folder + self.file_name
+
+
+class PathTable:
+    """Read-only sequence of paths stored as an index into a list of shared folder strings plus
+    the file names, so the folder part of the paths of a project is only stored once."""
+
+    __slots__ = ("folders", "_folder_indexes", "_file_names")
+
+    def __init__(self, paths=()):
+        self.folders = []
+        self._folder_indexes = array("I")
+        self._file_names = []
+        indexes = {}
+
+        for path in paths:
+            folder, file_name = split_folder(path)
+            index = indexes.get(folder)
+            if index is None:
+                index = indexes[folder] = len(self.folders)
+                self.folders.append(folder)
+
+            self._folder_indexes.append(index)
+            self._file_names.append(file_name)
+
+    def __len__(self):
+        return len(self._file_names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.folders[self._folder_indexes[index]] + self._file_names[index]
+
+    def __iter__(self):
+        for index, file_name in zip(self._folder_indexes, self._file_names):
+            yield self.folders[index] + file_name
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"PathTable({list(self)!r})"
+
+
+def sort_samples(samples, key=SORT_NAME, reverse=False):
+    # samples without the needed metadata always come last
+    if key == SORT_LENGTH:
+        known = [s for s in samples if s.info is not None and s.info.duration is not None]
+        sort_key = lambda s: s.info.duration
+    elif key == SORT_FORMAT:
+        known = [s for s in samples if s.info is not None]
+        sort_key = lambda s: (s.info.format, s.info.sample_rate or 0, s.info.channels or 0, s.file_name.casefold())
+    else:
+        known = list(samples)
+        sort_key = lambda s: s.file_name.casefold()
+
+    known_ids = {id(s) for s in known}
+    unknown = [s for s in samples if id(s) not in known_ids]
+
+    return sorted(known, key=sort_key, reverse=reverse) + sorted(unknown, key=lambda s: s.file_name.casefold())
+
+
+def filter_samples(samples, formats=None, min_duration=None, max_duration=None):
+    # formats are compared to the probed format, or the file extension while a sample is not probed yet
+    result = []
+
+    for sample in samples:
+        info = sample.info
+
+        if formats is not None:
+            sample_format = info.format if info is not None else os.path.splitext(sample.file_name)[1][1:].lower()
+            if sample_format not in formats:
+                continue
+
+        if min_duration is not None or max_duration is not None:
+            duration = info.duration if info is not None else None
+            if duration is None:
+                continue
+            if min_duration is not None and duration < min_duration:
+                continue
+            if max_duration is not None and duration > max_duration:
+                continue
+
+        result.append(sample)
 
-    def toggle_extract(self):
-        self.extract = not self.extract
\ No newline at end of file
+    return result
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from src.file_utils import get_user_cache_dir
+from src.dir_cache import normalize_name, directory_cache
+
+
+def _split_path(path):
+    # FLP files store paths of the platform they were saved on, split on both separators
+    return [part for part in re.split(r'[\\/]', path) if part]
+
+
+def _get_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+class SampleLibrary:
+    """Persistent file name index over the user's sample library folders.
+
+    Used to find samples whose folder was moved or renamed after the project was saved. The index
+    maps every file name to the paths (and sizes) it was found at, folders are only listed again
+    if their modification time changed since the last update.
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), "sample_library.sqlite3")
+
+        self.db_path = db_path
+
+        self._lock = threading.RLock()
+        self._update_lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER, subdirs TEXT)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, name TEXT, size INTEGER)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+
+        # file name -> {path: size}, kept in memory so resolving a path is a single dict lookup
+        self._by_name = {}
+        for path, name, size in self._connection.execute("SELECT path, name, size FROM files"):
+            self._by_name.setdefault(name, {})[path] = size
+
+    @property
+    def roots(self):
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, root):
+        with self._lock:
+            self._connection.execute("INSERT OR IGNORE INTO roots VALUES (?)", (os.path.abspath(root),))
+
+    def remove_root(self, root):
+        with self._lock:
+            self._connection.execute("DELETE FROM roots WHERE path = ?", (os.path.abspath(root),))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(paths) for paths in self._by_name.values())
+
+    def update(self):
+        """Bring the index up to date with the library folders on disk.
+
+        Folders whose modification time did not change are not listed again, only stat-ed.
+        """
+        with self._update_lock:
+            with self._lock:
+                known_dirs = {path: (mtime, json.loads(subdirs)) for path, mtime, subdirs in self._connection.execute("SELECT * FROM dirs")}
+
+            seen = set()
+            stack = list(reversed(self.roots))
+
+            while stack:
+                directory = stack.pop()
+                if directory in seen:
+                    continue
+
+                # a folder that cannot be stat-ed (e.g. deleted) is not seen, so its files are forgotten below
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(directory)
+
+                if directory in known_dirs and known_dirs[directory][0] == mtime:
+                    subdirs = known_dirs[directory][1]
+                else:
+                    subdirs = self._index_dir(directory, mtime)
+
+                stack.extend(os.path.join(directory, name) for name in reversed(subdirs))
+
+            # forget folders that were deleted or no longer belong to a root
+            for directory in set(known_dirs) - seen:
+                self._replace_dir(directory, None, [], [])
+
+    def _index_dir(self, directory, mtime):
+        files = []
+        subdirs = []
+
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            files.append((entry.path, entry.stat().st_size))
+                    except OSError:
+                        continue
+
+        except OSError as e:
+            print(f"Error indexing sample folder {directory}: {e}")
+
+        subdirs.sort()
+        self._replace_dir(directory, mtime, subdirs, files)
+        return subdirs
+
+    def _replace_dir(self, directory, mtime, subdirs, files):
+        with self._lock:
+            for (path,) in self._connection.execute("SELECT path FROM files WHERE dir = ?", (directory,)).fetchall():
+                name = normalize_name(os.path.basename(path))
+                paths = self._by_name.get(name, {})
+                paths.pop(path, None)
+                if not paths:
+                    self._by_name.pop(name, None)
+
+            rows = [(path, directory, normalize_name(os.path.basename(path)), size) for path, size in files]
+            for path, _, name, size in rows:
+                self._by_name.setdefault(name, {})[path] = size
+
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM files WHERE dir = ?", (directory,))
+            self._connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+
+            if mtime is None:
+                self._connection.execute("DELETE FROM dirs WHERE path = ?", (directory,))
+            else:
+                self._connection.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (directory, mtime, json.dumps(subdirs)))
+
+            self._connection.execute("COMMIT")
+
+    def resolve(self, path, size=None):
+        """Return the current location of a moved sample or None if it is not in the library.
+
+        If the size of the missing file is known, only files of that size are accepted.
+        """
+        parts = _split_path(path)
+        if not parts:
+            return None
+
+        with self._lock:
+            candidates = dict(self._by_name.get(normalize_name(parts[-1]), {}))
+
+        # a file with the same name but another size is a different sample
+        if size is not None:
+            candidates = {candidate: recorded for candidate, recorded in candidates.items() if recorded == size}
+
+        if not candidates:
+            return None
+
+        # several files with the same name: prefer the one whose parent folders match the old path best
+        def score(candidate):
+            old = [normalize_name(part) for part in reversed(parts[:-1])]
+            new = [normalize_name(part) for part in reversed(_split_path(candidate)[:-1])]
+            matching = 0
+            for a, b in zip(old, new):
+                if a != b:
+                    break
+                matching += 1
+            return -matching, candidate
+
+        for candidate in sorted(candidates, key=score):
+            # a file replaced since the last update is not the one that was indexed
+            if directory_cache.exists(candidate) and _get_size(candidate) == candidates[candidate]:
+                return candidate
+
+        return None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,152 @@
+import os
+import threading
+from src.sample import Sample
+
+
+def sample_key(path):
+    # the same file written with different case or separators is one sample
+    return os.path.normcase(os.path.normpath(path))
+
+
+class SampleRegistry:
+    """Interns one Sample per sample file for all loaded projects.
+
+    Projects register the paths of their samples with set_project_samples and get the shared Sample
+    objects back, so a sample used by many projects is stored, checked and probed once. The registry
+    keeps the projects of every sample and the samples of every project: projects_using and samples_of
+    take time proportional to their result, use_count is O(1) and most_used(k) only visits the k most
+    used samples. Samples that no project uses anymore are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # key -> Sample
+        self._projects = {}  # key -> {project path: None}, in the order the projects were linked
+        self._project_samples = {}  # project path -> [key]
+
+        # samples grouped by use count, the counts form a linked list from 0 (no bucket) to _max_count,
+        # use counts only change by one, so moving a sample to its new bucket is O(1)
+        self._by_count = {}  # use count -> {key: None}
+        self._higher = {0: None}  # use count -> next higher count with a bucket
+        self._lower = {}  # use count -> next lower count with a bucket, or 0
+        self._max_count = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __contains__(self, path):
+        return sample_key(path) in self._samples
+
+    def get(self, path):
+        return self._samples.get(sample_key(path))
+
+    def set_project_samples(self, project_path, paths):
+        """Link project_path to the samples at paths, replacing its previous samples, and return their
+        shared Sample objects in the order of paths."""
+        first_paths = {}
+        for path in paths:
+            first_paths.setdefault(sample_key(path), path)
+
+        with self._lock:
+            old_keys = self._project_samples.get(project_path, [])
+            linked = set(old_keys)
+
+            for key, path in first_paths.items():
+                if key not in self._samples:
+                    self._samples[key] = Sample(path)
+                    self._projects[key] = {}
+                if key not in linked:
+                    self._link(key, project_path)
+
+            # unlinked after the new samples were linked, so samples the project keeps are never dropped
+            for key in old_keys:
+                if key not in first_paths:
+                    self._unlink(key, project_path)
+
+            self._project_samples[project_path] = list(first_paths)
+            return [self._samples[key] for key in first_paths]
+
+    def remove_project(self, project_path):
+        with self._lock:
+            for key in self._project_samples.pop(project_path, []):
+                self._unlink(key, project_path)
+
+    def projects_using(self, path):
+        """Return the paths of the projects that use the sample at path."""
+        with self._lock:
+            return list(self._projects.get(sample_key(path), ()))
+
+    def samples_of(self, project_path):
+        with self._lock:
+            return [self._samples[key] for key in self._project_samples.get(project_path, ())]
+
+    def use_count(self, path):
+        with self._lock:
+            return len(self._projects.get(sample_key(path), ()))
+
+    def most_used(self, limit=10):
+        """Return up to limit (Sample, use count) pairs, the most used samples first."""
+        result = []
+
+        with self._lock:
+            count = self._max_count
+            while count and len(result) < limit:
+                for key in self._by_count[count]:
+                    result.append((self._samples[key], count))
+                    if len(result) == limit:
+                        break
+                count = self._lower[count]
+
+        return result
+
+    def _link(self, key, project_path):
+        projects = self._projects[key]
+        self._move(key, len(projects), len(projects) + 1)
+        projects[project_path] = None
+
+    def _unlink(self, key, project_path):
+        projects = self._projects[key]
+        del projects[project_path]
+        self._move(key, len(projects) + 1, len(projects))
+
+        if not projects:
+            del self._projects[key]
+            del self._samples[key]
+
+    def _move(self, key, count, new_count):
+        if new_count and new_count not in self._by_count:
+            # the new bucket is a direct neighbour of the current one
+            below = count if new_count > count else self._lower[count]
+            self._insert_bucket(new_count, below)
+
+        if count:
+            bucket = self._by_count[count]
+            del bucket[key]
+            if not bucket:
+                self._remove_bucket(count)
+
+        if new_count:
+            self._by_count[new_count][key] = None
+
+    def _insert_bucket(self, count, below):
+        above = self._higher[below]
+        self._by_count[count] = {}
+        self._higher[below] = count
+        self._lower[count] = below
+        self._higher[count] = above
+
+        if above is None:
+            self._max_count = count
+        else:
+            self._lower[above] = count
+
+    def _remove_bucket(self, count):
+        below = self._lower.pop(count)
+        above = self._higher.pop(count)
+        del self._by_count[count]
+        self._higher[below] = above
+
+        if above is None:
+            self._max_count = below
+        else:
+            self._lower[above] = below
@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+import time
+
+
+class SignatureCache:
+    """Base of the persistent caches keyed by (path, size, mtime_ns).
+
+    Subclasses name their table and its value columns, a row holds the values computed for one version
+    of a file. Every row weighs weight (an SQL expression over its columns, 1 by default), once the rows
+    weigh more than limit the least recently stored or read rows are dropped until 90% of limit is left.
+    """
+
+    table = None
+    columns = ()  # (name, SQL type) of the value columns
+    weight = "1"
+
+    def __init__(self, db_path, limit):
+        self.db_path = db_path
+        self.limit = limit
+
+        # caches are shared by worker threads, one connection guarded by a lock is enough
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        columns = "".join(f"{name} {sql_type}, " for name, sql_type in self.columns)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, {columns}last_used REAL)"
+        )
+        self._total = self._connection.execute(f"SELECT COALESCE(SUM({self.weight}), 0) FROM {self.table}").fetchone()[0]
+
+    def _get(self, path, signature, *columns, touch=False):
+        """Return the values of columns stored for this signature of path, or None.
+
+        With touch the row counts as used again, so it is evicted last.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT size, mtime_ns, {', '.join(columns)} FROM {self.table} WHERE path = ?", (path,)
+            ).fetchone()
+
+            if row is None or (row[0], row[1]) != tuple(signature):
+                return None
+
+            if touch:
+                self._connection.execute(f"UPDATE {self.table} SET last_used = ? WHERE path = ?", (time.time(), path))
+
+        return row[2:]
+
+    def _put(self, path, signature, **values):
+        """Store values for this signature of path, other columns are kept if the signature did not change."""
+        names = "".join(f"{name}, " for name in values)
+        placeholders = "?, " * len(values)
+
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT size, mtime_ns, {self.weight} FROM {self.table} WHERE path = ?", (path,)
+            ).fetchone()
+
+            if row is not None and (row[0], row[1]) == tuple(signature):
+                assignments = "".join(f"{name} = ?, " for name in values)
+                self._connection.execute(
+                    f"UPDATE {self.table} SET {assignments}last_used = ? WHERE path = ?",
+                    (*values.values(), time.time(), path)
+                )
+            else:
+                self._connection.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (path, size, mtime_ns, {names}last_used) VALUES (?, ?, ?, {placeholders}?)",
+                    (path, signature[0], signature[1], *values.values(), time.time())
+                )
+
+            if row is not None:
+                self._total -= row[2] or 0
+            self._total += self._connection.execute(
+                f"SELECT {self.weight} FROM {self.table} WHERE path = ?", (path,)
+            ).fetchone()[0] or 0
+
+            if self._total > self.limit:
+                self._evict()
+
+    def _evict(self):
+        # drop the least recently used rows until the cache is back at 90% of its limit
+        target = self.limit * 0.9
+        evicted = []
+
+        rows = self._connection.execute(f"SELECT path, {self.weight} FROM {self.table} ORDER BY last_used")
+        for path, weight in rows:
+            if self._total <= target:
+                break
+            evicted.append((path,))
+            self._total -= weight or 0
+        rows.close()
+
+        self._connection.executemany(f"DELETE FROM {self.table} WHERE path = ?", evicted)
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,204 @@
+import sys
+import customtkinter as ctk
+
+
+def visible_range(offset, height, row_height, count, buffer=0):
+    """Return (first, last) item indexes (last exclusive) that have to be shown when the list is
+    scrolled by offset pixels, plus buffer rows below the viewport."""
+    if count == 0 or row_height <= 0:
+        return 0, 0
+
+    first = max(0, min(offset // row_height, count - 1))
+    last = min(count, (offset + max(height, 0)) // row_height + 1 + buffer)
+    return first, max(first, last)
+
+
+def clamp_offset(offset, height, row_height, count):
+    # the last row may end at the bottom of the viewport, but not above it
+    return max(0, min(offset, count * row_height - height))
+
+
+class IncrementalFilter:
+    """Case-insensitive substring filter over key(item) for type-ahead search.
+
+    While the query only grows, only the previous matches are searched again. Items added later are
+    matched against the current query right away.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.query = ""
+        self.items = []
+        self.matches = []
+        self._keys = []
+        self._match_indexes = []
+
+    def add(self, item):
+        """Add item, return True if it matches the current query."""
+        key = self.key(item).casefold()
+        self.items.append(item)
+        self._keys.append(key)
+
+        if self.query in key:
+            self._match_indexes.append(len(self.items) - 1)
+            self.matches.append(item)
+            return True
+
+        return False
+
+    def set_query(self, query):
+        query = query.casefold()
+        if query == self.query:
+            return self.matches
+
+        if query.startswith(self.query):
+            candidates = self._match_indexes
+        else:
+            candidates = range(len(self.items))
+
+        self.query = query
+        self._match_indexes = [i for i in candidates if query in self._keys[i]]
+        self.matches = [self.items[i] for i in self._match_indexes]
+        return self.matches
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only creates widgets for the rows in the viewport.
+
+    create_row(master) builds the widget of one row (at most row_height pixels high), bind_row(row, item)
+    shows an item in it. While scrolling, the same row widgets are rebound to other items, so showing
+    a new list of items costs the same no matter how many items it has. on_render(items) is called
+    with the shown items after every change.
+    """
+
+    def __init__(self, master, row_height, create_row, bind_row, buffer=2, on_render=None, **kwargs):
+        super().__init__(master, **kwargs)
+
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.on_render = on_render
+        self.buffer = buffer
+
+        self.items = []
+        self.offset = 0
+        self.rows = []
+        self._bound = []  # item shown by every row, to skip rebinding rows that did not change
+        self._placed = []
+        self._row_by_item = {}  # id(item) -> row of the visible items
+
+        self.viewport = ctk.CTkFrame(master=self, fg_color="transparent")
+        self.viewport.pack(fill="both", side="left", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(master=self, command=self._on_scrollbar, width=12)
+        self.scrollbar.pack(fill="y", side="right")
+
+        self.viewport.bind("<Configure>", lambda event: self.render())
+
+        # several lists share the global mouse wheel binding, each one only reacts while the pointer is over it
+        if sys.platform.startswith("linux"):
+            self.bind_all("<Button-4>", self._on_mousewheel, add="+")
+            self.bind_all("<Button-5>", self._on_mousewheel, add="+")
+        else:
+            self.bind_all("<MouseWheel>", self._on_mousewheel, add="+")
+
+    def set_items(self, items, keep_offset=False):
+        # the same (grown) list only needs the new rows to be bound
+        if items is not self.items:
+            self._bound = [None] * len(self.rows)
+        self.items = items
+        if not keep_offset:
+            self.offset = 0
+        self.render()
+
+    def refresh(self):
+        # rebind the visible rows, e.g. after the state of their items changed
+        self._bound = [None] * len(self.rows)
+        self.render()
+
+    def row_of(self, item):
+        """Return the row widget that currently shows item, or None if it is not visible."""
+        return self._row_by_item.get(id(item))
+
+    def scroll_to(self, offset):
+        self.offset = int(offset)
+        self.render()
+
+    def scroll_by(self, pixels):
+        self.scroll_to(self.offset + pixels)
+
+    def see(self, index):
+        # scroll just enough to make the item at index visible
+        height = self.viewport.winfo_height()
+        top = index * self.row_height
+
+        if top < self.offset:
+            self.scroll_to(top)
+        elif top + self.row_height > self.offset + height:
+            self.scroll_to(top + self.row_height - height)
+
+    def render(self):
+        height = self.viewport.winfo_height()
+        count = len(self.items)
+
+        self.offset = clamp_offset(self.offset, height, self.row_height, count)
+        first, last = visible_range(self.offset, height, self.row_height, count, self.buffer)
+
+        # create rows lazily, only as many as fit into the viewport
+        while len(self.rows) < last - first:
+            self.rows.append(self.create_row(self.viewport))
+            self._bound.append(None)
+            self._placed.append(False)
+
+        shift = self.offset - first * self.row_height
+        self._row_by_item = {}
+
+        for i, row in enumerate(self.rows):
+            index = first + i
+
+            if index >= last:
+                if self._placed[i]:
+                    row.place_forget()
+                    self._placed[i] = False
+                self._bound[i] = None
+                continue
+
+            item = self.items[index]
+            if self._bound[i] is not item:
+                self.bind_row(row, item)
+                self._bound[i] = item
+
+            row.place(x=0, y=i * self.row_height - shift, relwidth=1.0)
+            self._placed[i] = True
+            self._row_by_item[id(item)] = row
+
+        self._update_scrollbar(height, count)
+
+        if self.on_render is not None:
+            self.on_render(self.items[first:last])
+
+    def _update_scrollbar(self, height, count):
+        total = count * self.row_height
+        if total <= height or total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self.items) * self.row_height
+
+        if action == "moveto":
+            self.scroll_to(float(value) * total)
+        elif action == "scroll":
+            step = self.viewport.winfo_height() if unit == "pages" else self.row_height
+            self.scroll_by(int(float(value)) * step)
+
+    def _on_mousewheel(self, event):
+        widget = self.winfo_containing(event.x_root, event.y_root)
+        if widget is None or not (str(widget) == str(self) or str(widget).startswith(str(self) + ".")):
+            return
+
+        if event.num == 4 or event.delta > 0:
+            self.scroll_by(-self.row_height)
+        elif event.num == 5 or event.delta < 0:
+            self.scroll_by(self.row_height)
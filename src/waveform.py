@@ -0,0 +1,236 @@
+import os
+import wave
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame
+from src.file_utils import get_user_cache_dir, get_file_signature
+from src.signature_cache import SignatureCache
+from src.audio_probe import probe
+from src.audio_manager import decoded_bytes_per_second
+
+# min/max pairs per thumbnail, two pixels per bucket in the sample rows
+DEFAULT_BUCKETS = 60
+WAV_CHUNK_FRAMES = 1 << 16
+
+# compressed files are decoded completely by pygame, files that would decode to more bytes get no thumbnail,
+# nor do files larger than MAX_DECODE_BYTES if their header has no duration
+MAX_DECODED_BYTES = 24 * 1024 * 1024
+MAX_DECODE_BYTES = 2 * 1024 * 1024
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MEMORY_ENTRIES = 2000
+DEFAULT_WORKERS = 2
+
+
+def compute_peaks(samples, buckets=DEFAULT_BUCKETS):
+    """Return a (buckets, 2) float32 array with the minimum and maximum of every bucket of samples.
+
+    samples is a (frames,) or (frames, channels) array of floats in -1.0 - 1.0, channels are merged.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+
+    frames = samples.shape[0]
+    if frames == 0:
+        return np.zeros((buckets, 2), dtype=np.float32)
+
+    low = samples.min(axis=1)
+    high = samples.max(axis=1)
+    starts = (np.arange(buckets) * frames) // buckets
+
+    return np.stack([np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts)], axis=1)
+
+
+def pcm_to_float(data, sample_width):
+    # little endian PCM bytes as written in WAV files to floats in -1.0 - 1.0
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+
+    if sample_width == 2:
+        return np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        return values.astype(np.float32) / float(1 << 23)
+
+    if sample_width == 4:
+        return np.frombuffer(data, dtype='<i4').astype(np.float32) / float(1 << 31)
+
+    raise ValueError(f"unsupported sample width: {sample_width}")
+
+
+def array_to_float(array):
+    # the sample array of a decoded pygame Sound, its type depends on the mixer format
+    if np.issubdtype(array.dtype, np.floating):
+        return array.astype(np.float32)
+
+    info = np.iinfo(array.dtype)
+    if info.min == 0:
+        return (array.astype(np.float32) - (info.max + 1) / 2) / ((info.max + 1) / 2)
+
+    return array.astype(np.float32) / float(-info.min)
+
+
+def _wav_peaks(path, buckets):
+    # read in chunks, so long stems are processed with constant memory
+    with wave.open(path, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        frames = wav_file.getnframes()
+
+        low = np.full(buckets, np.inf, dtype=np.float32)
+        high = np.full(buckets, -np.inf, dtype=np.float32)
+        bounds = (np.arange(buckets + 1) * frames) // buckets
+        # with fewer frames than buckets some buckets are empty, like in compute_peaks they take their first frame
+        ends = np.maximum(bounds[1:], bounds[:-1] + 1)
+        position = 0
+
+        while position < frames:
+            data = wav_file.readframes(WAV_CHUNK_FRAMES)
+            if not data:
+                break
+
+            samples = pcm_to_float(data, sample_width).reshape(-1, channels)
+            count = samples.shape[0]
+
+            # buckets that overlap the frames [position, position + count)
+            first = np.searchsorted(ends, position, side='right')
+            last = np.searchsorted(bounds[:-1], position + count, side='left')
+            starts = np.clip(bounds[first:last], position, position + count - 1) - position
+
+            low[first:last] = np.minimum(low[first:last], np.minimum.reduceat(samples.min(axis=1), starts))
+            high[first:last] = np.maximum(high[first:last], np.maximum.reduceat(samples.max(axis=1), starts))
+            position += count
+
+    peaks = np.stack([low, high], axis=1)
+    peaks[~np.isfinite(peaks)] = 0.0
+    return peaks
+
+
+def read_peaks(path, buckets=DEFAULT_BUCKETS):
+    """Decode path and return its peaks, or None if it cannot be decoded."""
+    try:
+        return _wav_peaks(path, buckets)
+    except (wave.Error, EOFError, ValueError):
+        # not a PCM WAV file (mp3, ogg, float WAV), decoded with pygame instead
+        pass
+    except OSError as e:
+        print(f"Error reading waveform of {path}: {e}")
+        return None
+
+    try:
+        info = probe(path)
+        if info is not None and info.duration is not None:
+            too_large = info.duration * decoded_bytes_per_second() > MAX_DECODED_BYTES
+        else:
+            too_large = os.path.getsize(path) > MAX_DECODE_BYTES
+
+        if too_large:
+            return None
+
+
+        sound = pygame.mixer.Sound(path)
+        return compute_peaks(array_to_float(pygame.sndarray.array(sound)), buckets)
+
+    except (OSError, pygame.error, ValueError) as e:
+        print(f"Error reading waveform of {path}: {e}")
+        return None
+
+
+class PeakCache(SignatureCache):
+    """Persistent cache of waveform peaks keyed by (path, size, mtime_ns), stored as 8 bit values."""
+
+    table = "peaks"
+    columns = (("buckets", "INTEGER"), ("peaks", "BLOB"))
+
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        if db_path is None:
+            db_path = os.path.join(get_user_cache_dir(), "peak_cache.sqlite3")
+
+        super().__init__(db_path, max_entries)
+
+    def get(self, path, signature, buckets):
+        row = self._get(path, signature, "buckets", "peaks")
+        if row is None or row[0] != buckets:
+            return None
+
+        return np.frombuffer(row[1], dtype=np.int8).reshape(buckets, 2).astype(np.float32) / 127.0
+
+    def put(self, path, signature, buckets, peaks):
+        data = np.round(np.clip(peaks, -1.0, 1.0) * 127.0).astype(np.int8).tobytes()
+        self._put(path, signature, buckets=buckets, peaks=data)
+
+
+class WaveformLoader:
+    """Computes waveform peaks on a small thread pool.
+
+    request(path, callback) calls callback(path, peaks) once the peaks are known, from a worker thread
+    or right away if they are in memory. Peaks come from memory, then from peak_cache and only then
+    from decoding the file. retain(paths) drops queued requests for paths that are no longer visible.
+    """
+
+    def __init__(self, peak_cache=None, buckets=DEFAULT_BUCKETS, max_workers=DEFAULT_WORKERS, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.peak_cache = peak_cache
+        self.buckets = buckets
+        self.memory_entries = memory_entries
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # path -> peaks
+        self._pending = {}  # path -> (future, callbacks)
+
+    def request(self, path, callback):
+        with self._lock:
+            if path in self._memory:
+                self._memory.move_to_end(path)
+                peaks = self._memory[path]
+            elif path in self._pending:
+                self._pending[path][1].append(callback)
+                return
+            else:
+                self._pending[path] = (self._executor.submit(self._load, path), [callback])
+                return
+
+        callback(path, peaks)
+
+    def retain(self, paths):
+        paths = set(paths)
+
+        with self._lock:
+            for path in list(self._pending):
+                future, _ = self._pending[path]
+                # only requests that did not start yet can be cancelled
+                if path not in paths and future.cancel():
+                    del self._pending[path]
+
+    def _load(self, path):
+        peaks = None
+        signature = get_file_signature(path)
+
+        if signature is not None:
+            if self.peak_cache is not None:
+                peaks = self.peak_cache.get(path, signature, self.buckets)
+
+            if peaks is None:
+                peaks = read_peaks(path, self.buckets)
+                if peaks is not None and self.peak_cache is not None:
+                    self.peak_cache.put(path, signature, self.buckets, peaks)
+
+        with self._lock:
+            _, callbacks = self._pending.pop(path, (None, []))
+
+            if peaks is not None:
+                self._memory[path] = peaks
+                while len(self._memory) > self.memory_entries:
+                    self._memory.popitem(last=False)
+
+        for callback in callbacks:
+            callback(path, peaks)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
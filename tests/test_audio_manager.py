@@ -2,9 +2,16 @@ import unittest
 from unittest.mock import patch, MagicMock
 import pygame
 from src.audio_manager import AudioManager
+from src.audio_probe import AudioInfo
 
 class TestAudioManager(unittest.TestCase):
 
+    def setUp(self):
+        # the paths in these tests do not exist, the header probe finds no duration by default
+        probe_patcher = patch('src.audio_manager.probe', return_value=None)
+        self.mock_probe = probe_patcher.start()
+        self.addCleanup(probe_patcher.stop)
+
     @patch('pygame.mixer.Sound')
     @patch('os.path.exists', return_value=True)
     def test_play_audio_loads_and_plays_new_audio(self, mock_exists, mock_sound):
@@ -64,6 +71,170 @@ class TestAudioManager(unittest.TestCase):
         mock_channel.get_busy.assert_called_once()
         mock_channel.stop.assert_not_called()
 
+    @patch('src.audio_manager.get_file_signature', return_value=(100, 1))
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.exists', return_value=True)
+    def test_switching_between_samples_uses_cache(self, mock_exists, mock_sound, mock_get_init, mock_signature):
+        mock_sound.side_effect = lambda path: MagicMock(name=path, **{"get_length.return_value": 1.0})
+
+        manager = AudioManager()
+        for path in ["kick1.wav", "kick2.wav", "kick1.wav", "kick2.wav"]:
+            manager.play_audio(path)
+
+        self.assertEqual(mock_sound.call_count, 2)
+        self.assertEqual((manager.hits, manager.misses), (2, 2))
+        self.assertEqual(manager.cached_bytes, 2 * 44100 * 2 * 2)
+
+    @patch('src.audio_manager.get_file_signature', return_value=(100, 1))
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.Sound')
+    def test_least_recently_used_sound_is_evicted(self, mock_sound, mock_get_init, mock_signature):
+        mock_sound.side_effect = lambda path: MagicMock(name=path, **{"get_length.return_value": 1.0})
+        one_second = 44100 * 2 * 2
+
+        manager = AudioManager(cache_bytes=2 * one_second)
+        manager.load_audio("a.wav")
+        manager.load_audio("b.wav")
+        manager.load_audio("a.wav")  # b.wav is now the least recently used
+        manager.load_audio("c.wav")
+
+        self.assertEqual(list(manager._cache), ["a.wav", "c.wav"])
+        self.assertEqual(manager.cached_bytes, 2 * one_second)
+
+    @patch('src.audio_manager.get_file_signature', return_value=(100, 1))
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=1024)
+    @patch('os.path.exists', return_value=True)
+    def test_current_sound_is_not_evicted(self, mock_exists, mock_getsize, mock_sound, mock_get_init, mock_signature):
+        mock_sound.side_effect = lambda path: MagicMock(name=path, **{"get_length.return_value": 1.0})
+        one_second = 44100 * 2 * 2
+
+        manager = AudioManager(cache_bytes=2 * one_second)
+        manager.load_audio("a.wav")
+        manager.prefetch_audio("b.wav")
+        manager.prefetch_audio("c.wav")  # a.wav is the least recently used, but it is the current sound
+
+        self.assertEqual(list(manager._cache), ["a.wav", "c.wav"])
+        self.assertIs(manager._cache["a.wav"][1], manager.audio)
+        self.assertEqual(manager.cached_bytes, 2 * one_second)
+
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=1024)
+    @patch('os.path.exists', return_value=True)
+    def test_replaying_a_changed_file_decodes_it_again(self, mock_exists, mock_getsize, mock_sound, mock_get_init):
+        manager = AudioManager()
+
+        with patch('src.audio_manager.get_file_signature', return_value=(100, 1)):
+            manager.play_audio("kick.wav")
+            manager.play_audio("kick.wav")
+        with patch('src.audio_manager.get_file_signature', return_value=(120, 2)):
+            manager.play_audio("kick.wav")
+
+        self.assertEqual(mock_sound.call_count, 2)
+        self.assertEqual((manager.hits, manager.misses), (1, 2))
+
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.Sound')
+    def test_changed_file_is_decoded_again(self, mock_sound, mock_get_init):
+        manager = AudioManager()
+
+        with patch('src.audio_manager.get_file_signature', return_value=(100, 1)):
+            manager.load_audio("kick.wav")
+        with patch('src.audio_manager.get_file_signature', return_value=(120, 2)):
+            manager.load_audio("kick.wav")
+
+        self.assertEqual(mock_sound.call_count, 2)
+        self.assertEqual(len(manager._cache), 1)
+
+    @patch('pygame.mixer.music')
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=200 * 1024 * 1024)
+    @patch('os.path.exists', return_value=True)
+    def test_large_files_are_streamed(self, mock_exists, mock_getsize, mock_sound, mock_music):
+        manager = AudioManager()
+        manager.play_audio("stem.wav")
+
+        mock_sound.assert_not_called()
+        mock_music.load.assert_called_once_with("stem.wav")
+        mock_music.play.assert_called_once()
+        self.assertEqual(manager.streaming_path, "stem.wav")
+
+        manager.stop_audio()
+        mock_music.stop.assert_called_once()
+        self.assertIsNone(manager.streaming_path)
+
+    @patch('pygame.mixer.music')
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=1024)
+    @patch('os.path.exists', return_value=True)
+    def test_small_files_are_decoded(self, mock_exists, mock_getsize, mock_sound, mock_music):
+        manager = AudioManager()
+        manager.play_audio("kick.wav")
+
+        mock_sound.assert_called_once_with("kick.wav")
+        mock_music.load.assert_not_called()
+
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.music')
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=8 * 1024 * 1024)
+    @patch('os.path.exists', return_value=True)
+    def test_long_compressed_files_are_streamed(self, mock_exists, mock_getsize, mock_sound, mock_music, mock_get_init):
+        # 8 MiB of MP3 decode to about 100 MiB
+        self.mock_probe.return_value = AudioInfo("mp3", duration=600.0, size=8 * 1024 * 1024)
+
+        manager = AudioManager()
+        manager.play_audio("mix.mp3")
+
+        mock_sound.assert_not_called()
+        mock_music.load.assert_called_once_with("mix.mp3")
+
+    @patch('pygame.mixer.get_init', return_value=(44100, -16, 2))
+    @patch('pygame.mixer.music')
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.getsize', return_value=20 * 1024 * 1024)
+    @patch('os.path.exists', return_value=True)
+    def test_short_files_are_decoded_whatever_their_size(self, mock_exists, mock_getsize, mock_sound, mock_music, mock_get_init):
+        # 20 MiB of 32 bit 96 kHz audio, but only a few seconds after decoding to the mixer format
+        self.mock_probe.return_value = AudioInfo("wav", duration=27.0, size=20 * 1024 * 1024)
+
+        manager = AudioManager()
+        manager.play_audio("hit.wav")
+
+        mock_sound.assert_called_once_with("hit.wav")
+        mock_music.load.assert_not_called()
+
+    @patch('src.audio_manager.get_file_signature', return_value=(100, 1))
+    @patch('pygame.mixer.music')
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.exists', return_value=True)
+    def test_streaming_replaces_the_current_sound(self, mock_exists, mock_sound, mock_music, mock_signature):
+        manager = AudioManager()
+        with patch('os.path.getsize', return_value=1024):
+            manager.play_audio("kick.wav")
+        with patch('os.path.getsize', return_value=200 * 1024 * 1024):
+            manager.play_audio("stem.wav")
+
+        self.assertIsNone(manager.audio)
+        self.assertIsNone(manager.current_audio_path)
+        self.assertEqual(manager.streaming_path, "stem.wav")
+
+    @patch('src.audio_manager.get_file_signature', return_value=(100, 1))
+    @patch('pygame.mixer.Sound')
+    @patch('os.path.exists', return_value=True)
+    def test_prefetched_sound_plays_without_decoding(self, mock_exists, mock_sound, mock_signature):
+        manager = AudioManager()
+        manager.prefetch_audio("kick.wav")
+        manager.prefetch_audio("kick.wav")
+        manager.play_audio("kick.wav")
+
+        mock_sound.assert_called_once_with("kick.wav")
+        mock_sound.return_value.play.assert_called_once()
+        self.assertEqual(manager.hits, 1)
+
     def test_stop_audio_when_channel_is_none(self):
         manager = AudioManager()
         manager.channel = None
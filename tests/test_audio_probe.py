@@ -0,0 +1,188 @@
+import unittest
+import os
+import wave
+import struct
+import tempfile
+import shutil
+import threading
+from unittest.mock import patch, MagicMock
+from src.audio_probe import probe, AudioProbe, MetadataCache
+
+
+def ogg_page(granule, payload):
+    return b"OggS" + bytes([0, 2]) + struct.pack("<qIII", granule, 1, 0, 0) + bytes([1, len(payload)]) + payload
+
+
+def mp3_frame_header():
+    # MPEG 1 layer III, 128 kbit/s, 44.1 kHz, joint stereo
+    return bytes([0xFF, 0xFB, 0x90, 0x40])
+
+
+class TestProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_wav(self):
+        path = os.path.join(self.test_dir, "kick.wav")
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(3)
+            wav_file.setframerate(48000)
+            wav_file.writeframes(b"\x00" * 6 * 24000)
+
+        info = probe(path)
+
+        self.assertEqual((info.format, info.channels, info.sample_rate, info.bit_depth), ("wav", 2, 48000, 24))
+        self.assertAlmostEqual(info.duration, 0.5)
+        self.assertEqual(info.size, os.path.getsize(path))
+
+    def test_wav_with_chunks_before_data(self):
+        fmt = struct.pack("<HHIIHH", 1, 1, 44100, 88200, 2, 16)
+        data = b"\x00" * 88200
+        body = b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt + b"LIST" + struct.pack("<I", 5) + b"abcde\x00" + b"data" + struct.pack("<I", len(data)) + data
+        path = self.write("loop.wav", b"RIFF" + struct.pack("<I", len(body)) + body)
+
+        info = probe(path)
+
+        self.assertAlmostEqual(info.duration, 1.0)
+        self.assertEqual(info.channels, 1)
+
+    def test_cbr_mp3_with_id3_tag(self):
+        tag = b"ID3" + bytes([3, 0, 0, 0, 0, 0, 20]) + b"\x00" * 20
+        audio = (mp3_frame_header() + b"\x00" * 413) * 100
+        path = self.write("bass.mp3", tag + audio)
+
+        info = probe(path)
+
+        self.assertEqual((info.format, info.sample_rate, info.channels), ("mp3", 44100, 2))
+        self.assertAlmostEqual(info.duration, len(audio) * 8 / 128000)
+
+    def test_vbr_mp3_uses_xing_frame_count(self):
+        first_frame = mp3_frame_header() + b"\x00" * 32 + b"Xing" + struct.pack(">II", 1, 1000) + b"\x00" * 370
+        path = self.write("vocal.mp3", first_frame + b"\x00" * 10000)
+
+        info = probe(path)
+
+        self.assertAlmostEqual(info.duration, 1000 * 1152 / 44100)
+
+    def test_ogg_vorbis(self):
+        identification = b"\x01vorbis" + struct.pack("<IBI", 0, 2, 44100) + b"\x00" * 14
+        data = ogg_page(0, identification) + b"\x00" * 5000 + ogg_page(88200, b"\x00" * 10)
+        path = self.write("pad.ogg", data)
+
+        info = probe(path)
+
+        self.assertEqual((info.format, info.channels, info.sample_rate), ("ogg", 2, 44100))
+        self.assertAlmostEqual(info.duration, 2.0)
+
+    def test_wav_with_large_chunk_before_data(self):
+        # e.g. a LIST or bext chunk with embedded artwork, the data chunk starts after the first 64 KiB
+        fmt = struct.pack("<HHIIHH", 1, 2, 44100, 176400, 4, 16)
+        metadata = b"\x00" * (100 * 1024 + 1)
+        data = b"\x00" * 176400 * 2
+        body = (b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt + b"LIST" + struct.pack("<I", len(metadata)) + metadata + b"\x00"
+                + b"data" + struct.pack("<I", len(data)) + data)
+        path = self.write("stem.wav", b"RIFF" + struct.pack("<I", len(body)) + body)
+
+        info = probe(path)
+
+        self.assertAlmostEqual(info.duration, 2.0)
+        self.assertEqual(info.channels, 2)
+
+    def test_unknown_file(self):
+        self.assertIsNone(probe(self.write("notes.wav", b"hello")))
+
+
+class TestAudioProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = MetadataCache(os.path.join(self.test_dir, "metadata.sqlite3"))
+        self.paths = []
+        for i in range(20):
+            path = os.path.join(self.test_dir, f"s{i}.wav")
+            with wave.open(path, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(8000)
+                wav_file.writeframes(b"\x00\x00" * 800 * (i + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_probe_many_and_cache(self):
+        infos = AudioProbe(self.cache, max_workers=4).probe_many(self.paths)
+
+        self.assertEqual([round(infos[p].duration, 2) for p in self.paths], [round(0.1 * (i + 1), 2) for i in range(20)])
+
+        with patch('src.audio_probe.probe') as mock_probe:
+            cached = AudioProbe(self.cache).probe_many(self.paths)
+
+        mock_probe.assert_not_called()
+        self.assertEqual(cached[self.paths[4]].to_dict(), infos[self.paths[4]].to_dict())
+
+    def test_changed_file_is_probed_again(self):
+        probe_tool = AudioProbe(self.cache)
+        probe_tool.probe_many(self.paths[:1])
+
+        with open(self.paths[0], 'ab') as f:
+            f.write(b"\x00" * 10)
+
+        with patch('src.audio_probe.probe', return_value=None) as mock_probe:
+            probe_tool.probe_many(self.paths[:1])
+
+        mock_probe.assert_called_once_with(self.paths[0])
+
+    def test_request_calls_back_once_with_all_infos(self):
+        probe_tool = AudioProbe(self.cache, max_workers=4)
+        done = threading.Event()
+        results = []
+
+        def callback(infos):
+            results.append(infos)
+            done.set()
+
+        probe_tool.request(self.paths + self.paths[:3], callback)
+
+        self.assertTrue(done.wait(5))
+        probe_tool.close()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(set(results[0]), set(self.paths))
+        self.assertAlmostEqual(results[0][self.paths[2]].duration, 0.3)
+
+    def test_cancelled_request_does_not_call_back(self):
+        probe_tool = AudioProbe(self.cache, max_workers=1)
+        started, release = threading.Event(), threading.Event()
+        callback = MagicMock()
+
+        def slow_probe(path):
+            started.set()
+            release.wait(5)
+            return None
+
+        with patch('src.audio_probe.probe', side_effect=slow_probe) as mock_probe:
+            request = probe_tool.request(self.paths, callback)
+            started.wait(5)
+            request.cancel()
+            release.set()
+            probe_tool.close()
+
+        # only the file that was being probed was read, the others were dropped
+        self.assertEqual(mock_probe.call_count, 1)
+        callback.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
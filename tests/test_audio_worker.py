@@ -0,0 +1,92 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from src.audio_worker import AudioWorker
+
+
+class TestAudioWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = MagicMock()
+        self.worker = AudioWorker(self.manager)
+
+    def tearDown(self):
+        self.worker.close()
+
+    def test_commands_run_on_worker_thread(self):
+        threads = []
+        self.manager.play_audio.side_effect = lambda path: threads.append(threading.current_thread())
+
+        self.worker.play("kick.wav")
+        self.worker.stop()
+        self.worker.wait_idle()
+
+        self.manager.play_audio.assert_called_once_with("kick.wav")
+        self.manager.stop_audio.assert_called_once()
+        self.assertNotEqual(threads, [threading.main_thread()])
+
+    def test_neighbours_are_prefetched_after_playing(self):
+        calls = []
+        self.manager.play_audio.side_effect = lambda path: calls.append(("play", path))
+        self.manager.prefetch_audio.side_effect = lambda path: calls.append(("prefetch", path))
+
+        self.worker.play("2.wav", neighbours=["3.wav", "1.wav"])
+        self.worker.wait_idle()
+
+        self.assertEqual(calls, [("play", "2.wav"), ("prefetch", "3.wav"), ("prefetch", "1.wav")])
+
+    def test_play_goes_before_pending_prefetch(self):
+        calls = []
+        blocked = threading.Event()
+        release = threading.Event()
+
+        def prefetch(path):
+            calls.append(("prefetch", path))
+            if path == "a.wav":
+                blocked.set()
+                release.wait()
+
+        self.manager.prefetch_audio.side_effect = prefetch
+        self.manager.play_audio.side_effect = lambda path: calls.append(("play", path))
+
+        self.worker.prefetch(["a.wav", "b.wav", "c.wav"])
+        blocked.wait()
+        self.worker.play("x.wav")
+        release.set()
+        self.worker.wait_idle()
+
+        self.assertEqual(calls, [("prefetch", "a.wav"), ("play", "x.wav"), ("prefetch", "b.wav"), ("prefetch", "c.wav")])
+
+    def test_new_prefetch_replaces_older_one(self):
+        blocked = threading.Event()
+        release = threading.Event()
+        prefetched = []
+
+        def prefetch(path):
+            prefetched.append(path)
+            if path == "old1.wav":
+                blocked.set()
+                release.wait()
+
+        self.manager.prefetch_audio.side_effect = prefetch
+
+        self.worker.prefetch(["old1.wav", "old2.wav"])
+        blocked.wait()
+        self.worker.prefetch(["new.wav"])
+        release.set()
+        self.worker.wait_idle()
+
+        self.assertEqual(prefetched, ["old1.wav", "new.wav"])
+
+    def test_errors_do_not_stop_the_worker(self):
+        self.manager.play_audio.side_effect = [RuntimeError("mixer not initialized"), None]
+
+        self.worker.play("a.wav")
+        self.worker.play("b.wav")
+        self.worker.wait_idle()
+
+        self.assertEqual(self.manager.play_audio.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
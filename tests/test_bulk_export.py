@@ -0,0 +1,102 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import MagicMock, patch
+from src import extraction
+from src.bulk_export import BulkExport, LAYOUT_FLAT, LAYOUT_PER_PROJECT, SELECT_MARKED
+from src.extraction import ExtractionEngine, DEDUP_SKIP
+from src.hash_cache import HashCache
+from src.dir_cache import directory_cache
+
+
+class TestBulkExport(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.destination = os.path.join(self.test_dir, "export")
+        os.mkdir(self.destination)
+        directory_cache.invalidate()
+
+        self.kick = self.create("kick.wav")
+        self.snare = self.create("snare.wav")
+        self.loop = self.create("loop.mp3")
+
+    def tearDown(self):
+        directory_cache.invalidate()
+        shutil.rmtree(self.test_dir)
+
+    def create(self, name, size=1000):
+        path = os.path.join(self.test_dir, "samples", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return path
+
+    def project(self, file_name, paths, marked=()):
+        samples = [MagicMock(path=path) for path in paths]
+        return MagicMock(file_name=file_name, samples=samples, is_selected=lambda sample: sample.path in marked)
+
+    def test_per_project_layout_reads_shared_samples_once(self):
+        projects = [
+            self.project("song a.flp", [self.kick, self.snare]),
+            self.project("song b.flp", [self.kick, self.loop]),
+        ]
+
+        with patch('src.extraction.copy_file_to_many', wraps=extraction.copy_file_to_many) as mock_copy:
+            result = BulkExport(projects, self.destination).run()
+
+        mock_copy.assert_called_once()
+        self.assertEqual(len(result.succeeded), 4)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.destination, "song a"))), ["kick.wav", "snare.wav"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.destination, "song b"))), ["kick.wav", "loop.mp3"])
+
+    def test_flat_layout_exports_shared_samples_once(self):
+        projects = [
+            self.project("song a.flp", [self.kick, self.snare]),
+            self.project("song b.flp", [self.kick]),
+        ]
+
+        export = BulkExport(projects, self.destination, layout=LAYOUT_FLAT)
+        self.assertEqual(export.plan(), [(self.kick, [self.destination]), (self.snare, [self.destination])])
+
+        export.run()
+        self.assertEqual(sorted(os.listdir(self.destination)), ["kick.wav", "snare.wav"])
+
+    def test_selection_rules(self):
+        projects = [self.project("song.flp", [self.kick, self.snare, self.loop], marked=[self.kick, self.loop])]
+
+        marked = BulkExport(projects, self.destination, selection=SELECT_MARKED).plan()
+        wav_only = BulkExport(projects, self.destination, extensions=("wav",)).plan()
+
+        self.assertEqual([source for source, _ in marked], [self.kick, self.loop])
+        self.assertEqual([source for source, _ in wav_only], [self.kick, self.snare])
+
+    def test_projects_with_the_same_name_get_separate_folders(self):
+        projects = [self.project("song.flp", [self.kick]), self.project("song.flp", [self.snare])]
+
+        targets = BulkExport(projects, self.destination, layout=LAYOUT_PER_PROJECT).plan()
+
+        self.assertEqual(targets, [
+            (self.kick, [os.path.join(self.destination, "song")]),
+            (self.snare, [os.path.join(self.destination, "song (1)")]),
+        ])
+
+    def test_dedup_applies_per_project_folder(self):
+        os.mkdir(os.path.join(self.destination, "song a"))
+        shutil.copyfile(self.kick, os.path.join(self.destination, "song a", "old kick.wav"))
+        projects = [self.project("song a.flp", [self.kick]), self.project("song b.flp", [self.kick])]
+
+        hash_cache = HashCache(os.path.join(self.test_dir, "hashes.sqlite3"))
+        try:
+            result = BulkExport(projects, self.destination).run(engine=ExtractionEngine(dedup=DEDUP_SKIP, hash_cache=hash_cache))
+        finally:
+            hash_cache.close()
+
+        self.assertEqual(len(result.duplicates), 1)
+        self.assertEqual(os.listdir(os.path.join(self.destination, "song a")), ["old kick.wav"])
+        self.assertEqual(os.listdir(os.path.join(self.destination, "song b")), ["kick.wav"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import io
+import os
+import json
+import sys
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.cli import main, EXIT_OK, EXIT_ERRORS, EXIT_USAGE
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.kick = self.touch(os.path.join("samples", "kick.wav"), b"kick")
+        self.loop = self.touch(os.path.join("samples", "loop.mp3"), b"loop")
+        self.gone = os.path.join(self.test_dir, "samples", "gone.wav")
+
+        # no FLP header, the paths are found by the byte scan
+        self.touch(os.path.join("projects", "a.flp"), f"\x00{self.kick}\x00{self.gone}\x00".encode())
+        self.touch(os.path.join("projects", "nested", "b.flp"), f"\x00{self.kick}\x00{self.loop}\x00".encode())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def touch(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def run_cli(self, *args):
+        stdout = io.StringIO()
+        with patch.object(sys, 'stdout', stdout), patch.object(sys, 'stderr', io.StringIO()):
+            exit_code = main(list(args) + ["--no-cache"])
+        return exit_code, stdout.getvalue()
+
+    def test_scan_outputs_one_ndjson_record_per_project(self):
+        exit_code, output = self.run_cli("scan", os.path.join(self.test_dir, "projects"), "--workers", "2")
+
+        # records are written in the order the projects finish parsing
+        records = sorted((json.loads(line) for line in output.splitlines()), key=lambda r: r["project"])
+        self.assertEqual(exit_code, EXIT_OK)
+        self.assertEqual([os.path.basename(r["project"]) for r in records], ["a.flp", "b.flp"])
+        self.assertEqual(records[0]["samples"], [self.kick])
+        self.assertEqual(records[0]["missing"], [self.gone])
+        self.assertEqual(records[1]["samples"], [self.kick, self.loop])
+
+    def test_scan_json_with_extension_filter(self):
+        exit_code, output = self.run_cli("scan", os.path.join(self.test_dir, "projects"), "--format", "json", "--extensions", "mp3")
+
+        records = sorted(json.loads(output), key=lambda r: r["project"])
+        self.assertEqual([r["samples"] for r in records], [[], [self.loop]])
+
+    def test_unreadable_project_is_reported(self):
+        with patch('src.flp_file.read_sample_paths', side_effect=lambda path, extensions: None if path.endswith("a.flp") else [self.kick]):
+            exit_code, output = self.run_cli("scan", os.path.join(self.test_dir, "projects"))
+
+        records = sorted((json.loads(line) for line in output.splitlines()), key=lambda r: r["project"])
+        self.assertEqual(exit_code, EXIT_ERRORS)
+        self.assertEqual([r["error"] for r in records], ["project could not be read", None])
+
+    def test_extract_flat(self):
+        destination = os.path.join(self.test_dir, "export")
+
+        exit_code, output = self.run_cli("extract", os.path.join(self.test_dir, "projects"), "--destination", destination, "--layout", "flat")
+
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(exit_code, EXIT_OK)
+        self.assertEqual(sorted(os.listdir(destination)), ["kick.wav", "loop.mp3"])
+        self.assertEqual([r["source"] for r in records], [self.kick, self.loop])
+        self.assertTrue(all(r["error"] is None for r in records))
+
+    def test_extract_failure_sets_exit_code(self):
+        destination = os.path.join(self.test_dir, "export")
+
+        with patch('src.extraction.copy_file', side_effect=OSError("disk full")):
+            exit_code, output = self.run_cli("extract", os.path.join(self.test_dir, "projects"), "--destination", destination)
+
+        self.assertEqual(exit_code, EXIT_ERRORS)
+        self.assertIn("disk full", output)
+
+    def test_no_projects_found(self):
+        exit_code, output = self.run_cli("scan", os.path.join(self.test_dir, "samples"))
+
+        self.assertEqual(exit_code, EXIT_USAGE)
+        self.assertEqual(output, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.dir_cache import DirectoryCache
+
+
+class TestDirectoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ("kick.wav", "snare.wav"):
+            open(os.path.join(self.test_dir, name), 'wb').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def test_lists_each_folder_once(self):
+        cache = DirectoryCache(ttl=60)
+
+        with patch('src.dir_cache.os.scandir', wraps=os.scandir) as mock_scandir:
+            result = cache.filter_existing([self.path("kick.wav"), self.path("snare.wav"), self.path("hat.wav")])
+
+        self.assertEqual(result, [self.path("kick.wav"), self.path("snare.wav")])
+        mock_scandir.assert_called_once()
+
+    def test_listing_is_trusted_within_ttl(self):
+        cache = DirectoryCache(ttl=60)
+        self.assertTrue(cache.exists(self.path("kick.wav")))
+
+        os.remove(self.path("kick.wav"))
+        self.assertTrue(cache.exists(self.path("kick.wav")))
+
+        cache.invalidate(self.test_dir)
+        self.assertFalse(cache.exists(self.path("kick.wav")))
+
+    def test_changed_folder_is_listed_again_after_ttl(self):
+        cache = DirectoryCache(ttl=0)
+        self.assertFalse(cache.exists(self.path("hat.wav")))
+
+        with patch('src.dir_cache.os.scandir', wraps=os.scandir) as mock_scandir:
+            self.assertTrue(cache.exists(self.path("kick.wav")))
+            mock_scandir.assert_not_called()
+
+            open(self.path("hat.wav"), 'wb').close()
+            stat = os.stat(self.test_dir)
+            os.utime(self.test_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            self.assertTrue(cache.exists(self.path("hat.wav")))
+            mock_scandir.assert_called_once()
+
+    def test_missing_folder(self):
+        cache = DirectoryCache()
+        self.assertFalse(cache.exists(self.path(os.path.join("missing", "kick.wav"))))
+
+    @patch('os.path.exists', return_value=True)
+    def test_paths_without_folder_fall_back_to_exists(self, mock_exists):
+        cache = DirectoryCache()
+        self.assertTrue(cache.exists("kick.wav"))
+        mock_exists.assert_called_once_with("kick.wav")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+from src.extraction import ExtractionEngine, DEDUP_SKIP, DEDUP_LINK
+from src.hash_cache import HashCache
+
+
+class TestExtractionEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.destination = os.path.join(self.test_dir, "export")
+        os.mkdir(self.destination)
+
+    def tearDown(self):
+        if hasattr(self, "hash_cache"):
+            self.hash_cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def dedup_engine(self, mode, max_workers=4):
+        self.hash_cache = HashCache(os.path.join(self.test_dir, "hashes.sqlite3"))
+        return ExtractionEngine(max_workers=max_workers, dedup=mode, hash_cache=self.hash_cache)
+
+    def create(self, folder, name, size):
+        path = os.path.join(self.test_dir, folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_same_names_from_many_folders_get_unique_destinations(self):
+        sources = [self.create(f"kit{i}", "kick.wav", 1000 + i) for i in range(16)]
+
+        result = ExtractionEngine(max_workers=8).extract(sources, self.destination)
+
+        destinations = [f.destination_path for f in result.files]
+        self.assertEqual(len(set(destinations)), 16)
+        self.assertEqual(sorted(os.listdir(self.destination)), sorted(["kick.wav"] + [f"kick ({i}).wav" for i in range(1, 16)]))
+        for f in result.files:
+            self.assertTrue(f.success)
+            self.assertEqual(os.path.getsize(f.destination_path), os.path.getsize(f.source_path))
+
+    def test_progress_is_based_on_bytes(self):
+        sources = [self.create("kit", "big.wav", 300000), self.create("kit", "small.wav", 100)]
+        progress = []
+
+        ExtractionEngine(max_workers=1).extract(sources, self.destination, callback=progress.append)
+
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+        self.assertGreater(min(p for p in progress if p > 0), 0.9)  # the big file dominates the progress
+
+    def test_progress_of_a_large_file_is_reported_while_it_copies(self):
+        sources = [self.create("kit", "stem.wav", 3 * 1024 * 1024 + 1000)]
+        progress = []
+
+        ExtractionEngine(max_workers=1).extract(sources, self.destination, callback=progress.append)
+
+        # one update per copied chunk of 1 MiB, not a single jump from 0.0 to 1.0
+        self.assertGreaterEqual(len([p for p in progress if 0.0 < p < 1.0]), 3)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+
+    def test_failures_are_reported_per_file(self):
+        sources = [self.create("kit", "ok.wav", 10), os.path.join(self.test_dir, "missing.wav")]
+        progress = []
+
+        result = ExtractionEngine(max_workers=2).extract(sources, self.destination, callback=progress.append)
+
+        self.assertEqual([f.source_path for f in result.succeeded], sources[:1])
+        self.assertEqual([f.source_path for f in result.failed], sources[1:])
+        self.assertIsInstance(result.failed[0].error, OSError)
+        self.assertEqual(result.total_bytes, 10)
+        self.assertGreaterEqual(result.files[0].duration, 0)
+        self.assertEqual(progress[-1], 1.0)
+        self.assertEqual(os.listdir(self.destination), ["ok.wav"])  # no empty file for the failed copy
+
+    def test_progress_ends_at_one_when_nothing_is_copied(self):
+        kick = self.create("kit", "kick.wav", 5000)
+        shutil.copyfile(kick, os.path.join(self.destination, "old kick.wav"))
+        empty = self.create("kit", "empty.wav", 0)
+
+        for sources in ([], [empty], [kick]):
+            with self.subTest(sources=sources):
+                progress = []
+                self.dedup_engine(DEDUP_SKIP).extract(sources, self.destination, callback=progress.append)
+                self.assertEqual(progress[-1], 1.0)
+                self.assertEqual(progress.count(1.0), 1)
+
+    def test_skip_duplicates_already_in_destination(self):
+        kick = self.create("kit", "kick.wav", 5000)
+        shutil.copyfile(kick, os.path.join(self.destination, "old kick.wav"))
+        snare = self.create("kit", "snare.wav", 5000)  # same size, different content
+
+        result = self.dedup_engine(DEDUP_SKIP).extract([kick, snare], self.destination)
+
+        self.assertEqual(sorted(os.listdir(self.destination)), ["old kick.wav", "snare.wav"])
+        self.assertEqual(result.files[0].duplicate_of, os.path.join(self.destination, "old kick.wav"))
+        self.assertIsNone(result.files[1].duplicate_of)
+        self.assertEqual(len(result.duplicates), 1)
+
+    def test_identical_sources_of_one_job_are_written_once(self):
+        data_path = self.create("kit0", "kick.wav", 20000)
+        sources = [data_path] + [os.path.join(self.test_dir, f"kit{i}", "kick.wav") for i in range(1, 8)]
+        for path in sources[1:]:
+            os.makedirs(os.path.dirname(path))
+            shutil.copyfile(data_path, path)
+
+        result = self.dedup_engine(DEDUP_SKIP, max_workers=8).extract(sources, self.destination)
+
+        self.assertEqual(os.listdir(self.destination), ["kick.wav"])
+        self.assertEqual(len(result.duplicates), 7)
+        self.assertTrue(all(f.success for f in result.files))
+
+    def test_link_duplicates(self):
+        kick = self.create("kit", "kick.wav", 5000)
+        existing = os.path.join(self.destination, "kick.wav")
+        shutil.copyfile(kick, existing)
+
+        result = self.dedup_engine(DEDUP_LINK).extract([kick], self.destination)
+
+        linked = os.path.join(self.destination, "kick (1).wav")
+        self.assertEqual(result.files[0].destination_path, linked)
+        self.assertTrue(os.path.samefile(linked, existing))
+
+    def test_targets_sharing_folders_in_different_orders_do_not_deadlock(self):
+        # equal sizes, so every source is compared with the files the other workers are writing
+        sources = [self.create("kit", f"s{i}.wav", 50000) for i in range(16)]
+        folders = [os.path.join(self.destination, name) for name in ("a", "b", "c")]
+        for folder in folders:
+            os.mkdir(folder)
+
+        targets = [(source, folders if i % 2 else folders[::-1]) for i, source in enumerate(sources)]
+        engine = self.dedup_engine(DEDUP_SKIP, max_workers=8)
+        results = []
+
+        worker = threading.Thread(target=lambda: results.append(engine.extract_many(targets)), daemon=True)
+        worker.start()
+        worker.join(timeout=30)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(results[0].files), 48)
+        self.assertTrue(all(f.success and f.duplicate_of is None for f in results[0].files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,129 +1,209 @@
 import unittest
 import os
 from unittest.mock import mock_open, patch
-from src.file_utils import convert_binary_file_to_text
-from src.file_utils import get_existing_unique_paths
-from src.file_utils import get_unique_destination_path
-
-
-class TestConvertBinaryFileToText(unittest.TestCase):
-
-    @patch('builtins.open', new_callable=mock_open, read_data=b'\x00\x01\x02This is some text\x00with binary\x10data\x00')
-    def test_realistic_binary(self, mock_file):
-        file_path = 'dummy.bin'
-        expected_text = '\x01\x02This is some textwith binary\x10data'
-        result = convert_binary_file_to_text(file_path)
-        self.assertEqual(result, expected_text)
-
-    @patch('builtins.open', side_effect=Exception("File not found"))
-    def test_error_handling(self, mock_file):
-        file_path = 'not_exist.bin'
-        expected_text = ''
-        result = convert_binary_file_to_text(file_path)
-        self.assertEqual(result, expected_text)
-
-
-class TestGetExistingUniquePaths(unittest.TestCase):
-
-    @patch('os.path.exists')
-    def test_with_noise_and_various_paths(self, mock_exists):
-        text = (
-            "\x01\x02Some random text\x00\x01"
-            "C:\\Music\\song1.mp3\x00\x01\x02"
-            "random\x01junk\x02between\x00paths\x01"
-            "/home/user/music/song2.wav\x01\x00\x02"
-            "more\x01noise\x02"
-            "C:\\Music\\song1.mp3"
-            "/Users/test/music/song3.ogg"
-            "/Users/test/m\x02usic/song3.ogg"
-            "E:\\{Music\\_song2, 3.wav"
-            "\x00\x01end of text\x02"
+from src.file_utils import read_sample_paths
+from src.file_utils import scan_sample_paths
+from src.file_utils import scan_file_sample_paths
+from src.file_utils import copy_file
+from src.file_utils import copy_file_to_many
+import errno
+import random
+import shutil
+import tempfile
+from src.flp_parser import FLPParseError
+
+
+class TestReadSamplePaths(unittest.TestCase):
+
+    @patch('src.file_utils.parse_sample_paths', return_value=["C:\\a.wav", "/b.ogg"])
+    def test_uses_event_parser(self, mock_parse):
+        self.assertEqual(read_sample_paths("x.flp"), ["C:\\a.wav", "/b.ogg"])
+
+    @patch('src.file_utils.parse_sample_paths', side_effect=FLPParseError("Missing FLhd header"))
+    def test_falls_back_to_byte_scan(self, mock_parse):
+        with patch('builtins.open', mock_open(read_data=b"junk/home/a.wav\x00C:\\b.ogg\x00/home/a.wav")):
+            self.assertEqual(read_sample_paths("x.flp"), ["/home/a.wav", "C:\\b.ogg"])
+
+    @patch('src.file_utils.parse_sample_paths', return_value=["C:\\a.wav", "C:\\b.FLAC", "C:\\c.sf2"])
+    def test_filters_parsed_paths_by_extension(self, mock_parse):
+        self.assertEqual(read_sample_paths("x.flp"), ["C:\\a.wav"])
+        self.assertEqual(read_sample_paths("x.flp", ("wav", "flac")), ["C:\\a.wav", "C:\\b.FLAC"])
+
+    @patch('src.file_utils.parse_sample_paths', side_effect=OSError("File not found"))
+    def test_error_handling(self, mock_parse):
+        self.assertIsNone(read_sample_paths("missing.flp"))
+
+
+class TestScanSamplePaths(unittest.TestCase):
+
+    def test_8bit_paths_of_all_platforms(self):
+        data = (
+            b"\x01\x02junk\x00C:\\Music\\song1.mp3\x00"
+            b"\x05\\\\server\\share\\snare.wav\x00"
+            b"\x10/home/user/My Samples/hat.ogg\x00"
+            b"/C:\\Music\\song1.mp3\x00"
         )
-        existing = {
+        self.assertEqual(scan_sample_paths(data), [
             "C:\\Music\\song1.mp3",
+            "\\\\server\\share\\snare.wav",
+            "/home/user/My Samples/hat.ogg",
+        ])
+
+    def test_utf16_paths(self):
+        data = (
+            b"\x00\x07" + "C:\\Proben\\Kick ü.wav".encode('utf-16-le') + b"\x00\x00\x13"
+            + "/Users/test/ファイル.ogg".encode('utf-16-le') + b"\x00\x00"
+        )
+        self.assertEqual(scan_sample_paths(data), ["C:\\Proben\\Kick ü.wav", "/Users/test/ファイル.ogg"])
+
+    def test_utf16_paths_after_odd_length_8bit_text(self):
+        # the 8-bit text in front puts the UTF-16 path on an odd offset, it must not take its first code unit
+        for prefix in (b"abcdefghi", b"abcdefg", b"\x01abcdefgh"):
+            for path in ("C:\\Samples\\kick.wav", "/home/u/kick.wav", "\\\\server\\share\\snare.wav"):
+                with self.subTest(prefix=prefix, path=path):
+                    self.assertEqual(scan_sample_paths(prefix + path.encode('utf-16-le') + b"\x00\x00"), [path])
+
+    def test_lazy_match_up_to_first_extension(self):
+        data = b"C:\\Music\\song1.mp3/Users/test/song3.oggE:\\{Music\\_song2, 3.wav"
+        self.assertEqual(scan_sample_paths(data), [
+            "C:\\Music\\song1.mp3",
+            "/Users/test/song3.ogg",
             "E:\\{Music\\_song2, 3.wav",
-            #"/home/user/music/song2.wav",
-            #"/Users/test/music/song3.ogg"
-        }
-        mock_exists.side_effect = lambda p: p in existing
-
-        result = get_existing_unique_paths(text)
-        expected = list(existing)
-        self.assertCountEqual(result, expected)
-
-    @patch('os.path.exists')
-    def test_empty_text(self, mock_exists):
-        text = ""
-        result = get_existing_unique_paths(text)
-        self.assertEqual(result, [])
-
-    @patch('os.path.exists')
-    def test_no_valid_paths(self, mock_exists):
-        text = "This is just some random text without any valid paths."
-        result = get_existing_unique_paths(text)
-        self.assertEqual(result, [])
-
-
-class TestGetUniqueDestinationPath(unittest.TestCase):
-
-    @patch('os.path.exists')
-    def test_path_without_conflict(self, mock_exists):
-        folder = "C:\\Users\\test\\output"
-        filename = "song.mp3"
-
-        mock_exists.return_value = False
-
-        result = get_unique_destination_path(folder, filename)
-        expected = os.path.join(folder, filename)
-        self.assertEqual(result, expected)
-
-    @patch('os.path.exists')
-    def test_windows_path_conflict(self, mock_exists):
-        folder = "C:\\Users\\test\\output"
-        filename = "song.mp3"
-
-        existing_files = {
-            os.path.join(folder, "song.mp3"),
-            os.path.join(folder, "song (1).mp3"),
-        }
-
-        mock_exists.side_effect = lambda p: p in existing_files
-
-        result = get_unique_destination_path(folder, filename)
-        expected = os.path.join(folder, "song (2).mp3")
-        self.assertEqual(result, expected)
-
-    @patch('os.path.exists')
-    def test_unix_path_conflict(self, mock_exists):
-        folder = "/Users/test/output"
-        filename = "song.mp3"
-
-        existing_files = {
-            os.path.join(folder, "song.mp3"),
-            os.path.join(folder, "song (1).mp3"),
-        }
-
-        mock_exists.side_effect = lambda p: p in existing_files
-
-        result = get_unique_destination_path(folder, filename)
-        expected = os.path.join(folder, "song (2).mp3")
-        self.assertEqual(result, expected)
-
-    @patch('os.path.exists')
-    def test_multiple_dots_in_filename(self, mock_exists):
-        folder = "C:\\Output"
-        filename = "my.file.name.txt"
-
-        existing_files = {
-            os.path.join(folder, "my.file.name.txt"),
-            os.path.join(folder, "my.file.name (1).txt"),
-        }
-
-        mock_exists.side_effect = lambda p: p in existing_files
-
-        result = get_unique_destination_path(folder, filename)
-        expected = os.path.join(folder, "my.file.name (2).txt")
-        self.assertEqual(result, expected)
+        ])
+
+    def test_configurable_extensions(self):
+        data = b"C:\\a.flac\x00C:\\b.AIF\x00C:\\c.wav\x00"
+        self.assertEqual(scan_sample_paths(data), ["C:\\c.wav"])
+        self.assertEqual(scan_sample_paths(data, ("flac", "aif")), ["C:\\a.flac", "C:\\b.AIF"])
+
+    def test_pathological_input_is_linear(self):
+        # every byte is a possible path start but no extension follows, a backtracking pattern would not finish
+        self.assertEqual(scan_sample_paths(b"/" * 500000 + b"x.wa"), [])
+        self.assertEqual(scan_sample_paths("/".encode('utf-16-le') * 500000), [])
+        self.assertEqual(len(scan_sample_paths(b"/a.wav" * 100000)), 1)
+
+    def test_no_paths(self):
+        self.assertEqual(scan_sample_paths(b""), [])
+        self.assertEqual(scan_sample_paths(bytes(range(256)) * 10), [])
+
+
+class TestScanFileSamplePaths(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.test_dir, "project.flp")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, data):
+        with open(self.file_path, 'wb') as f:
+            f.write(data)
+
+    def test_finds_all_paths_across_chunk_boundaries(self):
+        # junk of any length (also odd, so half of the UTF-16 paths start on an odd offset) that can
+        # not form a path itself: no path start or extension characters and no null bytes
+        junk_bytes = bytes(b for b in range(1, 256) if b not in b"/\\:.")
+        rng = random.Random(1)
+        parts = []
+        expected = []
+        for i in range(300):
+            parts.append(bytes(rng.choice(junk_bytes) for _ in range(rng.randrange(40))))
+            parts.append((b"", b"\x00", b"\x00\x00")[i % 3])
+            path = f"C:\\Samples\\Kit {i}\\kick {i}.wav"
+            parts.append(path.encode('utf-16-le') if i % 2 else path.encode('latin1'))
+            parts.append(b"\x00\x00")
+            expected.append(path)
+        data = b"".join(parts)
+        self.write(data)
+
+        self.assertEqual(scan_sample_paths(data), expected)
+        for chunk_size in (7, 64, 1000, 1 << 20):
+            self.assertEqual(scan_file_sample_paths(self.file_path, chunk_size=chunk_size), expected)
+
+    def test_utf16_path_on_odd_offset_across_chunk_boundary(self):
+        path = "/home/producer/Samples/kick.wav"
+        self.write(b"\x00\x00abcdefghi" + path.encode('utf-16-le') + b"\x00\x00")
+
+        # the first chunk ends in the middle of the path
+        for chunk_size in (4, 16, 25, 40):
+            self.assertEqual(scan_file_sample_paths(self.file_path, chunk_size=chunk_size), [path])
+
+    def test_file_without_double_null_bytes(self):
+        data = b"\x01".join(b"/home/a%d.wav" % i for i in range(100))
+        self.write(data)
+        self.assertEqual(scan_file_sample_paths(self.file_path, chunk_size=16), ["/home/a%d.wav" % i for i in range(100)])
+
+    def test_empty_file(self):
+        self.write(b"")
+        self.assertEqual(scan_file_sample_paths(self.file_path), [])
+
+
+class TestCopyFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, "stem.wav")
+        self.destination = os.path.join(self.test_dir, "copy.wav")
+        self.data = os.urandom(300000)
+        with open(self.source, 'wb') as f:
+            f.write(self.data)
+        os.utime(self.source, ns=(1_000_000_000, 2_000_000_000))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def assert_copied(self):
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(os.stat(self.destination).st_mtime_ns, 2_000_000_000)
+
+    def test_copies_data_and_metadata(self):
+        progress = []
+        copied = copy_file(self.source, self.destination, callback=progress.append, chunk_size=65536)
+
+        self.assertEqual(copied, len(self.data))
+        self.assertEqual(sum(progress), len(self.data))
+        self.assertTrue(all(chunk <= 65536 for chunk in progress))
+        self.assert_copied()
+
+    def test_falls_back_to_chunked_copy(self):
+        unsupported = OSError(errno.EXDEV, "Invalid cross-device link")
+
+        with patch('os.copy_file_range', side_effect=unsupported, create=True), \
+             patch('os.sendfile', side_effect=OSError(errno.ENOTSOCK, "not a socket"), create=True):
+            progress = []
+            copied = copy_file(self.source, self.destination, callback=progress.append, chunk_size=65536)
+
+        self.assertEqual(copied, len(self.data))
+        self.assertEqual(len(progress), 5)
+        self.assert_copied()
+
+    def test_metadata_errors_do_not_fail_the_copy(self):
+        with patch('src.file_utils.shutil.copystat', side_effect=OSError(errno.EPERM, "Operation not permitted")):
+            copied = copy_file(self.source, self.destination)
+
+        self.assertEqual(copied, len(self.data))
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_error_in_the_middle_of_a_kernel_copy_is_raised(self):
+        with patch('os.copy_file_range', side_effect=[4096, OSError(errno.EIO, "I/O error")], create=True):
+            with self.assertRaises(OSError):
+                copy_file(self.source, self.destination)
+
+    def test_copy_to_many_reads_source_once(self):
+        destinations = [os.path.join(self.test_dir, f"copy{i}.wav") for i in range(3)]
+        progress = []
+
+        with patch('builtins.open', wraps=open) as mock_open_file:
+            copied = copy_file_to_many(self.source, destinations, callback=progress.append, chunk_size=65536)
+
+        self.assertEqual(copied, len(self.data))
+        self.assertEqual(sum(progress), len(self.data))
+        self.assertEqual([c.args[1] for c in mock_open_file.call_args_list].count('rb'), 1)
+        for self.destination in destinations:
+            self.assert_copied()
 
 
 if __name__ == '__main__':
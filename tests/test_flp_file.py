@@ -1,30 +1,37 @@
 import unittest
-from unittest.mock import patch, MagicMock, mock_open, call
+import os
+import shutil
+import tempfile
+from unittest.mock import patch, MagicMock, mock_open, call, ANY
 from src.flp_file import FLPFile
+from src.file_utils import SAMPLE_EXTENSIONS
+from src.dir_cache import directory_cache
+from src.sample_registry import SampleRegistry
+from src.audio_probe import AudioInfo
 
 
 class TestFLPFile(unittest.TestCase):
 
     @patch('src.flp_file.Sample')
-    @patch('src.flp_file.get_existing_unique_paths', return_value=["/some/path/sample1.wav", "/some/path/sample2.wav"])
-    @patch('src.flp_file.convert_binary_file_to_text', return_value="dummy text")
-    def test_init_populates_fields_correctly(self, mock_convert, mock_get_paths, mock_sample):
+    @patch('src.flp_file.filter_existing_paths', return_value=["/some/path/sample1.wav", "/some/path/sample2.wav"])
+    @patch('src.flp_file.read_sample_paths', return_value=["/some/path/sample1.wav", "/some/path/sample2.wav", "/gone.wav"])
+    def test_init_populates_fields_correctly(self, mock_read, mock_filter, mock_sample):
+        mock_sample.side_effect = lambda path: MagicMock(path=path)
         flp = FLPFile("test.flp")
 
-        mock_convert.assert_called_once_with("test.flp")
-        mock_get_paths.assert_called_once_with("dummy text")
+        mock_read.assert_called_once_with("test.flp", SAMPLE_EXTENSIONS)
+        mock_filter.assert_called_once_with(["/some/path/sample1.wav", "/some/path/sample2.wav", "/gone.wav"])
         self.assertEqual(flp.file_path, "test.flp")
         self.assertEqual(flp.file_name, "test.flp")
-        self.assertEqual(flp.text, "dummy text")
         self.assertEqual(flp.existing_unique_paths, ["/some/path/sample1.wav", "/some/path/sample2.wav"])
         self.assertEqual(len(flp.samples), 2)
         mock_sample.assert_any_call("/some/path/sample1.wav")
         mock_sample.assert_any_call("/some/path/sample2.wav")
 
     @patch('src.flp_file.Sample')
-    @patch('src.flp_file.get_existing_unique_paths', return_value=["path1", "path2"])
-    @patch('src.flp_file.convert_binary_file_to_text', side_effect=["original text", "refreshed text"])
-    def test_refresh_paths(self, mock_convert, mock_get_paths, mock_sample):
+    @patch('src.flp_file.filter_existing_paths', side_effect=lambda paths: paths)
+    @patch('src.flp_file.read_sample_paths', side_effect=[["path1", "path2"], ["path1", "path2"]])
+    def test_refresh_paths(self, mock_read, mock_filter, mock_sample):
 
         s1 = MagicMock(path="path1")
         s2 = MagicMock(path="obsolete_path")
@@ -35,63 +42,201 @@ class TestFLPFile(unittest.TestCase):
 
         flp.refresh_paths()
 
-        self.assertEqual(flp.text, "refreshed text")
+        self.assertEqual(mock_read.call_count, 2)
         self.assertEqual(set(s.path for s in flp.samples), {"path1", "path2"})
 
-    @patch('src.flp_file.open', new_callable=mock_open, read_data=b"data")
-    @patch('src.flp_file.get_unique_destination_path')
+    @patch('src.flp_file.read_sample_paths', return_value=[])
+    def test_toggle_extract_switches_selection(self, mock_paths):
+        flp = FLPFile("dummy.flp")
+        sample = MagicMock(path="test.wav")
+        self.assertFalse(flp.is_selected(sample))
+
+        flp.toggle_extract(sample)  # selected
+        self.assertTrue(flp.is_selected(sample))
+
+        flp.toggle_extract(sample)  # not selected
+        self.assertFalse(flp.is_selected(sample))
+
+    @patch('src.extraction.copy_file', return_value=4)
+    @patch('src.extraction.NameAllocator')
     @patch('os.path.exists', return_value=True)
-    @patch('src.flp_file.convert_binary_file_to_text', return_value="")
-    @patch('src.flp_file.get_existing_unique_paths', return_value=[])
+    @patch('src.flp_file.read_sample_paths', return_value=[])
     def test_extract_samples_with_callback_and_successful_copy(
-        self, mock_paths, mock_text, mock_exists, mock_get_dest, mock_file):
+        self, mock_paths, mock_exists, mock_allocator, mock_file):
 
-        mock_get_dest.side_effect = lambda folder, name: f"{folder}/{name}"
-        sample1 = MagicMock(path="sample1.wav", file_name="sample1.wav", extract=True)
-        sample2 = MagicMock(path="sample2.wav", file_name="sample2.wav", extract=True)
+        mock_allocator.side_effect = lambda folder: MagicMock(claim=lambda name: f"{folder}/{name}")
+        sample1 = MagicMock(path="sample1.wav", file_name="sample1.wav")
+        sample2 = MagicMock(path="sample2.wav", file_name="sample2.wav")
 
         flp = FLPFile("dummy.flp")
         flp.samples = [sample1, sample2]
+        flp.selected = {"sample1.wav", "sample2.wav"}
 
         callback = MagicMock()
 
         flp.extract_samples("dest_folder", callback)
 
-        # filters for progress calls which are float values
-        progress_calls = [c for c in callback.mock_calls if c.args and isinstance(c.args[0], float)]
-        self.assertEqual(callback.call_count, 2)
-
-        expected_calls = [
-            call("sample1.wav", 'rb'),
-            call().__enter__().read(),
-            call("dest_folder/sample1.wav", 'wb'),
-            call().__enter__().write(b"data"),
-        ]
-        mock_file.assert_any_call("sample1.wav", 'rb')
-        mock_file.assert_any_call("dest_folder/sample1.wav", 'wb')
-
-    @patch('src.flp_file.open', new_callable=mock_open, read_data=b"data")
-    @patch('src.flp_file.get_unique_destination_path')
+        # one float progress value per copied sample, increasing up to 1.0
+        progress = [c.args[0] for c in callback.call_args_list]
+        self.assertTrue(all(isinstance(p, float) for p in progress))
+        self.assertEqual(progress, [0.5, 1.0])
+
+        mock_file.assert_has_calls([
+            call("sample1.wav", "dest_folder/sample1.wav", callback=ANY),
+            call("sample2.wav", "dest_folder/sample2.wav", callback=ANY),
+        ], any_order=True)
+
+    @patch('src.extraction.copy_file', return_value=4)
+    @patch('src.extraction.NameAllocator')
     @patch('os.path.exists')
-    @patch('src.flp_file.convert_binary_file_to_text', return_value="")
-    @patch('src.flp_file.get_existing_unique_paths', return_value=[])
+    @patch('src.flp_file.read_sample_paths', return_value=[])
     def test_extract_samples_skips_non_extract_or_missing_paths(
-        self, mock_paths, mock_text, mock_exists, mock_get_dest, mock_file):
+        self, mock_paths, mock_exists, mock_allocator, mock_file):
 
         mock_exists.side_effect = lambda path: path == "sample1.wav"
 
-        sample1 = MagicMock(path="sample1.wav", file_name="sample1.wav", extract=True)
-        sample2 = MagicMock(path="sample2.wav", file_name="sample2.wav", extract=False)  # extract == False
-        sample3 = MagicMock(path="missing.wav", file_name="missing.wav", extract=True)   # doesn't exist
+        sample1 = MagicMock(path="sample1.wav", file_name="sample1.wav")
+        sample2 = MagicMock(path="sample2.wav", file_name="sample2.wav")  # not selected
+        sample3 = MagicMock(path="missing.wav", file_name="missing.wav")  # doesn't exist
 
         flp = FLPFile("dummy.flp")
         flp.samples = [sample1, sample2, sample3]
+        flp.selected = {"sample1.wav", "missing.wav"}
 
         flp.extract_samples("folder")
 
-        mock_get_dest.assert_called_once_with("folder", "sample1.wav")
-        self.assertEqual(mock_file.call_count, 2)  # one for reading, one for writing
+        mock_allocator.assert_called_once_with("folder")
+        mock_allocator.return_value.claim.assert_called_once_with("sample1.wav")
+        mock_file.assert_called_once()
+
+
+class TestFLPFileIncrementalRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.flp_path = self.touch("project.flp")
+        self.kit_a = [self.touch(os.path.join("kit_a", f"a{i}.wav")) for i in range(3)]
+        self.kit_b = [self.touch(os.path.join("kit_b", f"b{i}.wav")) for i in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def touch(self, name):
+        path = os.path.join(self.test_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b"data")
+        return path
+
+    def bump_mtime(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_unchanged_file_is_not_read_again(self):
+        with patch('src.flp_file.read_sample_paths', return_value=self.kit_a) as mock_read:
+            flp = FLPFile(self.flp_path)
+            flp.refresh_paths()
+            flp.refresh_paths()
+            self.assertEqual(mock_read.call_count, 1)
+
+            self.bump_mtime(self.flp_path)
+            flp.refresh_paths()
+            self.assertEqual(mock_read.call_count, 2)
+
+    @patch.object(directory_cache, 'ttl', 0)
+    def test_only_changed_folders_are_listed_again(self):
+        with patch('src.flp_file.read_sample_paths', return_value=self.kit_a + self.kit_b):
+            flp = FLPFile(self.flp_path)
+
+        os.remove(self.kit_b[0])
+        self.bump_mtime(os.path.dirname(self.kit_b[0]))
+
+        with patch('src.dir_cache.os.scandir', wraps=os.scandir) as mock_scandir:
+            flp.refresh_paths()
+
+        mock_scandir.assert_called_once_with(os.path.dirname(self.kit_b[0]))
+        self.assertEqual([s.path for s in flp.samples], self.kit_a + self.kit_b[1:])
+
+    def test_missing_samples_are_relocated_through_library(self):
+        library = MagicMock()
+        library.resolve.side_effect = lambda path, size=None: self.kit_b[0] if path.endswith("moved.wav") else None
+
+        with patch('src.flp_file.read_sample_paths', return_value=[self.kit_a[0], "C:\\Old\\moved.wav", "C:\\Old\\gone.wav"]):
+            flp = FLPFile(self.flp_path, library=library)
+
+        self.assertEqual([s.path for s in flp.samples], [self.kit_a[0], self.kit_b[0]])
+
+    @patch.object(directory_cache, 'ttl', 0)
+    def test_known_size_of_a_missing_sample_is_passed_to_library(self):
+        library = MagicMock()
+        library.resolve.return_value = None
+
+        with patch('src.flp_file.read_sample_paths', return_value=self.kit_a):
+            flp = FLPFile(self.flp_path, library=library)
+            flp.samples[0].info = AudioInfo("wav", size=1234)
+
+            os.remove(self.kit_a[0])
+            self.bump_mtime(os.path.dirname(self.kit_a[0]))
+            flp.refresh_paths()
+
+        library.resolve.assert_called_once_with(self.kit_a[0], 1234)
+
+    def test_refresh_keeps_selection_of_existing_samples(self):
+        with patch('src.flp_file.read_sample_paths', side_effect=[self.kit_a, self.kit_b[:1] + self.kit_a]):
+            flp = FLPFile(self.flp_path)
+            selected = flp.samples[1]
+            flp.toggle_extract(selected)
+
+            self.bump_mtime(self.flp_path)
+            flp.refresh_paths()
+
+        self.assertEqual([s.path for s in flp.samples], self.kit_b[:1] + self.kit_a)
+        self.assertIs(flp.samples[2], selected)
+        self.assertTrue(flp.is_selected(flp.samples[2]))
+
+    def test_selection_of_removed_samples_is_dropped(self):
+        with patch('src.flp_file.read_sample_paths', side_effect=[self.kit_a, self.kit_a[1:]]):
+            flp = FLPFile(self.flp_path)
+            flp.toggle_extract(flp.samples[0])
+            flp.toggle_extract(flp.samples[1])
+            flp.toggle_extract(flp.samples[1])
+
+            self.bump_mtime(self.flp_path)
+            flp.refresh_paths()
+
+        self.assertEqual(flp.selected, set())
+
+    def test_selection_is_per_project_for_shared_samples(self):
+        registry = SampleRegistry()
+        other_path = self.touch("other.flp")
+
+        with patch('src.flp_file.read_sample_paths', side_effect=[self.kit_a, self.kit_a]):
+            flp = FLPFile(self.flp_path, registry=registry)
+            other = FLPFile(other_path, registry=registry)
+
+        flp.toggle_extract(flp.samples[0])
+
+        self.assertIs(flp.samples[0], other.samples[0])
+        self.assertTrue(flp.is_selected(flp.samples[0]))
+        self.assertFalse(other.is_selected(other.samples[0]))
+
+    def test_projects_share_samples_through_registry(self):
+        registry = SampleRegistry()
+        other_path = self.touch("other.flp")
+
+        with patch('src.flp_file.read_sample_paths', side_effect=[self.kit_a, self.kit_a[1:] + self.kit_b[:1], self.kit_b[:1]]):
+            flp = FLPFile(self.flp_path, registry=registry)
+            other = FLPFile(other_path, registry=registry)
+
+            self.assertIs(flp.samples[1], other.samples[0])
+            self.assertEqual(registry.projects_using(self.kit_a[2]), [self.flp_path, other_path])
+
+            self.bump_mtime(other_path)
+            other.refresh_paths()
+
+        self.assertEqual(registry.projects_using(self.kit_a[2]), [self.flp_path])
+        self.assertEqual(registry.projects_using(self.kit_b[0]), [other_path])
 
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
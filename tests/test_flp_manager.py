@@ -1,8 +1,10 @@
 import unittest
+import os
+import threading
 import tempfile
 import shutil
 from pathlib import Path
-from src.flp_manager import FLPManager
+from src.flp_manager import FLPManager, EVENT_DISCOVERED, EVENT_PARSED
 from unittest.mock import patch, MagicMock
 from src.flp_file import FLPFile
 
@@ -116,6 +118,47 @@ class TestFLPManagerBasicCases(unittest.TestCase):
         mock2.refresh_paths.assert_called_once()
 
 
+    @patch("src.flp_manager.FLPFile")
+    def test_parallel_loading_keeps_order(self, MockFLPFile):
+        paths = [self.create_flp_file(f"p{i:02}.flp", subfolder="folder") for i in range(20)]
+        folder_path = str(Path(paths[0]).parent)
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+
+        manager = FLPManager(max_workers=4)
+        valid, existing = manager.add_candidates([folder_path, paths[3]])
+
+        self.assertEqual([f.file_path for f in valid], paths)
+        self.assertEqual([f.file_path for f in existing], [paths[3]])
+        self.assertEqual(MockFLPFile.call_count, 20)
+        self.assertEqual(list(manager.flp_objects), paths)
+        valid[3].refresh_paths.assert_called_once()
+
+    @patch("src.flp_manager.FLPFile")
+    def test_folders_are_walked_in_sorted_path_order(self, MockFLPFile):
+        # files and subfolders interleave by name, as with sorted(rglob)
+        for name, subfolder in (("x.flp", "a"), ("c.flp", "a"), ("y.flp", "a/b"), ("z.flp", "a/b/d"), ("m.flp", None)):
+            self.create_flp_file(name, subfolder=subfolder)
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+
+        valid, _ = FLPManager(max_workers=1).add_candidates([self.test_dir])
+
+        expected = [str(p.resolve()) for p in sorted(Path(self.test_dir).rglob('*.flp'))]
+        self.assertEqual([f.file_path for f in valid], expected)
+        self.assertEqual([os.path.basename(f.file_path) for f in valid], ["z.flp", "y.flp", "c.flp", "x.flp", "m.flp"])
+
+    @patch("src.flp_manager.FLPFile")
+    def test_single_worker_loads_in_calling_thread(self, MockFLPFile):
+        paths = [self.create_flp_file(f"p{i}.flp") for i in range(3)]
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+
+        manager = FLPManager(max_workers=1)
+        with patch("src.flp_manager.ThreadPoolExecutor") as MockExecutor:
+            valid, existing = manager.add_candidates(paths)
+
+        MockExecutor.assert_not_called()
+        self.assertEqual([f.file_path for f in valid], paths)
+
+
 class TestFLPManagerExtremeCase(unittest.TestCase):
     def setUp(self):
         # Temporäres Testverzeichnis
@@ -163,7 +206,7 @@ class TestFLPManagerExtremeCase(unittest.TestCase):
     @patch('src.flp_manager.FLPFile')
     def test_mixed_input(self, MockFLPFile):
         # Mock FLPFile object so we can check instances
-        def mock_constructor(path):
+        def mock_constructor(path, **kwargs):
             mock_instance = MagicMock(spec=FLPFile)
             mock_instance.file_path = path
             mock_instance.file_name = Path(path).name
@@ -197,10 +240,128 @@ class TestFLPManagerExtremeCase(unittest.TestCase):
         self.assertEqual(existing_paths, expected_existing)
 
 
+class TestFLPManagerIterCandidates(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(12):
+            path = Path(self.test_dir, f"sub{i % 3}", f"p{i:02}.flp")
+            path.parent.mkdir(exist_ok=True)
+            path.touch()
+            self.paths.append(str(path.resolve()))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    @patch("src.flp_manager.FLPFile")
+    def test_every_project_is_discovered_before_it_is_parsed(self, MockFLPFile):
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+        manager = FLPManager(max_workers=4)
+
+        events = list(manager.iter_candidates([self.test_dir, self.paths[0]]))
+
+        discovered = [e.path for e in events if e.kind == EVENT_DISCOVERED]
+        parsed = [e.path for e in events if e.kind == EVENT_PARSED]
+        self.assertEqual(discovered, sorted(self.paths))
+        self.assertEqual(sorted(parsed), sorted(self.paths))
+        for path in self.paths:
+            kinds = [e.kind for e in events if e.path == path]
+            self.assertEqual(kinds, [EVENT_DISCOVERED, EVENT_PARSED])
+        self.assertEqual(set(manager.flp_objects), set(self.paths))
+
+    @patch("src.flp_manager.FLPFile")
+    def test_loaded_projects_are_refreshed(self, MockFLPFile):
+        manager = FLPManager(max_workers=1)
+        loaded = MagicMock(file_path=self.paths[0])
+        manager.flp_objects[self.paths[0]] = loaded
+
+        events = [e for e in manager.iter_candidates([self.paths[0]]) if e.kind == EVENT_PARSED]
+
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].existing)
+        self.assertIs(events[0].flp, loaded)
+        loaded.refresh_paths.assert_called_once()
+        MockFLPFile.assert_not_called()
+
+    @patch("src.flp_manager.FLPFile")
+    def test_cancel_stops_loading(self, MockFLPFile):
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+        cancel = threading.Event()
+        manager = FLPManager(max_workers=1)
+
+        parsed = []
+        for event in manager.iter_candidates([self.test_dir], cancel=cancel):
+            if event.kind == EVENT_PARSED:
+                parsed.append(event.path)
+                if len(parsed) == 3:
+                    cancel.set()
+
+        self.assertEqual(len(parsed), 3)
+        self.assertEqual(MockFLPFile.call_count, 3)
+        self.assertEqual(list(manager.flp_objects), parsed)
+
+    @patch("src.flp_manager.FLPFile")
+    def test_closing_the_generator_stops_parallel_loading(self, MockFLPFile):
+        MockFLPFile.side_effect = lambda path, **kwargs: MagicMock(file_path=path)
+        manager = FLPManager(max_workers=2)
+
+        events = manager.iter_candidates([self.test_dir])
+        first = next(events)
+        events.close()
+
+        self.assertEqual(first.kind, EVENT_DISCOVERED)
+        self.assertLess(MockFLPFile.call_count, len(self.paths))
+        self.assertEqual(manager.flp_objects, {})
+
+
+class TestFLPManagerSampleRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.samples = {}
+        for name in ("kick", "snare", "hat"):
+            path = Path(self.test_dir, "kit", f"{name}.wav")
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(b"data")
+            self.samples[name] = str(path)
+
+        self.projects = {}
+        for name, samples in (("a", ["kick", "snare"]), ("b", ["kick", "hat"]), ("c", ["kick", "snare"])):
+            path = Path(self.test_dir, "projects", f"{name}.flp")
+            path.parent.mkdir(exist_ok=True)
+            path.touch()
+            self.projects[str(path.resolve())] = [self.samples[sample] for sample in samples]
+
+        patcher = patch("src.flp_file.read_sample_paths", side_effect=lambda path, extensions: self.projects[path])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_projects_share_samples(self):
+        manager = FLPManager(max_workers=2)
+        valid, _ = manager.add_candidates([str(Path(self.test_dir, "projects"))])
+
+        kicks = [flp.samples[0] for flp in valid]
+        self.assertIs(kicks[0], kicks[1])
+        self.assertIs(kicks[0], kicks[2])
+        self.assertEqual(len(manager.registry), 3)
 
+        self.assertEqual(manager.projects_using(self.samples["snare"]), [valid[0], valid[2]])
+        self.assertEqual([(sample.file_name, count) for sample, count in manager.most_used_samples(2)], [("kick.wav", 3), ("snare.wav", 2)])
 
+    def test_remove_project(self):
+        manager = FLPManager(max_workers=1)
+        valid, _ = manager.add_candidates([str(Path(self.test_dir, "projects"))])
 
+        self.assertIs(manager.remove_project(valid[1].file_path), valid[1])
 
+        self.assertNotIn(valid[1].file_path, manager.flp_objects)
+        self.assertNotIn(self.samples["hat"], manager.registry)
+        self.assertEqual(manager.projects_using(self.samples["kick"]), [valid[0], valid[2]])
+        self.assertIsNone(manager.remove_project(valid[1].file_path))
 
 
 if __name__ == '__main__':
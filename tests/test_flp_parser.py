@@ -0,0 +1,120 @@
+import unittest
+import os
+import struct
+import tempfile
+import shutil
+from src.flp_parser import FLPParseError, EVENT_SAMPLE_PATH, EVENT_VERSION
+from src.flp_parser import iter_events, iter_sample_paths, parse_sample_paths
+
+
+def varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def text_event(event_id, payload):
+    return bytes([event_id]) + varint(len(payload)) + payload
+
+
+def build_flp(*events):
+    body = b"".join(events)
+    header = b"FLhd" + struct.pack("<IhHH", 6, 0, 1, 96)
+    return header + b"FLdt" + struct.pack("<I", len(body)) + body
+
+
+def utf16(text):
+    return (text + "\x00").encode("utf-16-le")
+
+
+class TestIterEvents(unittest.TestCase):
+
+    def test_fixed_and_variable_size_events(self):
+        long_payload = b"x" * 200  # needs a two byte varint
+        data = build_flp(
+            bytes([1, 0xAA]),
+            bytes([64]) + b"\x01\x02",
+            bytes([128]) + b"\x01\x02\x03\x04",
+            text_event(208, long_payload),
+        )
+
+        events = [(event_id, end - start) for event_id, start, end in iter_events(data)]
+        self.assertEqual(events, [(1, 1), (64, 2), (128, 4), (208, 200)])
+
+    def test_missing_header_raises(self):
+        with self.assertRaises(FLPParseError):
+            list(iter_events(b"C:\\Music\\kick.wav" * 4))
+
+    def test_truncated_stream_keeps_complete_events(self):
+        data = build_flp(text_event(EVENT_SAMPLE_PATH, utf16("C:\\a.wav")), text_event(EVENT_SAMPLE_PATH, utf16("C:\\b.wav")))
+        events = list(iter_events(data[:-4]))
+        self.assertEqual(len(events), 1)
+
+
+class TestIterSamplePaths(unittest.TestCase):
+
+    def test_utf16_paths_after_version_event(self):
+        data = build_flp(
+            text_event(EVENT_VERSION, b"20.8.4.2553\x00"),
+            bytes([1, 0]),
+            text_event(EVENT_SAMPLE_PATH, utf16("C:\\Samples\\Kick ü.wav")),
+            text_event(EVENT_SAMPLE_PATH, utf16("/Users/test/snare.ogg")),
+            text_event(EVENT_SAMPLE_PATH, utf16("")),
+        )
+        self.assertEqual(list(iter_sample_paths(data)), ["C:\\Samples\\Kick ü.wav", "/Users/test/snare.ogg"])
+
+    def test_ascii_paths_for_old_versions(self):
+        data = build_flp(
+            text_event(EVENT_VERSION, b"9.1.0.0\x00"),
+            text_event(EVENT_SAMPLE_PATH, b"C:\\Old\\hat.wav\x00"),
+        )
+        self.assertEqual(list(iter_sample_paths(data)), ["C:\\Old\\hat.wav"])
+
+    def test_encoding_is_guessed_without_version_event(self):
+        data = build_flp(
+            text_event(EVENT_SAMPLE_PATH, utf16("C:\\x\\clap.mp3")),
+            text_event(EVENT_SAMPLE_PATH, b"C:\\y\\ride.wav\x00"),
+        )
+        self.assertEqual(list(iter_sample_paths(data)), ["C:\\x\\clap.mp3", "C:\\y\\ride.wav"])
+
+    def test_other_text_events_are_ignored(self):
+        data = build_flp(text_event(EVENT_SAMPLE_PATH - 1, utf16("C:\\not\\a_sample.wav")))
+        self.assertEqual(list(iter_sample_paths(data)), [])
+
+
+class TestParseSamplePaths(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_returns_unique_paths_in_order(self):
+        path = self.write("project.flp", build_flp(
+            text_event(EVENT_SAMPLE_PATH, utf16("C:\\b.wav")),
+            text_event(EVENT_SAMPLE_PATH, utf16("C:\\a.wav")),
+            text_event(EVENT_SAMPLE_PATH, utf16("C:\\b.wav")),
+        ))
+        self.assertEqual(parse_sample_paths(path), ["C:\\b.wav", "C:\\a.wav"])
+
+    def test_empty_file_raises(self):
+        path = self.write("empty.flp", b"")
+        with self.assertRaises(FLPParseError):
+            parse_sample_paths(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
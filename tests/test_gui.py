@@ -1,4 +1,8 @@
 import unittest
+import queue
+import shutil
+import tempfile
+import time
 from unittest.mock import patch, MagicMock
 from src.gui import FLPSampleExtractor
 import tkinter as tk
@@ -6,7 +10,10 @@ import tkinter as tk
 class TestFLPSampleExtractor(unittest.TestCase):
     @patch.object(FLPSampleExtractor, 'load_icons')  # blocks load_icons from being called
     def setUp(self, mock_load_icons):
-        self.app = FLPSampleExtractor()
+        # no caches in the user cache folder and no library update thread
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        self.app = FLPSampleExtractor(cache_dir=self.cache_dir, update_library=False)
 
         self.app.destination_area_entry = MagicMock()
         self.app.destination_area_entry.delete = MagicMock()
@@ -32,3 +39,92 @@ class TestFLPSampleExtractor(unittest.TestCase):
         self.app.destination_area_entry.insert.assert_not_called()
         self.assertIsNone(self.app.destination_folder)
 
+
+class TestDrainLoadQueue(unittest.TestCase):
+    # _drain_load_queue only uses a few attributes, so it is tested without creating a window
+
+    def setUp(self):
+        self.app = MagicMock()
+        self.app.load_queue = queue.Queue()
+        self.app.load_state = {"valid": [], "existing": [], "start": time.monotonic()}
+        self.app._add_flp_to_list.return_value = True
+
+    def drain(self):
+        FLPSampleExtractor._drain_load_queue(self.app)
+
+    def test_new_and_existing_projects_are_collected(self):
+        new, old = MagicMock(existing=False), MagicMock(existing=True)
+        self.app.load_queue.put(new)
+        self.app.load_queue.put(old)
+
+        self.drain()
+
+        self.assertEqual(self.app.load_state["valid"], [new.flp])
+        self.assertEqual(self.app.load_state["existing"], [old.flp])
+        self.app._add_flp_to_list.assert_called_once_with(new.flp)
+        self.app.flp_list.set_items.assert_called_once_with(self.app.flp_filter.matches, keep_offset=True)
+        self.assertIn("2 projects", self.app.load_status_label.configure.call_args.kwargs["text"])
+
+        # polls again until the loading thread is done
+        self.app.after.assert_called_once_with(50, self.app._drain_load_queue)
+        self.app._finish_loading.assert_not_called()
+
+    def test_end_marker_finishes_loading(self):
+        self.app.load_queue.put(MagicMock(existing=True))
+        self.app.load_queue.put(None)
+
+        self.drain()
+
+        self.app._finish_loading.assert_called_once()
+        self.app.after.assert_not_called()
+        self.app.flp_list.set_items.assert_not_called()
+
+    def test_batch_is_limited_in_time(self):
+        for _ in range(1000):
+            self.app.load_queue.put(MagicMock(existing=False))
+
+        with patch('src.gui.time.monotonic', side_effect=[0.0] + [0.0] * 10 + [1.0] * 10000):
+            self.drain()
+
+        # the rest is handled by the next call, the window can repaint in between
+        self.assertEqual(len(self.app.load_state["valid"]), 10)
+        self.assertEqual(self.app.load_queue.qsize(), 990)
+        self.app.after.assert_called_once_with(50, self.app._drain_load_queue)
+
+
+class TestProbeResult(unittest.TestCase):
+
+    def setUp(self):
+        self.app = MagicMock()
+        self.flp = MagicMock()
+        self.sample = MagicMock(path="kick.wav", info=None)
+
+    def test_result_of_selected_project_is_applied(self):
+        self.app.active_flp = self.flp
+
+        FLPSampleExtractor._apply_probe_result(self.app, self.flp, [self.sample], {"kick.wav": "info"})
+
+        self.assertEqual(self.sample.info, "info")
+        self.app.show_samples.assert_called_once_with(keep_offset=True)
+
+    def test_result_of_deselected_project_is_dropped(self):
+        self.app.active_flp = MagicMock()
+
+        FLPSampleExtractor._apply_probe_result(self.app, self.flp, [self.sample], {"kick.wav": "info"})
+
+        self.assertIsNone(self.sample.info)
+        self.app.show_samples.assert_not_called()
+
+    def test_selecting_another_project_cancels_the_previous_request(self):
+        previous = MagicMock()
+        self.app.probe_request = previous
+        self.flp.samples = [self.sample]
+
+        FLPSampleExtractor._probe_samples(self.app, self.flp)
+
+        previous.cancel.assert_called_once()
+        self.assertIs(self.app.probe_request, self.app.audio_probe.request.return_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
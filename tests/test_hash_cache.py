@@ -0,0 +1,69 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.hash_cache import HashCache, PARTIAL_HASH_SIZE
+import src.hash_cache
+
+
+class TestHashCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "hashes.sqlite3")
+        self.cache = HashCache(self.db_path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_partial_hash_only_covers_the_start(self):
+        head = os.urandom(PARTIAL_HASH_SIZE)
+        a = self.write("a.wav", head + b"a")
+        b = self.write("b.wav", head + b"b")
+
+        self.assertEqual(self.cache.partial_hash(a), self.cache.partial_hash(b))
+        self.assertNotEqual(self.cache.full_hash(a), self.cache.full_hash(b))
+
+    def test_unchanged_files_are_not_read_again(self):
+        path = self.write("a.wav", b"data")
+        first = self.cache.full_hash(path)
+        self.cache.close()
+
+        self.cache = HashCache(self.db_path)
+        with patch('src.hash_cache._hash_file', wraps=src.hash_cache._hash_file) as mock_hash:
+            self.assertEqual(self.cache.full_hash(path), first)
+            mock_hash.assert_not_called()
+
+            self.write("a.wav", b"other data")
+            self.assertNotEqual(self.cache.full_hash(path), first)
+            mock_hash.assert_called_once()
+
+    def test_missing_file(self):
+        self.assertIsNone(self.cache.full_hash(os.path.join(self.test_dir, "missing.wav")))
+
+    def test_evicts_oldest_entries(self):
+        self.cache.close()
+        self.cache = HashCache(self.db_path, max_entries=10)
+
+        with patch('src.signature_cache.time.time', side_effect=range(100)):
+            paths = [self.write(f"{i}.wav", bytes([i])) for i in range(12)]
+            for path in paths:
+                self.cache.partial_hash(path)
+
+        count = self.cache._connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        self.assertLessEqual(count, 10)
+        remaining = {row[0] for row in self.cache._connection.execute("SELECT path FROM hashes")}
+        self.assertIn(paths[-1], remaining)
+        self.assertNotIn(paths[0], remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
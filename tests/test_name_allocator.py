@@ -0,0 +1,69 @@
+import unittest
+import os
+import tempfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from src.name_allocator import NameAllocator
+
+
+class TestNameAllocator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def touch(self, name):
+        open(os.path.join(self.test_dir, name), 'wb').close()
+
+    def test_free_name_is_used_as_is(self):
+        path = NameAllocator(self.test_dir).claim("kick.wav")
+
+        self.assertEqual(path, os.path.join(self.test_dir, "kick.wav"))
+        self.assertTrue(os.path.exists(path))
+
+    def test_continues_after_highest_existing_suffix(self):
+        for name in ["kick.wav", "kick (1).wav", "kick (7).wav", "snare (9).wav"]:
+            self.touch(name)
+
+        allocator = NameAllocator(self.test_dir)
+
+        self.assertEqual(os.path.basename(allocator.claim("kick.wav")), "kick (8).wav")
+        self.assertEqual(os.path.basename(allocator.claim("kick.wav")), "kick (9).wav")
+        self.assertEqual(os.path.basename(allocator.claim("snare.wav")), "snare.wav")
+        self.assertEqual(os.path.basename(allocator.claim("kick (1).wav")), "kick (1) (1).wav")
+
+    def test_folder_is_listed_once(self):
+        self.touch("kick.wav")
+
+        with patch('src.name_allocator.os.listdir', wraps=os.listdir) as mock_listdir, \
+                patch('os.path.exists') as mock_exists:
+            allocator = NameAllocator(self.test_dir)
+            for _ in range(50):
+                allocator.claim("kick.wav")
+
+        mock_listdir.assert_called_once()
+        mock_exists.assert_not_called()
+        self.assertEqual(len(os.listdir(self.test_dir)), 51)
+
+    def test_names_created_by_other_writers_are_skipped(self):
+        allocator = NameAllocator(self.test_dir)
+        self.touch("kick.wav")
+        self.touch("kick (1).wav")
+
+        self.assertEqual(os.path.basename(allocator.claim("kick.wav")), "kick (2).wav")
+
+    def test_concurrent_allocators_never_share_a_name(self):
+        allocators = [NameAllocator(self.test_dir) for _ in range(4)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            paths = list(executor.map(lambda i: allocators[i % 4].claim("hat.wav"), range(40)))
+
+        self.assertEqual(len(set(paths)), 40)
+        self.assertEqual(len(os.listdir(self.test_dir)), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
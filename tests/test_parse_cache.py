@@ -0,0 +1,117 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.parse_cache import ParseCache
+from src.flp_file import FLPFile
+from src.file_utils import SAMPLE_EXTENSIONS
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "cache.sqlite3")
+        self.cache = ParseCache(self.db_path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_hit_for_unchanged_signature(self):
+        self.cache.put("/p/a.flp", (10, 100), SAMPLE_EXTENSIONS, ["C:\\a.wav", "/b.ogg"])
+
+        self.assertEqual(self.cache.get("/p/a.flp", (10, 100), SAMPLE_EXTENSIONS), ["C:\\a.wav", "/b.ogg"])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_miss_for_changed_file_or_extensions(self):
+        self.cache.put("/p/a.flp", (10, 100), SAMPLE_EXTENSIONS, ["C:\\a.wav"])
+
+        self.assertIsNone(self.cache.get("/p/a.flp", (10, 101), SAMPLE_EXTENSIONS))
+        self.assertIsNone(self.cache.get("/p/a.flp", (11, 100), SAMPLE_EXTENSIONS))
+        self.assertIsNone(self.cache.get("/p/a.flp", (10, 100), ("wav", "flac")))
+        self.assertIsNone(self.cache.get("/p/other.flp", (10, 100), SAMPLE_EXTENSIONS))
+        self.assertIsNone(self.cache.get("/p/a.flp", None, SAMPLE_EXTENSIONS))
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_persists_between_sessions(self):
+        self.cache.put("/p/a.flp", (10, 100), SAMPLE_EXTENSIONS, ["C:\\a.wav"])
+        self.cache.close()
+
+        self.cache = ParseCache(self.db_path)
+        self.assertEqual(self.cache.get("/p/a.flp", (10, 100), SAMPLE_EXTENSIONS), ["C:\\a.wav"])
+
+    def test_evicts_least_recently_used_entries(self):
+        self.cache.close()
+        self.cache = ParseCache(self.db_path, max_bytes=200)
+        paths = ["C:\\Samples\\kick.wav"] * 2  # about 50 bytes per entry
+
+        with patch('src.signature_cache.time.time', side_effect=range(100)):
+            for i in range(3):
+                self.cache.put(f"/p/{i}.flp", (1, 1), SAMPLE_EXTENSIONS, paths)
+
+            self.cache.get("/p/0.flp", (1, 1), SAMPLE_EXTENSIONS)
+
+            for i in range(3, 5):
+                self.cache.put(f"/p/{i}.flp", (1, 1), SAMPLE_EXTENSIONS, paths)
+
+        self.assertLessEqual(len(self.cache), 4)
+        self.assertIsNotNone(self.cache.get("/p/0.flp", (1, 1), SAMPLE_EXTENSIONS))
+        self.assertIsNone(self.cache.get("/p/1.flp", (1, 1), SAMPLE_EXTENSIONS))
+        self.assertIsNotNone(self.cache.get("/p/4.flp", (1, 1), SAMPLE_EXTENSIONS))
+
+
+class TestFLPFileWithCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.test_dir, "cache.sqlite3"))
+        self.flp_path = os.path.join(self.test_dir, "project.flp")
+        with open(self.flp_path, 'wb') as f:
+            f.write(b"FLhd")
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    @patch('src.flp_file.filter_existing_paths', side_effect=lambda paths: paths)
+    @patch('src.flp_file.read_sample_paths', return_value=["C:\\a.wav"])
+    def test_unchanged_file_is_not_parsed_again(self, mock_read, mock_filter):
+        FLPFile(self.flp_path, cache=self.cache)
+        flp = FLPFile(self.flp_path, cache=self.cache)
+        flp.refresh_paths()
+
+        mock_read.assert_called_once_with(self.flp_path, SAMPLE_EXTENSIONS)
+        self.assertEqual(flp.existing_unique_paths, ["C:\\a.wav"])
+
+    @patch('src.flp_file.filter_existing_paths', side_effect=lambda paths: paths)
+    @patch('src.flp_file.read_sample_paths', side_effect=[["C:\\a.wav"], ["C:\\b.wav"]])
+    def test_changed_file_is_parsed_again(self, mock_read, mock_filter):
+        flp = FLPFile(self.flp_path, cache=self.cache)
+
+        with open(self.flp_path, 'ab') as f:
+            f.write(b"FLdt")
+        flp.refresh_paths()
+
+        self.assertEqual(mock_read.call_count, 2)
+        self.assertEqual([s.path for s in flp.samples], ["C:\\b.wav"])
+
+    @patch('src.flp_file.filter_existing_paths', side_effect=lambda paths: paths)
+    @patch('src.flp_file.read_sample_paths', side_effect=[None, ["C:\\a.wav"]])
+    def test_failed_read_is_not_cached(self, mock_read, mock_filter):
+        flp = FLPFile(self.flp_path, cache=self.cache)
+
+        self.assertTrue(flp.read_failed)
+        self.assertEqual(flp.samples, [])
+        self.assertIsNone(self.cache.get(self.flp_path, flp.signature, SAMPLE_EXTENSIONS))
+
+        # retried on refresh although the file did not change
+        flp.refresh_paths()
+
+        self.assertFalse(flp.read_failed)
+        self.assertEqual(flp.existing_unique_paths, ["C:\\a.wav"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import os
-from src.sample import Sample
+import tracemalloc
+from src.sample import Sample, PathTable, sort_samples, filter_samples, SORT_LENGTH, SORT_FORMAT
+from src.audio_probe import AudioInfo
 
 class TestSample(unittest.TestCase):
 
@@ -8,19 +10,7 @@ class TestSample(unittest.TestCase):
         sample = Sample("/some/path/to/audiofile.wav")
         self.assertEqual(sample.path, "/some/path/to/audiofile.wav")
         self.assertEqual(sample.file_name, "audiofile.wav")
-        self.assertFalse(sample.extract)
-
-    def test_toggle_extract_switches_state_true(self):
-        sample = Sample("test.wav")
-        self.assertFalse(sample.extract)
-        sample.toggle_extract()
-        self.assertTrue(sample.extract)
-
-    def test_toggle_extract_switches_state_back_to_false(self):
-        sample = Sample("test.wav")
-        sample.toggle_extract()  # True
-        sample.toggle_extract()  # False
-        self.assertFalse(sample.extract)
+        self.assertIsNone(sample.info)
 
     def test_file_name_extraction_with_different_paths(self):
         # Windows-style path
@@ -32,6 +22,99 @@ class TestSample(unittest.TestCase):
         self.assertEqual(unix_sample.file_name, "sound.mp3")
 
 
+class TestSortAndFilterSamples(unittest.TestCase):
+
+    def setUp(self):
+        self.kick = Sample("/s/Kick.wav")
+        self.kick.info = AudioInfo("wav", duration=0.5, sample_rate=44100, channels=1)
+        self.pad = Sample("/s/pad.ogg")
+        self.pad.info = AudioInfo("ogg", duration=12.0, sample_rate=48000, channels=2)
+        self.loop = Sample("/s/loop.mp3")
+        self.samples = [self.pad, self.loop, self.kick]
+
+    def test_sort_by_name_ignores_case(self):
+        self.assertEqual(sort_samples(self.samples), [self.kick, self.loop, self.pad])
+
+    def test_sort_by_length_puts_unprobed_samples_last(self):
+        self.assertEqual(sort_samples(self.samples, SORT_LENGTH), [self.kick, self.pad, self.loop])
+        self.assertEqual(sort_samples(self.samples, SORT_LENGTH, reverse=True), [self.pad, self.kick, self.loop])
+
+    def test_sort_by_format(self):
+        self.assertEqual(sort_samples(self.samples, SORT_FORMAT), [self.pad, self.kick, self.loop])
+
+    def test_filter_by_format_falls_back_to_extension(self):
+        self.assertEqual(filter_samples(self.samples, formats={"wav", "mp3"}), [self.loop, self.kick])
+
+    def test_filter_by_duration_skips_unprobed_samples(self):
+        self.assertEqual(filter_samples(self.samples, min_duration=1.0), [self.pad])
+        self.assertEqual(filter_samples(self.samples, max_duration=1.0), [self.kick])
+
+
+
+class DictSample:
+    # the former representation: a __dict__ per sample holding the full path
+    def __init__(self, path):
+        self.path = path
+        self.file_name = os.path.basename(path)
+        self.extract = False
+        self.info = None
+
+
+def parsed_paths(count=10000):
+    # 20 kits, the same folders are shared by many samples as in real projects
+    return [f"/home/producer/Samples/Packs/Drum Kit {i % 20:02d}/One Shots/Kicks/kick {i:05d}.wav" for i in range(count)]
+
+
+def allocated_bytes(build):
+    tracemalloc.start()
+    try:
+        # keep the result alive until it was measured
+        result = build()
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+class TestCompactSamples(unittest.TestCase):
+
+    def test_sample_shares_folder_string(self):
+        a = Sample("/".join(["", "kits", "drums", "kick.wav"]))
+        b = Sample("/kits/drums/snare.wav")
+
+        self.assertEqual(a.path, "/kits/drums/kick.wav")
+        self.assertEqual(a.file_name, "kick.wav")
+        self.assertIs(a.folder, b.folder)
+        with self.assertRaises(AttributeError):
+            a.color = "red"
+
+    def test_path_table(self):
+        paths = ["/a/x.wav", "/b/y.wav", "/a/z.wav", "w.wav"]
+        table = PathTable(paths)
+
+        self.assertEqual(list(table), paths)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table[2], "/a/z.wav")
+        self.assertEqual(table[1:3], paths[1:3])
+        self.assertEqual(table, paths)
+        self.assertEqual(table.folders, ["/a/", "/b/", ""])
+
+    def test_memory_benchmark_samples(self):
+        # samples plus the duplicate list of existing paths FLPFile used to keep
+        def dict_samples():
+            paths = parsed_paths()
+            return [DictSample(path) for path in paths], list(paths), paths
+
+        before = allocated_bytes(dict_samples)
+        after = allocated_bytes(lambda: [Sample(path) for path in parsed_paths()])
+
+        self.assertLess(after, before * 0.6)
+
+    def test_memory_benchmark_path_table(self):
+        before = allocated_bytes(parsed_paths)
+        after = allocated_bytes(lambda: PathTable(parsed_paths()))
+
+        self.assertLess(after, before * 0.75)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
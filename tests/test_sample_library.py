@@ -0,0 +1,133 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.sample_library import SampleLibrary
+from src.file_utils import relocate_missing_paths
+
+
+class TestSampleLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "library.sqlite3")
+        self.root = os.path.join(self.test_dir, "library")
+        self.library = SampleLibrary(self.db_path)
+
+    def tearDown(self):
+        self.library.close()
+        shutil.rmtree(self.test_dir)
+
+    def touch(self, *parts, data=b"data"):
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_resolves_moved_sample(self):
+        kick = self.touch("Drums", "Kicks", "kick.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        self.assertEqual(self.library.resolve("C:\\Old Samples\\Kicks\\kick.wav"), kick)
+        self.assertIsNone(self.library.resolve("C:\\Old Samples\\Kicks\\unknown.wav"))
+
+    def test_prefers_candidate_with_matching_parent_folders(self):
+        self.touch("Pack A", "Snares", "snare.wav")
+        wanted = self.touch("Pack B", "Snares", "snare.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        self.assertEqual(self.library.resolve("/Volumes/Old/Pack B/Snares/snare.wav"), wanted)
+
+    def test_same_name_with_other_size_is_not_returned(self):
+        other = self.touch("Pack B", "Snares", "snare.wav", data=b"other snare")
+        wanted = self.touch("Pack A", "Snares", "snare.wav", data=b"snare")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        self.assertEqual(self.library.resolve("/Volumes/Old/Pack B/Snares/snare.wav", len(b"snare")), wanted)
+        self.assertEqual(self.library.resolve("/Volumes/Old/Pack B/Snares/snare.wav", len(b"other snare")), other)
+        self.assertIsNone(self.library.resolve("/Volumes/Old/Pack B/Snares/snare.wav", 1234))
+
+    def test_file_replaced_since_update_is_not_returned(self):
+        self.touch("Drums", "kick.wav", data=b"kick")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        self.touch("Drums", "kick.wav", data=b"a different kick")
+
+        self.assertIsNone(self.library.resolve("C:\\Old\\kick.wav"))
+
+    def test_index_persists_and_only_changed_folders_are_listed(self):
+        self.touch("Drums", "kick.wav")
+        self.touch("FX", "riser.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+        self.library.close()
+
+        self.library = SampleLibrary(self.db_path)
+        self.assertEqual(self.library.roots, [os.path.abspath(self.root)])
+        self.assertEqual(len(self.library), 2)
+
+        clap = self.touch("FX", "clap.wav")
+        with patch('src.sample_library.os.scandir', wraps=os.scandir) as mock_scandir:
+            self.library.update()
+
+        mock_scandir.assert_called_once_with(os.path.join(os.path.abspath(self.root), "FX"))
+        self.assertEqual(self.library.resolve("D:\\FX\\clap.wav"), clap)
+
+    def test_deleted_folders_are_forgotten(self):
+        self.touch("Old", "hat.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        shutil.rmtree(os.path.join(self.root, "Old"))
+        self.library.update()
+
+        self.assertEqual(len(self.library), 0)
+        self.assertIsNone(self.library.resolve("C:\\Old\\hat.wav"))
+
+    def test_removed_root_is_dropped_from_index(self):
+        self.touch("Drums", "kick.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        self.library.remove_root(self.root)
+        self.library.update()
+
+        self.assertEqual(len(self.library), 0)
+
+    def test_deleted_root_is_dropped_from_index(self):
+        self.touch("kick.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        shutil.rmtree(self.root)
+        self.library.update()
+
+        self.assertEqual(len(self.library), 0)
+
+    def test_relocate_missing_paths(self):
+        kick = self.touch("Drums", "kick.wav")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        result = relocate_missing_paths(["C:\\Music\\kick.wav", "C:\\Music\\gone.wav"], [], self.library)
+
+        self.assertEqual(result, [kick])
+
+    def test_relocate_missing_paths_checks_known_sizes(self):
+        self.touch("Drums", "kick.wav", data=b"kick")
+        self.library.add_root(self.root)
+        self.library.update()
+
+        result = relocate_missing_paths(["C:\\Music\\kick.wav"], [], self.library, {"C:\\Music\\kick.wav": 100})
+
+        self.assertEqual(result, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
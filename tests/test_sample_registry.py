@@ -0,0 +1,85 @@
+import unittest
+import random
+from src.sample_registry import SampleRegistry
+
+
+class TestSampleRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = SampleRegistry()
+
+    def test_projects_share_one_sample(self):
+        a = self.registry.set_project_samples("a.flp", ["/kits/kick.wav", "/kits/snare.wav"])
+        b = self.registry.set_project_samples("b.flp", ["/kits/snare.wav", "/kits/./kick.wav"])
+
+        self.assertIs(a[0], b[1])
+        self.assertIs(a[1], b[0])
+        self.assertEqual(len(self.registry), 2)
+        self.assertEqual(self.registry.projects_using("/kits/kick.wav"), ["a.flp", "b.flp"])
+        self.assertEqual(self.registry.samples_of("b.flp"), b)
+
+    def test_duplicate_paths_in_one_project_count_once(self):
+        samples = self.registry.set_project_samples("a.flp", ["/kits/kick.wav", "/kits/kick.wav"])
+
+        self.assertEqual(len(samples), 1)
+        self.assertEqual(self.registry.use_count("/kits/kick.wav"), 1)
+
+    def test_replacing_project_samples_keeps_shared_objects(self):
+        kick = self.registry.set_project_samples("a.flp", ["/kits/kick.wav", "/kits/snare.wav"])[0]
+        kick.info = "probed"
+
+        samples = self.registry.set_project_samples("a.flp", ["/kits/hat.wav", "/kits/kick.wav"])
+
+        self.assertIs(samples[1], kick)
+        self.assertEqual(samples[1].info, "probed")
+        self.assertNotIn("/kits/snare.wav", self.registry)
+        self.assertEqual(self.registry.use_count("/kits/snare.wav"), 0)
+
+    def test_remove_project_drops_unused_samples(self):
+        self.registry.set_project_samples("a.flp", ["/kits/kick.wav", "/kits/snare.wav"])
+        self.registry.set_project_samples("b.flp", ["/kits/kick.wav"])
+
+        self.registry.remove_project("a.flp")
+
+        self.assertEqual(self.registry.projects_using("/kits/kick.wav"), ["b.flp"])
+        self.assertIsNone(self.registry.get("/kits/snare.wav"))
+        self.assertEqual(self.registry.samples_of("a.flp"), [])
+
+        self.registry.remove_project("b.flp")
+        self.assertEqual(len(self.registry), 0)
+        self.assertEqual(self.registry.most_used(), [])
+
+    def test_most_used(self):
+        for i in range(5):
+            paths = ["/kits/kick.wav"] + (["/kits/snare.wav"] if i < 3 else []) + [f"/kits/vox{i}.wav"]
+            self.registry.set_project_samples(f"p{i}.flp", paths)
+
+        most_used = [(sample.path, count) for sample, count in self.registry.most_used(3)]
+        self.assertEqual(most_used, [("/kits/kick.wav", 5), ("/kits/snare.wav", 3), ("/kits/vox0.wav", 1)])
+
+        # counts go down again when projects stop using a sample
+        for i in range(4):
+            self.registry.set_project_samples(f"p{i}.flp", ["/kits/snare.wav"])
+
+        most_used = [(sample.path, count) for sample, count in self.registry.most_used(10)]
+        self.assertEqual(most_used[0], ("/kits/snare.wav", 4))
+        self.assertCountEqual(most_used[1:], [("/kits/kick.wav", 1), ("/kits/vox4.wav", 1)])
+
+    def test_most_used_matches_sorting(self):
+        # random links and unlinks, the buckets must always agree with the real use counts
+        rng = random.Random(7)
+        paths = [f"/kits/s{i}.wav" for i in range(30)]
+
+        for _ in range(300):
+            project = f"p{rng.randrange(15)}.flp"
+            if rng.random() < 0.2:
+                self.registry.remove_project(project)
+            else:
+                self.registry.set_project_samples(project, rng.sample(paths, rng.randrange(10)))
+
+        counts = sorted((self.registry.use_count(path) for path in paths if path in self.registry), reverse=True)
+        self.assertEqual([count for _, count in self.registry.most_used(len(paths))], counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+from src.signature_cache import SignatureCache
+
+
+class WeightedCache(SignatureCache):
+    table = "values_"
+    columns = (("value", "TEXT"),)
+    weight = "LENGTH(value)"
+
+
+class TestSignatureCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "cache.sqlite3")
+        self.cache = WeightedCache(self.db_path, 100)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_values_are_only_returned_for_the_stored_signature(self):
+        self.cache._put("/a.wav", (1, 2), value="x")
+
+        self.assertEqual(self.cache._get("/a.wav", (1, 2), "value"), ("x",))
+        self.assertIsNone(self.cache._get("/a.wav", (1, 3), "value"))
+        self.assertIsNone(self.cache._get("/b.wav", (1, 2), "value"))
+
+    def test_replaced_rows_are_weighed_again(self):
+        self.cache._put("/a.wav", (1, 1), value="x" * 60)
+        self.cache._put("/a.wav", (1, 2), value="x" * 10)
+        self.cache._put("/a.wav", (1, 2), value="x" * 20)
+        self.cache._put("/b.wav", (1, 1), value="x" * 60)
+
+        self.assertEqual(self.cache._total, 80)
+        self.assertEqual(len(self.cache), 2)
+
+        self.cache.close()
+        self.cache = WeightedCache(self.db_path, 100)
+        self.assertEqual(self.cache._total, 80)
+
+    def test_read_rows_are_evicted_last(self):
+        with patch('src.signature_cache.time.time', side_effect=range(100)):
+            for name in "abc":
+                self.cache._put(f"/{name}.wav", (1, 1), value="x" * 30)
+
+            self.cache._get("/a.wav", (1, 1), "value", touch=True)
+            self.cache._put("/d.wav", (1, 1), value="x" * 30)
+
+        self.assertIsNotNone(self.cache._get("/a.wav", (1, 1), "value"))
+        self.assertIsNone(self.cache._get("/b.wav", (1, 1), "value"))
+        self.assertLessEqual(self.cache._total, 90)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from src.virtual_list import visible_range, clamp_offset, IncrementalFilter
+
+
+class TestVisibleRange(unittest.TestCase):
+
+    def test_top_of_the_list(self):
+        self.assertEqual(visible_range(0, 400, 40, 1000), (0, 11))
+
+    def test_partially_scrolled_row(self):
+        # row 2 is cut off at the top, row 12 at the bottom
+        self.assertEqual(visible_range(100, 400, 40, 1000), (2, 13))
+
+    def test_buffer_rows(self):
+        self.assertEqual(visible_range(0, 400, 40, 1000, buffer=2), (0, 13))
+
+    def test_row_count_does_not_depend_on_item_count(self):
+        small = visible_range(4000, 400, 40, 1000)
+        large = visible_range(4000, 400, 40, 1000000)
+        self.assertEqual(small[1] - small[0], large[1] - large[0])
+
+    def test_short_and_empty_lists(self):
+        self.assertEqual(visible_range(0, 400, 40, 3, buffer=2), (0, 3))
+        self.assertEqual(visible_range(0, 400, 40, 0), (0, 0))
+
+
+class TestClampOffset(unittest.TestCase):
+
+    def test_clamps_to_the_end_of_the_list(self):
+        self.assertEqual(clamp_offset(100000, 400, 40, 100), 3600)
+
+    def test_never_negative(self):
+        self.assertEqual(clamp_offset(-50, 400, 40, 100), 0)
+        self.assertEqual(clamp_offset(200, 400, 40, 3), 0)
+
+
+class TestIncrementalFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.filter = IncrementalFilter(key=lambda name: name)
+        for name in ["Trap Beat.flp", "trap remix.flp", "House.flp", "Deep House 2.flp"]:
+            self.filter.add(name)
+
+    def test_case_insensitive_substring(self):
+        self.assertEqual(self.filter.set_query("TRAP"), ["Trap Beat.flp", "trap remix.flp"])
+        self.assertEqual(self.filter.set_query("house"), ["House.flp", "Deep House 2.flp"])
+        self.assertEqual(self.filter.set_query(""), self.filter.items)
+
+    def test_growing_query_only_searches_previous_matches(self):
+        self.filter.set_query("trap")
+
+        checked = []
+
+        class RecordingList(list):
+            def __getitem__(self, index):
+                checked.append(index)
+                return list.__getitem__(self, index)
+
+        self.filter._keys = RecordingList(self.filter._keys)
+        self.assertEqual(self.filter.set_query("trap r"), ["trap remix.flp"])
+        self.assertEqual(checked, [0, 1])
+
+    def test_added_items_are_matched_against_current_query(self):
+        self.filter.set_query("house")
+
+        self.assertTrue(self.filter.add("Tech House.flp"))
+        self.assertFalse(self.filter.add("Drill.flp"))
+        self.assertEqual(self.filter.matches, ["House.flp", "Deep House 2.flp", "Tech House.flp"])
+
+
+if __name__ == '__main__':
+    unittest.main()
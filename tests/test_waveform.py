@@ -0,0 +1,164 @@
+import unittest
+import os
+import wave
+import tempfile
+import shutil
+import threading
+import numpy as np
+import pygame
+from unittest.mock import patch
+from src.waveform import compute_peaks, pcm_to_float, read_peaks, PeakCache, WaveformLoader
+from src.audio_probe import AudioInfo
+
+
+class TestComputePeaks(unittest.TestCase):
+
+    def test_min_and_max_per_bucket(self):
+        samples = np.array([0.1, -0.5, 0.9, 0.2, -0.1, -0.3, 0.0, 0.4])
+
+        peaks = compute_peaks(samples, buckets=4)
+
+        np.testing.assert_allclose(peaks, [[-0.5, 0.1], [0.2, 0.9], [-0.3, -0.1], [0.0, 0.4]])
+
+    def test_channels_are_merged(self):
+        samples = np.array([[0.5, -0.25], [0.1, 0.75]])
+
+        np.testing.assert_allclose(compute_peaks(samples, buckets=1), [[-0.25, 0.75]])
+
+    def test_fewer_frames_than_buckets(self):
+        peaks = compute_peaks(np.array([0.5, -0.5]), buckets=4)
+
+        self.assertEqual(peaks.shape, (4, 2))
+        self.assertEqual(peaks.min(), -0.5)
+        self.assertEqual(peaks.max(), 0.5)
+
+
+class TestPcmToFloat(unittest.TestCase):
+
+    def test_sample_widths(self):
+        np.testing.assert_allclose(pcm_to_float(bytes([0, 128, 255]), 1), [-1.0, 0.0, 127 / 128])
+        np.testing.assert_allclose(pcm_to_float(np.array([-32768, 16384], dtype='<i2').tobytes(), 2), [-1.0, 0.5])
+        np.testing.assert_allclose(pcm_to_float(b"\x00\x00\x80\xff\xff\x7f", 3), [-1.0, (2 ** 23 - 1) / 2 ** 23])
+
+
+class TestReadPeaks(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_wav(self, samples, channels=1):
+        path = os.path.join(self.test_dir, "test.wav")
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(channels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            wav_file.writeframes((samples * 32767).astype('<i2').tobytes())
+        return path
+
+    def test_chunked_wav_read_matches_whole_file(self):
+        rng = np.random.default_rng(1)
+        samples = rng.uniform(-1, 1, size=(10007, 2))
+        path = self.write_wav(samples, channels=2)
+
+        with patch('src.waveform.WAV_CHUNK_FRAMES', 1000):
+            chunked = read_peaks(path, buckets=60)
+
+        expected = compute_peaks(pcm_to_float((samples * 32767).astype('<i2').tobytes(), 2).reshape(-1, 2), buckets=60)
+        np.testing.assert_allclose(chunked, expected)
+
+    def test_wav_with_fewer_frames_than_buckets_matches_whole_file(self):
+        rng = np.random.default_rng(2)
+        samples = rng.uniform(-1, 1, size=30)
+        path = self.write_wav(samples)
+
+        expected = compute_peaks(pcm_to_float((samples * 32767).astype('<i2').tobytes(), 2), buckets=60)
+        np.testing.assert_allclose(read_peaks(path, buckets=60), expected)
+
+    def test_long_compressed_file_is_not_decoded(self):
+        path = os.path.join(self.test_dir, "mix.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"small file")
+
+        # a one hour MP3 decodes to hundreds of MiB whatever the size of the file
+        with patch('src.waveform.probe', return_value=AudioInfo("mp3", duration=3600.0)), \
+                patch('pygame.mixer.Sound') as mock_sound:
+            self.assertIsNone(read_peaks(path))
+
+        mock_sound.assert_not_called()
+
+    def test_unreadable_file(self):
+        path = os.path.join(self.test_dir, "broken.mp3")
+        with open(path, 'wb') as f:
+            f.write(b"not audio")
+
+        with patch('pygame.mixer.Sound', side_effect=pygame.error("unsupported")):
+            self.assertIsNone(read_peaks(path))
+
+
+class TestPeakCacheAndLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = PeakCache(os.path.join(self.test_dir, "peaks.sqlite3"))
+        self.path = os.path.join(self.test_dir, "kick.wav")
+        with open(self.path, 'wb') as f:
+            f.write(b"data")
+        self.peaks = np.linspace(-1, 1, 120, dtype=np.float32).reshape(60, 2)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_cache_roundtrip_and_invalidation(self):
+        self.cache.put(self.path, (4, 1), 60, self.peaks)
+
+        np.testing.assert_allclose(self.cache.get(self.path, (4, 1), 60), self.peaks, atol=1 / 127)
+        self.assertIsNone(self.cache.get(self.path, (5, 2), 60))
+        self.assertIsNone(self.cache.get(self.path, (4, 1), 30))
+
+    def load(self, loader):
+        done = threading.Event()
+        results = []
+        loader.request(self.path, lambda path, peaks: (results.append(peaks), done.set()))
+        done.wait(5)
+        return results[0]
+
+    def test_reopening_does_not_decode_again(self):
+        with patch('src.waveform.read_peaks', return_value=self.peaks) as mock_read:
+            loader = WaveformLoader(self.cache)
+            self.load(loader)
+            self.load(loader)  # from memory
+            loader.close()
+
+            reopened = WaveformLoader(self.cache)  # from the peak cache
+            peaks = self.load(reopened)
+            reopened.close()
+
+        mock_read.assert_called_once()
+        np.testing.assert_allclose(peaks, self.peaks, atol=1 / 127)
+
+    def test_requests_for_hidden_rows_are_dropped(self):
+        release = threading.Event()
+
+        def slow_read(path, buckets):
+            release.wait(5)
+            return self.peaks
+
+        loader = WaveformLoader(self.cache, max_workers=1)
+        other = os.path.join(self.test_dir, "hidden.wav")
+
+        with patch('src.waveform.read_peaks', side_effect=slow_read) as mock_read:
+            loader.request(self.path, lambda path, peaks: None)
+            loader.request(other, lambda path, peaks: None)
+            loader.retain([self.path])
+            release.set()
+            loader.close()
+
+        self.assertEqual([c.args[0] for c in mock_read.call_args_list], [self.path])
+
+
+if __name__ == '__main__':
+    unittest.main()